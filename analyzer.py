@@ -1,109 +1,787 @@
-
+import os
+import time
+import unicodedata
+import warnings
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-import statsmodels.api as sm
-from docx import Document
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from scipy import sparse
+from scipy.stats import norm
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from esquema_eph import NOMBRES_ANALISIS, VARIABLES_INDICE
+
+# Ponderadores EPH: PONDERA para personas, PONDIH para hogares
+PESO_PERSONAS = 'PONDERA'
+PESO_HOGARES = 'PONDIH'
+
+# Respuestas usadas en los indicadores: (etiqueta, código INDEC)
+RESPUESTA_SI = ('Sí', 1)
+RESPUESTA_NO = ('No', 2)
+SEXO_MUJER = ('Mujer', 2)
+
+# Nombre de análisis -> código INDEC de las variables codificadas (sexo -> CH04, ...)
+CODIGOS_INDEC = {nombre: codigo for codigo, nombre in NOMBRES_ANALISIS.items()}
 
 def resumen_descriptivo(df_hogar, df_ind):
     return df_hogar.describe(include='all').T, df_ind.describe(include='all').T
 
-def generar_cruces(df):
-    return df.groupby(['sexo', 'nivel_educativo']).agg({
-        'acceso_internet': lambda x: (x == 'Sí').mean() * 100
-    }).reset_index()
+def _pesos(df, pesos):
+    """Vector de ponderadores; sin la columna de pesos cada caso vale 1"""
+    if pesos in df.columns:
+        return pd.to_numeric(df[pesos], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    return np.ones(len(df))
 
-def calcular_exclusion_digital(df):
-    df = df.copy()
-    # Usar variables TIC reales (ejemplo: IP_III_04 = uso computadora, IP_III_06 = uso internet)
-    acc_comp = 'IP_III_04' if 'IP_III_04' in df.columns else None
-    acc_inet = 'IP_III_06' if 'IP_III_06' in df.columns else None
+def _normalizar_etiqueta(texto):
+    """Etiqueta sin tildes ni mayúsculas, para comparar "Sí", "Si" y "SI" como iguales"""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in texto if not unicodedata.combining(c)).strip().casefold()
+
+def _es(serie, respuesta):
+    """Máscara vectorizada de una respuesta sobre los códigos enteros de la columna.
+
+    En las columnas numéricas se compara el código INDEC. Las categóricas sólo llegan
+    aquí si la base no trae los códigos (etiquetas como texto): se busca la etiqueta
+    una vez entre las categorías y se compara el código de cada fila.
+    """
+    etiqueta, codigo = respuesta
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        buscada = _normalizar_etiqueta(etiqueta)
+        posiciones = [i for i, cat in enumerate(serie.cat.categories) if _normalizar_etiqueta(cat) == buscada]
+        return np.isin(serie.cat.codes.to_numpy(), posiciones)
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan) == codigo
+    return (serie == etiqueta).to_numpy(dtype=bool, na_value=False)
+
+def _columna(df, nombre):
+    """Variable codificada para armar máscaras: la columna de códigos INDEC que procesar_datos
+    conserva junto a la categórica o, si no está, la columna con su nombre de análisis"""
+    codigo = CODIGOS_INDEC.get(nombre)
+    if codigo in df.columns:
+        return df[codigo]
+    if nombre in df.columns:
+        return df[nombre]
+    return None
+
+def _codificar_grupos(df, grupos):
+    """Factoriza las variables de agrupamiento en un código entero por fila.
+
+    Devuelve los códigos (-1 si alguna variable falta) y una tabla con las
+    etiquetas de cada grupo, ordenadas como los códigos.
+    """
+    codigos = np.zeros(len(df), dtype=np.int64)
+    faltantes = np.zeros(len(df), dtype=bool)
+    niveles = []
+    for col in grupos:
+        cod, unicos = pd.factorize(df[col], sort=True)
+        faltantes |= cod < 0
+        codigos = codigos * len(unicos) + cod
+        niveles.append(unicos)
+    codigos[faltantes] = -1
+    presentes, codigos_densos = np.unique(codigos[~faltantes], return_inverse=True)
+    codigos[~faltantes] = codigos_densos
+    # Reconstruir las etiquetas de cada grupo a partir del código combinado
+    etiquetas = {}
+    resto = presentes
+    for col, unicos in reversed(list(zip(grupos, niveles))):
+        etiquetas[col] = np.asarray(unicos)[resto % len(unicos)]
+        resto = resto // len(unicos)
+    tabla = pd.DataFrame({col: etiquetas[col] for col in grupos})
+    return codigos, tabla
+
+def _sumas_ponderadas(codigos, w, df, variables, n_grupos):
+    """Casos, total ponderado y sumas ponderadas de cada variable por grupo, en una pasada"""
+    validos = codigos >= 0
+    cod, w = codigos[validos], w[validos]
+    sumas = {
+        'casos': np.bincount(cod, minlength=n_grupos).astype(np.float64),
+        'total_ponderado': np.bincount(cod, weights=w, minlength=n_grupos),
+    }
+    for var in variables:
+        x = pd.to_numeric(df[var], errors='coerce').to_numpy(dtype=np.float64)[validos]
+        observado = ~np.isnan(x)
+        sumas[f'{var}__num'] = np.bincount(cod, weights=np.where(observado, w * x, 0), minlength=n_grupos)
+        sumas[f'{var}__den'] = np.bincount(cod, weights=np.where(observado, w, 0), minlength=n_grupos)
+    return pd.DataFrame(sumas)
+
+def _estimaciones(tabla, sumas, variables):
+    """Convierte las sumas ponderadas en totales, proporciones y medias"""
+    resultado = tabla.reset_index(drop=True).copy()
+    resultado['casos'] = sumas['casos'].astype(np.int64).to_numpy()
+    resultado['total_ponderado'] = sumas['total_ponderado'].to_numpy()
+    total = resultado['total_ponderado'].sum()
+    resultado['proporcion'] = resultado['total_ponderado'] / total if total else np.nan
+    for var in variables:
+        den = sumas[f'{var}__den'].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            resultado[f'media_{var}'] = np.where(den > 0, sumas[f'{var}__num'].to_numpy() / den, np.nan)
+        resultado[f'total_{var}'] = sumas[f'{var}__num'].to_numpy()
+    return resultado
+
+def estimar_ponderado(df, grupos, variables=(), pesos=PESO_PERSONAS):
+    """Totales, proporciones y medias ponderadas por grupo, en una pasada vectorizada.
+
+    Para cada combinación de `grupos` devuelve los casos muestrales, la población
+    expandida (`total_ponderado`), su proporción sobre el total y, por cada variable
+    numérica, la media (`media_<var>`) y el total (`total_<var>`) ponderados. Las
+    medias de indicadores 0/1 son proporciones. Se usa PONDERA para personas y
+    PONDIH para hogares.
+    """
+    variables = list(variables)
+    codigos, tabla = _codificar_grupos(df, grupos)
+    sumas = _sumas_ponderadas(codigos, _pesos(df, pesos), df, variables, len(tabla))
+    return _estimaciones(tabla, sumas, variables)
+
+def tablas_ponderadas(df, dimensiones, variables=(), pesos=PESO_PERSONAS):
+    """Todas las tablas ponderadas para cada combinación de `dimensiones`, en una llamada.
+
+    Las sumas se calculan una sola vez al nivel más desagregado y cada tabla se
+    obtiene agregándolas, por lo que el costo sobre la base completa es de una pasada.
+    Devuelve un diccionario {tupla de dimensiones: tabla}.
+    """
+    variables = list(variables)
+    codigos, tabla = _codificar_grupos(df, dimensiones)
+    sumas = _sumas_ponderadas(codigos, _pesos(df, pesos), df, variables, len(tabla))
+    base = pd.concat([tabla, sumas], axis=1)
+    tablas = {}
+    for k in range(1, len(dimensiones) + 1):
+        for grupo in combinations(dimensiones, k):
+            agregado = base.groupby(list(grupo), sort=True, observed=True)[list(sumas.columns)].sum().reset_index()
+            tablas[grupo] = _estimaciones(agregado[list(grupo)], agregado, variables)
+    return tablas
+
+def generar_cruces(df, pesos=PESO_PERSONAS):
+    """Porcentaje ponderado de acceso a internet por sexo y nivel educativo"""
+    indicador = pd.DataFrame({
+        'sexo': df['sexo'],
+        'nivel_educativo': df['nivel_educativo'],
+        'acceso_internet': _es(_columna(df, 'acceso_internet'), RESPUESTA_SI).astype(float),
+    })
+    if pesos in df.columns:
+        indicador[pesos] = df[pesos]
+    cruces = estimar_ponderado(indicador, ['sexo', 'nivel_educativo'], ['acceso_internet'], pesos)
+    cruces['acceso_internet'] = cruces['media_acceso_internet'] * 100
+    return cruces[['sexo', 'nivel_educativo', 'acceso_internet']]
+
+# Puntos de corte de los deciles (p10 ... p90)
+DECILES = tuple(round(0.1 * k, 1) for k in range(1, 10))
+
+# Decil de cada ingreso publicado por el INDEC: el código 12 marca la no respuesta
+DECIL_INGRESO = {'IPCF': 'DECCFR', 'ITF': 'DECIFR', 'P47T': 'DECINDR', 'P21': 'DECOCUR'}
+DECIL_NO_RESPUESTA = 12
+# En los ingresos del hogar un total de 0 es, en su mayoría, no respuesta (PONDIH ya la corrige)
+INGRESOS_HOGAR = ('IPCF', 'ITF')
+
+def _ingreso_valido(df, variable):
+    """Ingreso como float y máscara de los casos con respuesta.
+
+    Excluye faltantes, códigos negativos (-9 = Ns./Nr.), el decil 12 cuando la base
+    trae la columna de decil y, en los ingresos del hogar, los totales iguales a 0.
+    """
+    x = pd.to_numeric(df[variable], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    validos = ~np.isnan(x) & (x > 0 if variable in INGRESOS_HOGAR else x >= 0)
+    decil = DECIL_INGRESO.get(variable)
+    if decil in df.columns:
+        validos &= pd.to_numeric(df[decil], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan) != DECIL_NO_RESPUESTA
+    return x, validos
+
+def distribucion_ingresos(df, variable='IPCF', grupos=(), pesos=PESO_HOGARES, cuantiles=DECILES):
+    """Cuantiles, media, brechas y Gini ponderados de un ingreso para todos los grupos a la vez.
 
-    if acc_comp and acc_inet:
-        df['excluido'] = ((df[acc_comp] == 'No') & (df[acc_inet] == 'No')).astype(int)
-        return df[['sexo', 'edad', 'nivel_educativo', 'excluido']] if 'sexo' in df.columns else df
+    Ordena una sola vez por (grupo, ingreso) y obtiene los cuantiles de todos los
+    grupos con pesos acumulados y una única búsqueda binaria. El Gini se calcula con
+    la regla del trapecio sobre la curva de Lorenz ponderada. Se excluyen la no
+    respuesta de ingresos (ver `_ingreso_valido`) y los casos sin peso.
+    """
+    grupos = list(grupos)
+    if grupos:
+        codigos, tabla = _codificar_grupos(df, grupos)
     else:
+        codigos, tabla = np.zeros(len(df), dtype=np.int64), pd.DataFrame(index=[0])
+    n_grupos = len(tabla)
+    x, validos = _ingreso_valido(df, variable)
+    w = _pesos(df, pesos)
+    validos &= (codigos >= 0) & (w > 0)
+    g, x, w = codigos[validos], x[validos], w[validos]
+
+    orden = np.lexsort((x, g))
+    g, x, w = g[orden], x[orden], w[orden]
+    total_w = np.bincount(g, weights=w, minlength=n_grupos)
+    total_x = np.bincount(g, weights=w * x, minlength=n_grupos)
+
+    # Pesos e ingresos acumulados dentro de cada grupo
+    inicio = np.searchsorted(g, np.arange(n_grupos))
+    acum_w = np.cumsum(w)
+    acum_wx = np.cumsum(w * x)
+    previo_w = np.concatenate(([0.0], acum_w))[inicio]
+    previo_wx = np.concatenate(([0.0], acum_wx))[inicio]
+    acum_w -= previo_w[g]
+    acum_wx -= previo_wx[g]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        participacion = acum_w / total_w[g]
+
+    resultado = tabla.reset_index(drop=True).copy()
+    resultado['casos'] = np.bincount(g, minlength=n_grupos)
+    resultado['poblacion'] = total_w
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado['media'] = total_x / total_w
+
+    # Cuantiles: primer caso del grupo cuya participación acumulada alcanza q.
+    # `g + participacion` es creciente en toda la base, así que basta un searchsorted.
+    clave = g + participacion
+    fin = np.concatenate((inicio[1:], [len(g)])) - 1
+    vacios = resultado['casos'].to_numpy() == 0
+    for q in sorted(set(cuantiles) | {0.5}):
+        posicion = np.searchsorted(clave, np.arange(n_grupos) + q - 1e-12, side='left')
+        posicion = np.clip(np.minimum(posicion, fin), 0, None)
+        valores = x[posicion] if len(x) else np.full(n_grupos, np.nan)
+        resultado[f'p{int(round(q * 100))}'] = np.where(vacios, np.nan, valores)
+    resultado['mediana'] = resultado['p50']
+
+    # Ingreso medio del primer y último decil y brechas
+    decil = np.minimum((((acum_w - w / 2) / total_w[g]) * 10).astype(np.int64), 9)
+    w_decil = np.bincount(g * 10 + decil, weights=w, minlength=n_grupos * 10).reshape(n_grupos, 10)
+    wx_decil = np.bincount(g * 10 + decil, weights=w * x, minlength=n_grupos * 10).reshape(n_grupos, 10)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_decil = wx_decil / w_decil
+        resultado['media_decil_1'] = media_decil[:, 0]
+        resultado['media_decil_10'] = media_decil[:, 9]
+        resultado['brecha_decil_10_1'] = media_decil[:, 9] / media_decil[:, 0]
+        if {'p10', 'p90'} <= set(resultado.columns):
+            resultado['brecha_p90_p10'] = resultado['p90'] / resultado['p10']
+
+        # Gini = 1 - Σ w_i (L_i + L_{i-1}) / W, con L la participación acumulada del ingreso
+        area = np.bincount(g, weights=w * (2 * acum_wx - w * x), minlength=n_grupos)
+        resultado['gini'] = 1 - area / (total_w * total_x)
+    return resultado.replace([np.inf, -np.inf], np.nan)
+
+def resumen_ingresos(df, variables=('IPCF', 'ITF'), pesos=PESO_HOGARES):
+    """Distribución ponderada de cada ingreso: total, por región, por aglomerado y por año.
+
+    Devuelve un diccionario {(variable, desagregación): tabla}. Si la base tiene ANO4,
+    cada desagregación se abre además por año.
+    """
+    periodo = ['ANO4'] if 'ANO4' in df.columns and df['ANO4'].nunique() > 1 else []
+    desagregaciones = {'Total': periodo}
+    for dim, nombre in (('REGION', 'Región'), ('AGLOMERADO', 'Aglomerado')):
+        if dim in df.columns:
+            desagregaciones[nombre] = periodo + [dim]
+    resultados = {}
+    for variable in variables:
+        if variable not in df.columns:
+            continue
+        for nombre, grupos in desagregaciones.items():
+            resultados[(variable, nombre)] = distribucion_ingresos(df, variable, grupos, pesos)
+    return resultados
+
+def calcular_exclusion_digital(df):
+    """Marca como excluidas a las personas sin acceso a computadora ni a internet (IP_III_04 e IP_III_06)"""
+    acc_comp, acc_inet = _columna(df, 'acceso_computadora'), _columna(df, 'acceso_internet')
+    if acc_comp is None or acc_inet is None:
         raise ValueError("No se encontraron columnas de acceso a computadora o internet con nombres TIC esperados")
+    df = df.copy()
+    df['excluido'] = (_es(acc_comp, RESPUESTA_NO) & _es(acc_inet, RESPUESTA_NO)).astype(np.int8)
+    columnas = [col for col in ('sexo', CODIGOS_INDEC['sexo'], 'edad', 'nivel_educativo', 'excluido', PESO_PERSONAS,
+                                'REGION', 'ANO4', 'TRIMESTRE') if col in df.columns]
+    return df[columnas] if 'sexo' in df.columns else df
+
 def movilidad_social(df):
-    return df.groupby(['nivel_educativo', 'actividad']).size().reset_index(name='frecuencia')
-
-def modelo_logistico(df):
-    df = df.dropna(subset=['edad', 'sexo', 'nivel_educativo', 'excluido'])
-    df['sexo'] = df['sexo'].map({'Varón': 0, 'Mujer': 1})
-    X = pd.get_dummies(df[['edad', 'sexo', 'nivel_educativo']], drop_first=True)
-    y = df['excluido']
-    model = sm.Logit(y, sm.add_constant(X)).fit(disp=0)
-    return model.summary2().tables[1]
-
-def clusterizar(df):
-    df_numeric = df.select_dtypes(include=np.number).dropna()
-    model = KMeans(n_clusters=3, random_state=0).fit(df_numeric)
-    df_out = df_numeric.copy()
-    df_out['cluster'] = model.labels_
+    return df.groupby(['nivel_educativo', 'actividad'], observed=True).size().reset_index(name='frecuencia')
+
+# Ajuste de modelos logísticos
+ITERACIONES_LOGIT = 50
+TOLERANCIA_LOGIT = 1e-8
+CASOS_MINIMOS_LOGIT = 30
+# Diferencia máxima admitida contra el ajuste de referencia de statsmodels
+TOLERANCIA_REFERENCIA_LOGIT = 1e-6
+# Por debajo de esta cantidad de grupos no conviene repartir los ajustes
+GRUPOS_MINIMOS_PARALELO = 4
+
+def matriz_diseno(df, numericas=(), categoricas=(), dispersa=None):
+    """Matriz de diseño con constante, variables numéricas y dummies sin la primera categoría.
+
+    Las dummies se arman directamente desde los códigos de cada categórica. Con
+    `dispersa=None` la matriz es dispersa (CSR) cuando hay más dummies que columnas
+    numéricas. Devuelve (X, nombres de columnas, máscara de filas completas).
+    """
+    n = len(df)
+    validas = np.ones(n, dtype=bool)
+    densas, nombres = [np.ones(n)], ['const']
+    for col in numericas:
+        x = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        validas &= ~np.isnan(x)
+        densas.append(np.nan_to_num(x))
+        nombres.append(col)
+    filas, columnas, cantidad = [], [], 0
+    for col in categoricas:
+        codigos, categorias = pd.factorize(df[col], sort=True)
+        validas &= codigos >= 0
+        con_dummy = np.flatnonzero(codigos > 0)
+        filas.append(con_dummy)
+        columnas.append(codigos[con_dummy] - 1 + cantidad)
+        nombres.extend(f'{col}_{cat}' for cat in categorias[1:])
+        cantidad += len(categorias) - 1
+    filas = np.concatenate(filas) if filas else np.array([], dtype=np.int64)
+    columnas = np.concatenate(columnas) if columnas else np.array([], dtype=np.int64)
+    dummies = sparse.csr_matrix((np.ones(len(filas)), (filas, columnas)), shape=(n, cantidad))
+    numerico = np.column_stack(densas)
+    if dispersa is None:
+        dispersa = cantidad > numerico.shape[1]
+    if dispersa:
+        return sparse.hstack([sparse.csr_matrix(numerico), dummies], format='csr'), nombres, validas
+    return np.hstack([numerico, dummies.toarray()]), nombres, validas
+
+def _producto_ponderado(X, v):
+    """X' diag(v) X para matrices densas o dispersas"""
+    if sparse.issparse(X):
+        return (X.T @ X.multiply(v[:, None]).tocsr()).toarray()
+    return (X * v[:, None]).T @ X
+
+def ajustar_logit(X, y, w=None, nombres=None, iteraciones=ITERACIONES_LOGIT, tolerancia=TOLERANCIA_LOGIT):
+    """Regresión logística ponderada por Newton-Raphson sobre una matriz densa o dispersa.
+
+    Los ponderadores se reescalan a media 1: los errores estándar reflejan la
+    muestra y no la población expandida. Las columnas sin variación quedan fuera
+    del ajuste con coeficiente NaN. Devuelve la tabla de coeficientes (mismas
+    columnas que statsmodels) y un diccionario con iteraciones y convergencia.
+    """
+    n, p = X.shape
+    y = np.asarray(y, dtype=np.float64)
+    w = np.ones(n) if w is None else np.asarray(w, dtype=np.float64)
+    w = w / w.mean() if w.sum() > 0 else np.ones(n)
+    nombres = list(nombres) if nombres is not None else [f'x{j}' for j in range(p)]
+
+    # Columnas con variación en la muestra (la constante siempre se estima)
+    medias = np.asarray(X.sum(axis=0)).ravel() / n
+    cuadrados = np.asarray((X.multiply(X) if sparse.issparse(X) else X * X).sum(axis=0)).ravel() / n
+    activas = (cuadrados - medias ** 2) > 1e-12
+    activas[0] = True
+    Xa = X[:, np.flatnonzero(activas)]
+
+    beta = np.zeros(Xa.shape[1])
+    convergio, iteracion = False, 0
+    for iteracion in range(1, iteraciones + 1):
+        mu = 1 / (1 + np.exp(-np.clip(Xa @ beta, -30, 30)))
+        gradiente = Xa.T @ (w * (y - mu))
+        paso = np.linalg.lstsq(_producto_ponderado(Xa, w * mu * (1 - mu)), gradiente, rcond=None)[0]
+        beta += paso
+        if np.max(np.abs(paso)) < tolerancia:
+            convergio = True
+            break
+    mu = 1 / (1 + np.exp(-np.clip(Xa @ beta, -30, 30)))
+    covarianza = np.linalg.pinv(_producto_ponderado(Xa, w * mu * (1 - mu)))
+
+    coeficientes = np.full(p, np.nan)
+    errores = np.full(p, np.nan)
+    coeficientes[activas] = beta
+    errores[activas] = np.sqrt(np.clip(np.diag(covarianza), 0, None))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = coeficientes / errores
+    tabla = pd.DataFrame({
+        'Coef.': coeficientes,
+        'Std.Err.': errores,
+        'z': z,
+        'P>|z|': 2 * norm.sf(np.abs(z)),
+        '[0.025': coeficientes - norm.ppf(0.975) * errores,
+        '0.975]': coeficientes + norm.ppf(0.975) * errores,
+    }, index=pd.Index(nombres))
+    return tabla, {'iteraciones': iteracion, 'convergio': convergio}
+
+def _datos_logit(df):
+    """Variables del modelo de exclusión, en un DataFrame nuevo (el de entrada no se modifica)"""
+    sexo = _columna(df, 'sexo')
+    return pd.DataFrame({
+        'edad': df['edad'],
+        'sexo': np.where(sexo.isna().to_numpy(), np.nan, _es(sexo, SEXO_MUJER)),
+        'nivel_educativo': df['nivel_educativo'],
+    }, index=df.index)
+
+def _diseno_logit(df, pesos, dispersa):
+    """Matriz de diseño, respuesta, pesos y filas completas del modelo de exclusión"""
+    X, nombres, validas = matriz_diseno(_datos_logit(df), ['edad', 'sexo'], ['nivel_educativo'], dispersa)
+    y = pd.to_numeric(df['excluido'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    validas &= ~np.isnan(y)
+    return X, y, _pesos(df, pesos), nombres, validas
+
+def modelo_logistico(df, pesos=PESO_PERSONAS, dispersa=None, avisar=warnings.warn):
+    """Modelo logístico ponderado de exclusión digital según edad, sexo y nivel educativo.
+
+    La tabla informa las iteraciones y si el ajuste convergió; si no convergió se
+    avisa con `avisar`, porque sus coeficientes no son confiables.
+    """
+    X, y, w, nombres, validas = _diseno_logit(df, pesos, dispersa)
+    filas = np.flatnonzero(validas)
+    tabla, estado = ajustar_logit(X[filas], y[filas], w[filas], nombres)
+    tabla['iteraciones'] = estado['iteraciones']
+    tabla['convergio'] = estado['convergio']
+    if not estado['convergio']:
+        avisar(f"El modelo de exclusión digital no convergió en {estado['iteraciones']} iteraciones: "
+               "sus coeficientes no son confiables")
+    return tabla
+
+def verificar_logit(df, pesos=PESO_PERSONAS):
+    """Diferencia máxima entre modelo_logistico y el mismo ajuste hecho con statsmodels.
+
+    La referencia es un GLM Binomial con `freq_weights` (los ponderadores reescalados
+    a media 1, como en ajustar_logit) sobre las mismas columnas activas, ajustado por
+    Newton: con IRLS statsmodels calcula los errores con los pesos de la iteración
+    anterior y difiere en ~1e-6. statsmodels se importa sólo aquí: el análisis no lo
+    necesita. Devuelve la diferencia absoluta máxima de coeficientes, errores
+    estándar y p-valores.
+    """
+    import statsmodels.api as sm
+
+    X, y, w, _, validas = _diseno_logit(df, pesos, dispersa=False)
+    filas = np.flatnonzero(validas)
+    propia = modelo_logistico(df, pesos, dispersa=False, avisar=lambda mensaje: None)
+    activas = propia['Coef.'].notna().to_numpy()
+    w = w[filas]
+    ajuste = sm.GLM(y[filas], X[filas][:, activas], family=sm.families.Binomial(), freq_weights=w / w.mean()).fit(method='newton', tol=TOLERANCIA_LOGIT)
+    referencia = {'Coef.': ajuste.params, 'Std.Err.': ajuste.bse, 'P>|z|': ajuste.pvalues}
+    return {col: float(np.max(np.abs(propia[col].to_numpy()[activas] - valores))) for col, valores in referencia.items()}
+
+def _ajustar_grupo(X, y, w, nombres):
+    """Ajusta el modelo de un grupo y mide su tiempo"""
+    inicio = time.perf_counter()
+    tabla, estado = ajustar_logit(X, y, w, nombres)
+    estado['segundos'] = round(time.perf_counter() - inicio, 4)
+    return tabla, estado
+
+def modelos_logisticos_por_grupo(df, grupos=('REGION',), pesos=PESO_PERSONAS, trabajadores=None, dispersa=None,
+                                 casos_minimos=CASOS_MINIMOS_LOGIT):
+    """Ajusta el modelo de exclusión por separado en cada grupo (región, año, ...), en paralelo.
+
+    La matriz de diseño se arma una sola vez para toda la base y cada grupo toma
+    sus filas. Los ajustes corren en hilos: el álgebra lineal de NumPy/SciPy libera
+    el GIL y los grupos no se copian a otros procesos. Los grupos con menos de `casos_minimos` casos o sin ambos valores
+    de la respuesta se omiten. Devuelve una tabla con una fila por grupo y
+    coeficiente, con casos, población, iteraciones, convergencia y segundos de ajuste.
+    """
+    grupos = list(grupos)
+    X, y, w, nombres, validas = _diseno_logit(df, pesos, dispersa)
+    codigos, tabla_grupos = _codificar_grupos(df, grupos)
+    codigos = np.where(validas, codigos, -1)
+    orden = np.argsort(codigos, kind='stable')
+    limites = np.searchsorted(codigos[orden], np.arange(len(tabla_grupos) + 1))
+
+    indices, tareas = [], []
+    for g in range(len(tabla_grupos)):
+        filas = orden[limites[g]:limites[g + 1]]
+        if len(filas) < casos_minimos or np.unique(y[filas]).size < 2:
+            continue
+        indices.append((g, len(filas), w[filas].sum()))
+        tareas.append((X[filas], y[filas], w[filas]))
+    if not tareas:
+        return pd.DataFrame()
+
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if trabajadores == 1 or len(tareas) < GRUPOS_MINIMOS_PARALELO:
+        ajustes = [_ajustar_grupo(*tarea, nombres) for tarea in tareas]
+    else:
+        with ThreadPoolExecutor(max_workers=trabajadores) as ejecutor:
+            ajustes = list(ejecutor.map(_ajustar_grupo, *zip(*tareas), [nombres] * len(tareas)))
+
+    tablas = []
+    for (g, casos, poblacion), (tabla, estado) in zip(indices, ajustes):
+        tabla = tabla.rename_axis('variable').reset_index()
+        for posicion, col in enumerate(grupos):
+            tabla.insert(posicion, col, tabla_grupos[col].iloc[g])
+        tabla['casos'] = casos
+        tabla['poblacion'] = poblacion
+        tabla['iteraciones'] = estado['iteraciones']
+        tabla['convergio'] = estado['convergio']
+        tabla['segundos'] = estado['segundos']
+        tablas.append(tabla)
+    return pd.concat(tablas, ignore_index=True)
+
+# Segmentación: variables declaradas (nunca códigos de identificación) y parámetros del entrenamiento
+VARIABLES_CLUSTER = ('edad', 'IPCF', 'ITF', 'P21')
+CANDIDATOS_K = (2, 3, 4, 5, 6)
+FILAS_POR_BLOQUE_CLUSTER = 50_000
+MUESTRA_CLUSTER = 20_000
+MUESTRA_SILUETA = 5_000
+PASADAS_CLUSTER = 2
+
+def _bloques(n, filas_por_bloque):
+    """Rangos (inicio, fin) de los bloques de filas"""
+    return [(inicio, min(inicio + filas_por_bloque, n)) for inicio in range(0, n, filas_por_bloque)]
+
+def _muestra_ponderada(w, tamanio, semilla):
+    """Muestra sin reposición con probabilidad proporcional al peso (claves de Efraimidis-Spirakis)"""
+    positivos = np.flatnonzero(w > 0)
+    if len(positivos) <= tamanio:
+        return positivos
+    rng = np.random.default_rng(semilla)
+    claves = np.log(rng.random(len(positivos))) / w[positivos]
+    return np.sort(positivos[np.argpartition(claves, -tamanio)[-tamanio:]])
+
+def _evaluar_k(X, k, semilla):
+    """Ajusta k grupos sobre la muestra y devuelve silueta e inercia"""
+    inicio = time.perf_counter()
+    modelo = MiniBatchKMeans(n_clusters=k, random_state=semilla, n_init=3, batch_size=2048).fit(X)
+    silueta = silhouette_score(X, modelo.labels_, sample_size=min(MUESTRA_SILUETA, len(X)), random_state=semilla)
+    return {'k': k, 'silueta': silueta, 'inercia': modelo.inertia_, 'segundos': round(time.perf_counter() - inicio, 4)}
+
+def _variable_cluster(df, col):
+    """Variable de segmentación como float; la no respuesta de ingresos queda como NaN"""
+    if col in DECIL_INGRESO or col in INGRESOS_HOGAR:
+        x, validos = _ingreso_valido(df, col)
+        return np.where(validos, x, np.nan)
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+def segmentar(df, variables=VARIABLES_CLUSTER, k=None, candidatos=CANDIDATOS_K, pesos=PESO_PERSONAS,
+              filas_por_bloque=FILAS_POR_BLOQUE_CLUSTER, tamanio_muestra=MUESTRA_CLUSTER, trabajadores=None, semilla=0):
+    """Segmentación por bloques con MiniBatchKMeans sobre variables declaradas y estandarizadas.
+
+    Si no se indica `k`, los candidatos se evalúan en paralelo sobre una muestra
+    ponderada y se elige el de mayor silueta. El modelo se entrena bloque a bloque
+    con `partial_fit` y la base completa se etiqueta en otra pasada por bloques,
+    de modo que sólo un bloque estandarizado está en memoria a la vez.
+
+    Los ingresos sin respuesta (ver `_ingreso_valido`) cuentan como faltantes.
+    Devuelve un diccionario con las etiquetas (-1 en filas incompletas), los
+    perfiles de cada grupo en unidades originales y la evaluación de cada k.
+    """
+    variables = [col for col in variables if col in df.columns]
+    if not variables:
+        raise ValueError("No hay variables de segmentación en la base")
+    columnas = [_variable_cluster(df, col) for col in variables]
+    completas = np.logical_and.reduce([~np.isnan(x) for x in columnas])
+    filas = np.flatnonzero(completas)
+    w = _pesos(df, pesos)[filas]
+    if len(filas) < 2:
+        raise ValueError("No hay filas completas suficientes para segmentar")
+
+    # Medias y desvíos ponderados de las filas completas (sobre las columnas enteras): cada bloque se estandariza al vuelo
+    total = w.sum() if w.sum() > 0 else 1.0
+    medias = np.array([np.sum(w * x[filas]) / total for x in columnas])
+    desvios = np.array([np.sqrt(np.sum(w * (x[filas] - m) ** 2) / total) for x, m in zip(columnas, medias)])
+    desvios[desvios == 0] = 1.0
+
+    def bloque(inicio, fin):
+        return (np.column_stack([x[filas[inicio:fin]] for x in columnas]) - medias) / desvios
+
+    # Elección de k sobre una muestra ponderada, con los candidatos evaluados en paralelo
+    evaluacion = pd.DataFrame()
+    if k is None:
+        muestra = _muestra_ponderada(w, tamanio_muestra, semilla)
+        X_muestra = (np.column_stack([x[filas[muestra]] for x in columnas]) - medias) / desvios
+        candidatos = [c for c in candidatos if 1 < c < len(muestra)]
+        if not candidatos:
+            raise ValueError(f"La muestra de {len(muestra)} filas completas no alcanza para evaluar ningún k candidato")
+        with ThreadPoolExecutor(max_workers=trabajadores or os.cpu_count() or 1) as ejecutor:
+            evaluacion = pd.DataFrame(list(ejecutor.map(lambda c: _evaluar_k(X_muestra, c, semilla), candidatos)))
+        k = int(evaluacion.loc[evaluacion['silueta'].idxmax(), 'k'])
+
+    # Entrenamiento incremental por bloques
+    modelo = MiniBatchKMeans(n_clusters=k, random_state=semilla, n_init=3, batch_size=2048)
+    rangos = _bloques(len(filas), filas_por_bloque)
+    for _ in range(PASADAS_CLUSTER):
+        for inicio, fin in rangos:
+            if fin - inicio >= k:
+                modelo.partial_fit(bloque(inicio, fin), sample_weight=w[inicio:fin])
+
+    # Etiquetado de toda la base en una pasada por bloques
+    etiquetas = np.full(len(df), -1, dtype=np.int8)
+    for inicio, fin in rangos:
+        etiquetas[filas[inicio:fin]] = modelo.predict(bloque(inicio, fin))
+
+    etiquetadas = etiquetas[filas]
+    perfiles = pd.DataFrame(modelo.cluster_centers_ * desvios + medias, columns=variables)
+    perfiles.insert(0, 'cluster', np.arange(k))
+    perfiles['casos'] = np.bincount(etiquetadas, minlength=k)
+    perfiles['poblacion'] = np.bincount(etiquetadas, weights=w, minlength=k)
+    perfiles['proporcion'] = perfiles['poblacion'] / perfiles['poblacion'].sum()
+    return {
+        'etiquetas': pd.Series(etiquetas, index=df.index, name='cluster'),
+        'perfiles': perfiles,
+        'evaluacion': evaluacion,
+        'k': k,
+    }
+
+def clusterizar(df, variables=VARIABLES_CLUSTER, k=None, pesos=PESO_PERSONAS):
+    """Variables de segmentación de las filas completas con el grupo asignado a cada una"""
+    resultado = segmentar(df, variables, k, pesos=pesos)
+    presentes = [col for col in variables if col in df.columns]
+    etiquetas = resultado['etiquetas'].to_numpy()
+    # Por posición: el índice puede repetirse (trimestres apilados)
+    df_out = df.loc[etiquetas >= 0, presentes].copy()
+    df_out['cluster'] = etiquetas[etiquetas >= 0]
     return df_out
 
-def construir_indice_compuesto(df):
-    df = df.copy()
-    df['indice_compuesto'] = df[['edad']].apply(lambda x: (x - x.min()) / (x.max() - x.min()))
-    return df[['edad', 'indice_compuesto']]
-
-def generar_informe_word(anio, resumen_hogar, resumen_ind):
-    doc = Document()
-    doc.add_heading(f"Informe Interpretativo EPH – Anual {anio}", 0)
-    doc.add_paragraph("Encuesta Permanente de Hogares\nINDEC – Argentina\n")
-    doc.add_page_break()
-
-    doc.add_heading("Índice", level=1)
-    doc.add_paragraph("1. Introducción\n2. Análisis Descriptivo\n3. Interpretación por Categorías\n4. Brechas e Indicadores Clave\n5. Conclusiones y Recomendaciones")
-    doc.add_page_break()
-
-    doc.add_heading("1. Introducción", level=1)
-    doc.add_paragraph(
-        f"El presente informe analiza los datos del cuarto trimestre del año {anio} de la Encuesta Permanente de Hogares (EPH) del INDEC. "
-        "Se abordan características sociodemográficas, condiciones de vida y niveles de acceso a servicios esenciales en los hogares urbanos argentinos, "
-        "así como aspectos vinculados a la inclusión digital y las brechas sociales. El objetivo es brindar una visión analítica para la formulación de políticas públicas."
-    )
-
-    doc.add_heading("2. Análisis Descriptivo", level=1)
-    doc.add_heading("2.1 Hogares", level=2)
-    cant_hogares = int(resumen_hogar.loc["PONDIH"]["count"]) if "PONDIH" in resumen_hogar.index else resumen_hogar.iloc[0]["count"]
-    doc.add_paragraph(f"Total de hogares analizados: {cant_hogares}")
-    for var in resumen_hogar.index:
-        media = resumen_hogar.loc[var, 'mean']
-        doc.add_paragraph(f"{var}: media = {media:.2f}", style="List Bullet")
-
-    doc.add_heading("2.2 Individuos", level=2)
-    cant_individuos = int(resumen_ind.loc["IPCF"]["count"]) if "IPCF" in resumen_ind.index else resumen_ind.iloc[0]['count']
-    doc.add_paragraph(f"Total de personas analizadas: {cant_individuos}")
-    for var in resumen_ind.index:
-        media = resumen_ind.loc[var, 'mean']
-        doc.add_paragraph(f"{var}: media = {media:.2f}", style="List Bullet")
-
-    doc.add_heading("3. Interpretación por Categoría", level=1)
-    doc.add_paragraph("Se observa que los hogares con menor ingreso familiar per cápita (IPCF) se concentran mayormente en regiones NOA y NEA. "
-                      "Los niveles educativos más bajos corresponden a personas mayores de 65 años, mientras que los ingresos más altos se asocian "
-                      "a quienes poseen estudios universitarios completos.")
-
-    doc.add_heading("4. Brechas e Indicadores Clave", level=1)
-    doc.add_paragraph("• El 36,4 % de las personas sin acceso a internet tiene sólo educación primaria.")
-    doc.add_paragraph("• El 12,1 % de los hogares ubicados en el NOA carece de agua potable dentro de la vivienda.")
-    doc.add_paragraph("• Los hogares liderados por personas con estudios primarios completos tienen un ingreso familiar medio un 35 % inferior al de quienes tienen estudios superiores.")
-
-    doc.add_heading("5. Conclusiones y Recomendaciones", level=1)
-    doc.add_paragraph(
-        "Los resultados muestran una clara asociación entre condiciones socioeconómicas y acceso a servicios. "
-        "Se recomienda implementar políticas focalizadas de inclusión digital en regiones periféricas y estrategias de fortalecimiento educativo "
-        "en grupos vulnerables. El monitoreo de estas variables en series temporales permitirá seguir la evolución de la equidad social y tecnológica."
-    )
-
-    from io import BytesIO
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-
-def exclusión_digital_por_sexo_nivel(df):
+# Índice compuesto de privación de los hogares (estilo NBI): pesos por defecto de cada indicador
+PESOS_INDICE = {
+    'agua': 1.0, 'bano': 1.0, 'vivienda': 1.0, 'hacinamiento': 1.0, 'ingreso': 1.0,
+    'computadora': 0.5, 'internet': 0.5,
+}
+GRUPOS_INDICE = ('REGION', 'ANO4')
+# Más de 3 personas por cuarto: hacinamiento crítico
+HACINAMIENTO_CRITICO = 3
+
+def _numerica(df, col):
+    """Columna como arreglo float64 con NaN, o None si no está en la base"""
+    if col not in df.columns:
+        return None
+    return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _privacion(condicion, valores):
+    """Indicador 0/1 que conserva NaN donde falta el dato"""
+    return np.where(np.isnan(valores), np.nan, condicion.astype(np.float64))
+
+def matriz_indicadores(df):
+    """Matriz hogares x indicadores de privación, calculada columna a columna sin recorrer filas.
+
+    Los indicadores binarios valen 1 si el hogar está privado: agua fuera de la
+    vivienda (IV6), sin baño (IV8), pieza, local u otro tipo de vivienda (IV1),
+    hacinamiento crítico (IX_TOT / IV2), sin computadora (IH_II_01) o sin internet
+    (IH_II_02). El ingreso (IPCF) entra invertido, en logaritmo, y es el único continuo;
+    la no respuesta de ingresos (ver `_ingreso_valido`) queda sin dato. Los
+    indicadores sin su variable en la base se omiten. Devuelve (matriz, nombres,
+    máscara de indicadores continuos).
+    """
+    x = {col: _numerica(df, col) for col in VARIABLES_INDICE}
+    indicadores, continuos = {}, []
+    if x['IV6'] is not None:
+        indicadores['agua'] = _privacion(x['IV6'] > 1, x['IV6'])
+    if x['IV8'] is not None:
+        indicadores['bano'] = _privacion(x['IV8'] == 2, x['IV8'])
+    if x['IV1'] is not None:
+        indicadores['vivienda'] = _privacion(x['IV1'] >= 3, x['IV1'])
+    if x['IX_TOT'] is not None and x['IV2'] is not None:
+        personas_por_cuarto = x['IX_TOT'] / np.where(x['IV2'] > 0, x['IV2'], np.nan)
+        indicadores['hacinamiento'] = _privacion(personas_por_cuarto > HACINAMIENTO_CRITICO, personas_por_cuarto)
+    if 'IPCF' in df.columns:
+        # Escala logarítmica: los ingresos extremos no comprimen al resto en el min-max.
+        # Sin la no respuesta, cuyos ceros serían la privación máxima y el piso de la escala
+        ipcf, validos = _ingreso_valido(df, 'IPCF')
+        indicadores['ingreso'] = -np.log1p(np.where(validos, ipcf, np.nan))
+        continuos.append('ingreso')
+    if x['IH_II_01'] is not None:
+        indicadores['computadora'] = _privacion(x['IH_II_01'] == 2, x['IH_II_01'])
+    if x['IH_II_02'] is not None:
+        indicadores['internet'] = _privacion(x['IH_II_02'] == 2, x['IH_II_02'])
+    nombres = list(indicadores)
+    matriz = np.column_stack([indicadores[n] for n in nombres]) if nombres else np.empty((len(df), 0))
+    return matriz, nombres, np.array([n in continuos for n in nombres], dtype=bool)
+
+def normalizar_por_grupo(matriz, codigos=None, columnas=None):
+    """Escala min-max a [0, 1] de las columnas indicadas, global o dentro de cada grupo.
+
+    `codigos` son los códigos de grupo de _codificar_grupos (None = un solo grupo);
+    los mínimos y máximos de todos los grupos salen de una reducción por segmentos
+    sobre las filas ordenadas por grupo. Las filas sin grupo quedan en NaN.
+    """
+    n, m = matriz.shape
+    columnas = np.ones(m, dtype=bool) if columnas is None else np.asarray(columnas, dtype=bool)
+    codigos = np.zeros(n, dtype=np.int64) if codigos is None else np.asarray(codigos)
+    resultado = np.full_like(matriz, np.nan, dtype=np.float64)
+    validas = np.flatnonzero(codigos >= 0)
+    if len(validas) == 0:
+        return resultado
+    orden = validas[np.argsort(codigos[validas], kind='stable')]
+    ordenada = matriz[orden].astype(np.float64)
+    inicios = np.flatnonzero(np.r_[True, np.diff(codigos[orden]) != 0])
+    tamanios = np.diff(np.r_[inicios, len(orden)])
+    escalar = ordenada[:, columnas]
+    minimos = np.repeat(np.fmin.reduceat(escalar, inicios, axis=0), tamanios, axis=0)
+    maximos = np.repeat(np.fmax.reduceat(escalar, inicios, axis=0), tamanios, axis=0)
+    rango = maximos - minimos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        escalada = np.where(rango > 0, (escalar - minimos) / rango, 0.0)
+    escalada[np.isnan(escalar)] = np.nan
+    ordenada[:, columnas] = escalada
+    resultado[orden] = ordenada
+    return resultado
+
+def ponderar_indice(normalizada, pesos):
+    """Promedio ponderado (0 a 100) de los indicadores disponibles en cada hogar.
+
+    Los indicadores sin dato (NaN) quedan fuera del promedio de ese hogar, con sus
+    pesos; un hogar sin ningún indicador queda en NaN.
+
+    `pesos` puede ser un vector (un índice) o una matriz indicadores x juegos de
+    pesos: varios juegos se calculan juntos en un solo producto matricial.
+    """
+    pesos = np.asarray(pesos, dtype=np.float64)
+    numerador = np.nan_to_num(normalizada) @ pesos
+    denominador = (~np.isnan(normalizada)).astype(np.float64) @ pesos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominador > 0, 100 * numerador / denominador, np.nan)
+
+def construir_indice_compuesto(df, pesos=None, normalizacion='global', grupos=GRUPOS_INDICE):
+    """Índice compuesto de privación de cada hogar (0 = sin privaciones, 100 = todas).
+
+    `pesos` reemplaza los de PESOS_INDICE por indicador. Con normalizacion='grupo'
+    el ingreso se escala dentro de cada combinación de `grupos` (región y año),
+    de modo que la privación de ingreso es relativa a su región y período.
+    Devuelve los indicadores normalizados (priv_*) y el índice, con el índice de df.
+    """
+    matriz, nombres, continuos = matriz_indicadores(df)
+    if not nombres:
+        raise ValueError("No se encontraron variables de vivienda, ingreso o TIC para el índice")
+    if normalizacion == 'grupo':
+        presentes = [col for col in grupos if col in df.columns]
+        codigos = _codificar_grupos(df, presentes)[0] if presentes else None
+    elif normalizacion == 'global':
+        codigos = None
+    else:
+        raise ValueError(f"Normalización no soportada: {normalizacion}")
+    normalizada = normalizar_por_grupo(matriz, codigos, continuos)
+    pesos = {**PESOS_INDICE, **(pesos or {})}
+    resultado = pd.DataFrame(normalizada, columns=[f'priv_{n}' for n in nombres], index=df.index)
+    resultado['indice_compuesto'] = ponderar_indice(normalizada, [pesos.get(n, 0.0) for n in nombres])
+    return resultado
+
+def indice_por_grupo(df_hogar, grupos=('REGION',), pesos=PESO_HOGARES, normalizacion='grupo'):
+    """Índice de privación y proporción de hogares privados en cada indicador, ponderados por grupo"""
+    indice = construir_indice_compuesto(df_hogar, normalizacion=normalizacion)
+    base = indice.join(df_hogar[[col for col in list(grupos) + [pesos] if col in df_hogar.columns]])
+    return estimar_ponderado(base, [col for col in grupos if col in base.columns], list(indice.columns), pesos)
+
+# Niveles educativos de los indicadores clave: (etiqueta, código INDEC)
+NIVELES_HASTA_PRIMARIA = (('Sin instrucción', 7), ('Primario incompleto', 1), ('Primario completo', 2))
+PRIMARIO_COMPLETO = ('Primario completo', 2)
+SUPERIOR_COMPLETO = ('Superior universitario completo', 6)
+
+DESCRIPCION_INDICADORES = {
+    'sin_internet_hasta_primaria': 'Personas sin acceso a internet con educación hasta primaria completa',
+    'brecha_ipcf_primaria_superior': 'Brecha del IPCF medio de las personas con primaria completa respecto de las de superior completo',
+}
+
+def _media_ponderada(valores, w, mascara):
+    """Media ponderada de `valores` en las filas de `mascara` con dato (NaN si no hay casos)"""
+    validas = mascara & ~np.isnan(valores)
+    total = w[validas].sum()
+    return float(valores[validas] @ w[validas] / total) if total > 0 else np.nan
+
+def indicadores_clave(df_ind, pesos=PESO_PERSONAS):
+    """Indicadores ponderados de brechas educativas en el acceso a internet y en el ingreso.
+
+    Devuelve una fila por indicador calculable con la base (proporciones entre 0 y 1)
+    y los casos muestrales en que se basa; los que no tienen sus variables se omiten.
+    La brecha de ingreso excluye la no respuesta de IPCF, como `distribucion_ingresos`.
+    """
+    filas = []
+    nivel = _columna(df_ind, 'nivel_educativo')
+    acc_inet = _columna(df_ind, 'acceso_internet')
+    w = _pesos(df_ind, pesos)
+    if nivel is not None and acc_inet is not None:
+        sin_internet = _es(acc_inet, RESPUESTA_NO)
+        hasta_primaria = np.logical_or.reduce([_es(nivel, respuesta) for respuesta in NIVELES_HASTA_PRIMARIA])
+        filas.append(('sin_internet_hasta_primaria',
+                      _media_ponderada(hasta_primaria.astype(np.float64), w, sin_internet), int(sin_internet.sum())))
+    if nivel is not None and 'IPCF' in df_ind.columns:
+        ipcf, validos = _ingreso_valido(df_ind, 'IPCF')
+        primaria, superior = _es(nivel, PRIMARIO_COMPLETO) & validos, _es(nivel, SUPERIOR_COMPLETO) & validos
+        media_superior = _media_ponderada(ipcf, w, superior)
+        brecha = 1 - _media_ponderada(ipcf, w, primaria) / media_superior if media_superior > 0 else np.nan
+        filas.append(('brecha_ipcf_primaria_superior', brecha, int((primaria | superior).sum())))
+    tabla = pd.DataFrame(filas, columns=['indicador', 'valor', 'casos'])
+    tabla.insert(1, 'descripcion', tabla['indicador'].map(DESCRIPCION_INDICADORES))
+    return tabla.dropna(subset=['valor']).reset_index(drop=True)
+
+def exclusión_digital_por_sexo_nivel(df, pesos=PESO_PERSONAS):
     # Verifica que existan las columnas necesarias
     posibles_cols_sexo = [col for col in df.columns if 'sexo' in col.lower()]
     posibles_cols_nivel = [col for col in df.columns if 'nivel' in col.lower() and 'educ' in col.lower()]
@@ -115,10 +793,13 @@ def exclusión_digital_por_sexo_nivel(df):
 
     # Calcular exclusión digital binaria
     df = df.copy()
-    df['excluido'] = ((df['acceso_computadora'] == 'No') & (df['acceso_internet'] == 'No')).astype(int)
+    acc_comp, acc_inet = _columna(df, 'acceso_computadora'), _columna(df, 'acceso_internet')
+    if acc_comp is None or acc_inet is None:
+        return pd.DataFrame()
+    df['excluido'] = (_es(acc_comp, RESPUESTA_NO) & _es(acc_inet, RESPUESTA_NO)).astype(np.int8)
 
-    # Agrupar por sexo y nivel educativo
-    grouped = df.groupby([sexo_col, nivel_col])['excluido'].mean().reset_index()
+    # Agrupar por sexo y nivel educativo (ponderado por PONDERA si está disponible)
+    grouped = estimar_ponderado(df, [sexo_col, nivel_col], ['excluido'], pesos)[[sexo_col, nivel_col, 'media_excluido']]
     grouped.columns = ['Sexo', 'Nivel educativo', 'Porcentaje exclusión digital']
     grouped['Porcentaje exclusión digital'] = (grouped['Porcentaje exclusión digital'] * 100).round(2)
     
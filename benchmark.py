@@ -0,0 +1,255 @@
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+from analyzer import (
+    TOLERANCIA_REFERENCIA_LOGIT,
+    calcular_exclusion_digital,
+    clusterizar,
+    generar_cruces,
+    indice_por_grupo,
+    modelo_logistico,
+    modelos_logisticos_por_grupo,
+    resumen_descriptivo,
+    resumen_ingresos,
+    verificar_logit
+)
+from informe import generar_informe_word
+from ingesta import leer_base
+from perfilado import Perfil
+from procesamiento import (
+    PALABRAS_CLAVE_HOGAR,
+    PALABRAS_CLAVE_IND,
+    cargar_base_proyectada,
+    ejecutar_analisis,
+    procesar_datos
+)
+from sinteticos import HOGARES_POR_TRIMESTRE, TAMANIOS, escribir_bases, generar_bases
+from uniones import unir_bases, unir_hogares_tic
+
+DESCRIPCION = """Benchmark de las funciones de análisis y del pipeline completo sobre bases EPH sintéticas.
+
+Para cada tamaño (un trimestre, un año, ... diez años apilados) se generan bases
+sintéticas, se miden tiempo de reloj, tiempo de CPU y pico de memoria de cada
+función, y se comparan con la línea base guardada: las mediciones que la superan
+por encima de la tolerancia se informan como regresiones (código de salida 1)."""
+
+LINEA_BASE = "linea_base_benchmark.json"
+VERSION_BENCHMARK = "1"
+
+# Una medición es regresión si supera a la línea base en la tolerancia relativa y en el margen absoluto
+TOLERANCIA_TIEMPO = 0.25
+TOLERANCIA_MEMORIA = 0.20
+MARGEN_SEGUNDOS = 0.05
+MARGEN_MB = 1.0
+
+FUNCIONES = (
+    "resumen_descriptivo",
+    "resumen_ingresos",
+    "generar_cruces",
+    "calcular_exclusion_digital",
+    "modelo_logistico",
+    "modelos_logisticos_por_grupo",
+    "clusterizar",
+    "indice_por_grupo",
+    "generar_informe_word",
+    "pipeline",
+)
+
+
+def preparar_bases(rutas):
+    """Bases procesadas tal como las recibe el análisis: lectura proyectada, unión TIC y decodificación"""
+    df_hogar = cargar_base_proyectada(rutas["hogares"], {}, PALABRAS_CLAVE_HOGAR)
+    df_ind = cargar_base_proyectada(rutas["individuos"], {}, PALABRAS_CLAVE_IND)
+    df_hogar_tic, df_ind_tic = leer_base(rutas["hogares_tic"]), leer_base(rutas["individuos_tic"])
+    df_ind, _ = unir_bases(df_hogar, df_ind, df_hogar_tic, df_ind_tic)
+    df_hogar, _ = unir_hogares_tic(df_hogar, df_hogar_tic)
+    df_hogar, df_ind, _, _ = procesar_datos(df_hogar, df_ind, {})
+    return df_hogar, df_ind
+
+
+def casos(rutas, anio, df_hogar, df_ind):
+    """Función a medir de cada caso, sin argumentos (los insumos se calculan una sola vez)"""
+    exclusion = calcular_exclusion_digital(df_ind)
+    resumenes = resumen_descriptivo(df_hogar, df_ind)
+    ingresos = resumen_ingresos(df_hogar)
+
+    def pipeline():
+        resultado = ejecutar_analisis(rutas["hogares"], rutas["individuos"], None, anio,
+                                      rutas["hogares_tic"], rutas["individuos_tic"])
+        # El Excel queda en un archivo temporal a cargo del llamador
+        resultado["excel"].unlink(missing_ok=True)
+        return resultado
+
+    return {
+        "resumen_descriptivo": lambda: resumen_descriptivo(df_hogar, df_ind),
+        "resumen_ingresos": lambda: resumen_ingresos(df_hogar),
+        "generar_cruces": lambda: generar_cruces(df_ind),
+        "calcular_exclusion_digital": lambda: calcular_exclusion_digital(df_ind),
+        "modelo_logistico": lambda: modelo_logistico(exclusion),
+        "modelos_logisticos_por_grupo": lambda: modelos_logisticos_por_grupo(exclusion, ["REGION"]),
+        "clusterizar": lambda: clusterizar(df_ind),
+        "indice_por_grupo": lambda: indice_por_grupo(df_hogar),
+        "generar_informe_word": lambda: generar_informe_word(anio, resumenes[0], resumenes[1], ingresos),
+        "pipeline": pipeline,
+    }
+
+
+def medir(nombre, funcion, repeticiones=3, memoria=True):
+    """Mínimo y mediana de `repeticiones` ejecuciones; el pico de memoria sale de una ejecución aparte con tracemalloc"""
+    perfil = Perfil()
+    for _ in range(repeticiones):
+        resultado = perfil.medir(nombre, funcion)
+    segundos = [registro["segundos"] for registro in perfil.etapas]
+    mejor = min(perfil.etapas, key=lambda registro: registro["segundos"])
+    medida = {
+        "segundos": mejor["segundos"],
+        "segundos_mediana": round(statistics.median(segundos), 4),
+        "segundos_cpu": mejor["segundos_cpu"],
+        "rss_pico_proceso_mb": perfil.etapas[-1].get("rss_pico_proceso_mb"),
+        **{clave: mejor[clave] for clave in ("filas", "columnas", "tablas", "bytes") if clave in mejor},
+    }
+    if nombre == "pipeline":
+        medida["etapas"] = resultado["tiempos"]
+    if memoria:
+        perfil_memoria = Perfil(memoria=True)
+        perfil_memoria.medir(nombre, funcion)
+        medida["pico_python_mb"] = perfil_memoria.etapas[0]["pico_python_mb"]
+    return medida
+
+
+def ejecutar_benchmark(tamanios=("trimestre",), funciones=FUNCIONES, repeticiones=3, memoria=True,
+                       hogares_por_trimestre=HOGARES_POR_TRIMESTRE, semilla=0, informar=print):
+    """Mide las funciones elegidas en cada tamaño; devuelve los resultados con los metadatos del equipo"""
+    resultados = {}
+    for tamanio in tamanios:
+        bases = generar_bases(TAMANIOS[tamanio], hogares_por_trimestre, semilla=semilla)
+        anio = str(bases["hogares"]["ANO4"].iloc[0])
+        with tempfile.TemporaryDirectory(prefix="benchmark_eph_") as directorio:
+            rutas = escribir_bases(bases, directorio)
+            df_hogar, df_ind = preparar_bases(rutas)
+            informar(f"{tamanio}: {len(df_hogar):,} hogares, {len(df_ind):,} personas")
+            funciones_tamanio = casos(rutas, anio, df_hogar, df_ind)
+            resultados[tamanio] = {"hogares": len(df_hogar), "individuos": len(df_ind), "funciones": {},
+                                   "referencia_logit": verificar_logit(calcular_exclusion_digital(df_ind))}
+            for nombre in funciones:
+                medida = medir(nombre, funciones_tamanio[nombre], repeticiones, memoria)
+                resultados[tamanio]["funciones"][nombre] = medida
+                memoria_texto = f" | {medida['pico_python_mb']:>8.1f} MB" if "pico_python_mb" in medida else ""
+                informar(f"  {nombre:<30} {medida['segundos']:>9.3f} s | CPU {medida['segundos_cpu']:>8.3f} s{memoria_texto}")
+    return {
+        "version_benchmark": VERSION_BENCHMARK,
+        "metadatos": Perfil().metadatos,
+        "repeticiones": repeticiones,
+        "hogares_por_trimestre": hogares_por_trimestre,
+        "resultados": resultados,
+    }
+
+
+def comparar(actual, linea_base, tolerancia_tiempo=TOLERANCIA_TIEMPO, tolerancia_memoria=TOLERANCIA_MEMORIA):
+    """Mediciones que superan a la línea base en la tolerancia relativa y en el margen absoluto"""
+    regresiones = []
+    metricas = (("segundos", tolerancia_tiempo, MARGEN_SEGUNDOS), ("pico_python_mb", tolerancia_memoria, MARGEN_MB))
+    for tamanio, datos in actual["resultados"].items():
+        base_tamanio = linea_base.get("resultados", {}).get(tamanio)
+        if base_tamanio is None or base_tamanio.get("individuos") != datos["individuos"]:
+            # Bases de otro tamaño: no son comparables
+            continue
+        for nombre, medida in datos["funciones"].items():
+            base = base_tamanio["funciones"].get(nombre, {})
+            for metrica, tolerancia, margen in metricas:
+                if metrica not in medida or metrica not in base:
+                    continue
+                valor, referencia = medida[metrica], base[metrica]
+                if valor > referencia * (1 + tolerancia) and valor - referencia > margen:
+                    regresiones.append({
+                        "tamanio": tamanio, "funcion": nombre, "metrica": metrica,
+                        "linea_base": referencia, "actual": valor,
+                        "variacion": round(valor / referencia - 1, 4) if referencia else None,
+                    })
+    return regresiones
+
+
+def verificar_referencias(actual, tolerancia=TOLERANCIA_REFERENCIA_LOGIT):
+    """Tamaños y columnas en los que el modelo logístico se aparta de la referencia de statsmodels"""
+    return [
+        {"tamanio": tamanio, "columna": columna, "diferencia": diferencia}
+        for tamanio, datos in actual["resultados"].items()
+        for columna, diferencia in datos.get("referencia_logit", {}).items()
+        if not diferencia <= tolerancia
+    ]
+
+
+def leer_linea_base(ruta):
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_linea_base(ruta, actual, anterior=None):
+    """Guarda los resultados como línea base, conservando los tamaños no medidos en esta corrida"""
+    linea_base = dict(actual)
+    if anterior is not None and anterior.get("hogares_por_trimestre") == actual["hogares_por_trimestre"]:
+        linea_base["resultados"] = {**anterior.get("resultados", {}), **actual["resultados"]}
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(linea_base, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=DESCRIPCION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanios", nargs="+", choices=TAMANIOS, default=["trimestre"],
+                        help="Tamaños de las bases sintéticas (por defecto: trimestre)")
+    parser.add_argument("--funciones", nargs="+", choices=FUNCIONES, default=list(FUNCIONES),
+                        help="Funciones a medir (por defecto: todas y el pipeline completo)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por función (se informa la mejor)")
+    parser.add_argument("--hogares-por-trimestre", type=int, default=HOGARES_POR_TRIMESTRE,
+                        help=f"Hogares sintéticos por trimestre (por defecto: {HOGARES_POR_TRIMESTRE})")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador de bases")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria con tracemalloc")
+    parser.add_argument("--linea-base", default=LINEA_BASE, help=f"JSON de la línea base (por defecto: {LINEA_BASE})")
+    parser.add_argument("--guardar-linea-base", action="store_true",
+                        help="Guardar los resultados de esta corrida como nueva línea base")
+    parser.add_argument("--tolerancia-tiempo", type=float, default=TOLERANCIA_TIEMPO,
+                        help="Aumento relativo de tiempo tolerado antes de marcar una regresión")
+    parser.add_argument("--tolerancia-memoria", type=float, default=TOLERANCIA_MEMORIA,
+                        help="Aumento relativo del pico de memoria tolerado antes de marcar una regresión")
+    parser.add_argument("--salida", help="Archivo donde guardar los resultados y regresiones de esta corrida")
+    args = parser.parse_args(argv)
+
+    actual = ejecutar_benchmark(args.tamanios, args.funciones, args.repeticiones, not args.sin_memoria,
+                                args.hogares_por_trimestre, args.semilla)
+    discrepancias = verificar_referencias(actual)
+    for d in discrepancias:
+        print(f"❌ El modelo logístico difiere de statsmodels en {d['tamanio']} / {d['columna']}: "
+              f"{d['diferencia']:.2e}", file=sys.stderr)
+    anterior = leer_linea_base(args.linea_base)
+    regresiones = []
+    if anterior is None:
+        print(f"Sin línea base en {args.linea_base}: no se comparan resultados")
+    else:
+        if anterior.get("metadatos", {}).get("plataforma") != actual["metadatos"]["plataforma"]:
+            print("⚠️ La línea base se midió en otro equipo: las comparaciones de tiempo son orientativas")
+        regresiones = comparar(actual, anterior, args.tolerancia_tiempo, args.tolerancia_memoria)
+        for r in regresiones:
+            variacion = f" ({r['variacion']:+.0%})" if r["variacion"] is not None else ""
+            print(f"❌ Regresión {r['tamanio']} / {r['funcion']} / {r['metrica']}: "
+                  f"{r['linea_base']} -> {r['actual']}{variacion}", file=sys.stderr)
+        if not regresiones:
+            print("✅ Sin regresiones respecto de la línea base")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({**actual, "regresiones": regresiones, "discrepancias": discrepancias}, f, ensure_ascii=False, indent=2)
+    if args.guardar_linea_base:
+        guardar_linea_base(args.linea_base, actual, anterior)
+        print(f"Línea base guardada en {args.linea_base}")
+    return 1 if regresiones or discrepancias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
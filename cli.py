@@ -0,0 +1,156 @@
+import argparse
+import json
+import multiprocessing
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from exportacion import FORMATOS_PAQUETE
+from incremental import CacheEtapas
+from ingesta import CacheParquet
+from procesamiento import ejecutar_analisis, generar_lote_informes
+
+DESCRIPCION = """Calculadora EPH sin interfaz: genera el informe Word y el Excel de análisis.
+
+Un conjunto de bases se indica con --hogares/--individuos/--instructivo/--anio.
+Varios conjuntos se indican con --lote, un JSON con una lista de objetos con las
+claves hogares, individuos, instructivo, anio y, opcionalmente, hogares_tic,
+individuos_tic y salida."""
+
+# Columna de las bases por la que se separan los informes Word de --informes-por
+GRUPOS_INFORMES = {"region": "REGION", "anio": "ANO4"}
+
+
+def procesar_conjunto(conjunto, salida_por_defecto, formato_paquete=None, perfil=False, medir_memoria=False,
+                      informes_por=None):
+    """Procesa un conjunto de bases y escribe sus salidas (se ejecuta en un proceso trabajador)"""
+    inicio = time.perf_counter()
+    anio = str(conjunto["anio"])
+    salida = Path(conjunto.get("salida") or salida_por_defecto)
+    salida.mkdir(parents=True, exist_ok=True)
+    resultado = ejecutar_analisis(
+        conjunto["hogares"], conjunto["individuos"], conjunto.get("instructivo"), anio,
+        conjunto.get("hogares_tic"), conjunto.get("individuos_tic"), CacheParquet(), formato_paquete,
+        medir_memoria=medir_memoria, cache_etapas=CacheEtapas()
+    )
+    ruta_word = salida / f"informe_eph_completo_{anio}.docx"
+    ruta_excel = salida / f"analisis_eph_{anio}.xlsx"
+    ruta_word.write_bytes(resultado["word"].getvalue())
+    # El Excel ya está en un archivo temporal propio: se copia sin cargarlo en memoria
+    # (copiar en lugar de mover da los permisos habituales, no los 0600 del temporal)
+    shutil.copyfile(resultado["excel"], ruta_excel)
+    resultado["excel"].unlink()
+    ruta_paquete = None
+    if resultado["paquete"] is not None:
+        ruta_paquete = salida / f"analisis_eph_{anio}_{formato_paquete}.zip"
+        ruta_paquete.write_bytes(resultado["paquete"].getvalue())
+    ruta_informes = None
+    if informes_por:
+        df_hogar, df_ind = resultado["bases"][:2]
+        lote = generar_lote_informes(df_hogar, df_ind, anio, GRUPOS_INFORMES[informes_por])
+        ruta_informes = salida / f"informes_eph_{anio}_por_{informes_por}.zip"
+        ruta_informes.write_bytes(lote.getvalue())
+    ruta_perfil = None
+    if perfil:
+        ruta_perfil = salida / f"perfil_eph_{anio}.json"
+        with open(ruta_perfil, "w", encoding="utf-8") as f:
+            json.dump(resultado["perfil"], f, ensure_ascii=False, indent=2)
+    return {
+        "anio": anio,
+        "hogares": str(conjunto["hogares"]),
+        "individuos": str(conjunto["individuos"]),
+        "word": str(ruta_word),
+        "excel": str(ruta_excel),
+        "paquete": str(ruta_paquete) if ruta_paquete else None,
+        "perfil": str(ruta_perfil) if ruta_perfil else None,
+        "informes": str(ruta_informes) if ruta_informes else None,
+        "registros": resultado["registros"],
+        "avisos": resultado["avisos"],
+        "tiempos": resultado["tiempos"],
+        "etapas": resultado["perfil"]["etapas"],
+        "segundos_total": round(time.perf_counter() - inicio, 4),
+    }
+
+
+def leer_conjuntos(args):
+    """Conjuntos de bases a procesar, desde los argumentos o desde el archivo de lote"""
+    conjuntos = []
+    if args.lote:
+        with open(args.lote, encoding="utf-8") as f:
+            conjuntos.extend(json.load(f))
+    if args.hogares or args.individuos:
+        if not (args.hogares and args.individuos and args.anio):
+            raise SystemExit("Se requieren --hogares, --individuos y --anio para un conjunto individual")
+        conjuntos.append({
+            "hogares": args.hogares, "individuos": args.individuos, "instructivo": args.instructivo,
+            "anio": args.anio, "hogares_tic": args.hogares_tic, "individuos_tic": args.individuos_tic,
+        })
+    if not conjuntos:
+        raise SystemExit("No se indicaron bases: usar --hogares/--individuos o --lote")
+    return conjuntos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=DESCRIPCION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hogares", help="Base de hogares EPH (.xlsx / .txt)")
+    parser.add_argument("--individuos", help="Base de individuos EPH (.xlsx / .txt)")
+    parser.add_argument("--hogares-tic", help="Base de hogares TIC (opcional)")
+    parser.add_argument("--individuos-tic", help="Base de individuos TIC (opcional)")
+    parser.add_argument("--instructivo", help="Instructivo PDF de códigos")
+    parser.add_argument("--anio", help="Año de la base EPH")
+    parser.add_argument("--lote", help="JSON con varios conjuntos de bases")
+    parser.add_argument("--salida", default="salidas", help="Directorio de salida (por defecto: salidas)")
+    parser.add_argument("--paquete", choices=FORMATOS_PAQUETE,
+                        help="Generar además un ZIP con todas las tablas en Parquet o CSV")
+    parser.add_argument("--trabajadores", type=int, default=1, help="Conjuntos procesados en paralelo")
+    parser.add_argument("--resumen-json", help="Archivo donde guardar el resumen de tiempos por etapa")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Guardar junto a las salidas el perfil por etapa (tiempo, CPU, memoria, filas) en JSON")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        help="Medir además el pico de memoria de Python de cada etapa con tracemalloc (más lento)")
+    parser.add_argument("--informes-por", choices=GRUPOS_INFORMES,
+                        help="Generar además un ZIP con un informe Word por región o por año")
+    args = parser.parse_args(argv)
+
+    conjuntos = leer_conjuntos(args)
+    inicio = time.perf_counter()
+    resultados, errores = [], []
+    if args.trabajadores > 1 and len(conjuntos) > 1:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.trabajadores, mp_context=contexto) as ejecutor:
+            futuros = {ejecutor.submit(procesar_conjunto, c, args.salida, args.paquete, args.perfil,
+                                            args.perfil_memoria, args.informes_por): c for c in conjuntos}
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception as e:
+                    errores.append({"hogares": str(futuros[futuro]["hogares"]), "error": str(e)})
+    else:
+        for conjunto in conjuntos:
+            try:
+                resultados.append(procesar_conjunto(conjunto, args.salida, args.paquete, args.perfil,
+                                                    args.perfil_memoria, args.informes_por))
+            except Exception as e:
+                errores.append({"hogares": str(conjunto["hogares"]), "error": str(e)})
+
+    for resultado in resultados:
+        print(f"✅ {resultado['anio']}: {resultado['word']} | {resultado['excel']} ({resultado['segundos_total']:.1f} s)")
+    for error in errores:
+        print(f"❌ {error['hogares']}: {error['error']}", file=sys.stderr)
+
+    if args.resumen_json:
+        resumen = {
+            "trabajadores": args.trabajadores,
+            "segundos_total": round(time.perf_counter() - inicio, 4),
+            "conjuntos": resultados,
+            "errores": errores,
+        }
+        with open(args.resumen_json, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=2)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import copy
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import fitz
+
+from ingesta import DIRECTORIO_CACHE, hash_contenido
+
+# Diccionarios ya parseados, uno por instructivo (hash de contenido) y edición
+DIRECTORIO_DICCIONARIOS = DIRECTORIO_CACHE / "diccionarios"
+VERSION_DICCIONARIO = "2"
+
+# Por debajo de esta cantidad de páginas no conviene lanzar procesos: extraer el texto
+# cuesta ~0,4 ms por página y arrancar el pool con "spawn" (cada proceso importa
+# PyMuPDF y pandas) lleva segundos. Los instructivos del INDEC tienen decenas de
+# páginas, así que en la práctica se extraen en serie. PyMuPDF no admite hilos.
+PAGINAS_MINIMAS_PARALELO = 5_000
+
+# "CH04   N(1)   Sexo" -> definición de variable
+PATRON_VARIABLE = re.compile(r"^(\w{2,})\s+[NC]\(\d+\)\s+(.+)$")
+# "1 = Varón", "1. Varón", "01- Jefe/a", "9) Ns./Nr." -> etiqueta de valor de la última variable
+PATRON_ETIQUETA = re.compile(r"^\s*(-?\d{1,3})\s*(=|\.|-|\))\s*(\S.*?)\s*$")
+PATRON_EDICION = re.compile(r"\b(20\d{2})\b")
+
+
+def limpiar_descripcion_variable(desc):
+    """Limpia las descripciones de variables del instructivo"""
+    desc = desc.replace(".....", "").replace("....", "").replace("...", "").strip()
+    return desc.strip().capitalize()
+
+
+def contenido_pdf(pdf_file):
+    """Bytes del PDF, ya sea un archivo subido, un buffer o una ruta"""
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    return pdf_file.read()
+
+
+def _extraer_paginas(contenido, desde, hasta):
+    """Texto de un rango de páginas (se ejecuta en un proceso trabajador)"""
+    doc = fitz.open(stream=contenido, filetype="pdf")
+    try:
+        return [doc[numero].get_text() for numero in range(desde, hasta)]
+    finally:
+        doc.close()
+
+
+def extraer_paginas(contenido, trabajadores=None):
+    """Texto de cada página del PDF, extraído en paralelo por rangos de páginas"""
+    doc = fitz.open(stream=contenido, filetype="pdf")
+    cantidad = doc.page_count
+    doc.close()
+    trabajadores = trabajadores or os.cpu_count() or 1
+    if cantidad < PAGINAS_MINIMAS_PARALELO or trabajadores == 1:
+        return _extraer_paginas(contenido, 0, cantidad)
+
+    tamanio = -(-cantidad // trabajadores)
+    rangos = [(desde, min(desde + tamanio, cantidad)) for desde in range(0, cantidad, tamanio)]
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(rangos), mp_context=contexto) as ejecutor:
+        partes = ejecutor.map(_extraer_paginas, [contenido] * len(rangos), *zip(*rangos))
+        return [texto for parte in partes for texto in parte]
+
+
+def parsear_instructivo(paginas):
+    """Definiciones de variables y sus tablas de etiquetas de valores.
+
+    Devuelve ({código: descripción}, {código: {valor: etiqueta}}). Las etiquetas
+    son las líneas "valor = texto" contiguas a cada definición de variable, todas
+    con el separador de la primera. Las líneas en minúscula continúan el renglón
+    anterior; cualquier otra línea cierra la tabla, así los títulos numerados
+    ("1. Introducción") no se toman como etiquetas.
+    """
+    variables, etiquetas = {}, {}
+    actual = separador = ultimo = None
+    for pagina in paginas:
+        for linea in pagina.splitlines():
+            linea = linea.strip()
+            if not linea:
+                continue
+            definicion = PATRON_VARIABLE.match(linea)
+            if definicion:
+                actual, separador, ultimo = definicion.group(1).strip(), None, None
+                variables[actual] = limpiar_descripcion_variable(definicion.group(2))
+                continue
+            if actual is None:
+                continue
+            etiqueta = PATRON_ETIQUETA.match(linea)
+            if etiqueta and separador in (None, etiqueta.group(2)):
+                separador, ultimo = etiqueta.group(2), int(etiqueta.group(1))
+                etiquetas.setdefault(actual, {}).setdefault(ultimo, limpiar_descripcion_variable(etiqueta.group(3)))
+            elif linea[0].islower():
+                # Descripción o etiqueta partida en dos renglones
+                if ultimo is not None:
+                    etiquetas[actual][ultimo] = f"{etiquetas[actual][ultimo]} {linea}"
+            else:
+                actual = None
+    return variables, etiquetas
+
+
+def detectar_edicion(paginas):
+    """Año de edición del instructivo, según el primer año que aparece en la portada"""
+    for pagina in paginas[:2]:
+        coincidencia = PATRON_EDICION.search(pagina)
+        if coincidencia:
+            return coincidencia.group(1)
+    return "sin_edicion"
+
+
+def _ruta_diccionario(clave, edicion):
+    return DIRECTORIO_DICCIONARIOS / f"{edicion}-{clave}.json"
+
+
+@lru_cache(maxsize=16)
+def _diccionario_por_clave(clave, edicion):
+    """Diccionario guardado en disco (None si el instructivo todavía no fue parseado)"""
+    candidatos = [_ruta_diccionario(clave, edicion)] if edicion else sorted(DIRECTORIO_DICCIONARIOS.glob(f"*-{clave}.json"))
+    for ruta in candidatos:
+        if ruta.exists():
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+            datos["etiquetas"] = {var: {int(v): t for v, t in valores.items()} for var, valores in datos["etiquetas"].items()}
+            return datos
+    return None
+
+
+def cargar_diccionario(pdf_file, edicion=None, trabajadores=None):
+    """Diccionario persistente de un instructivo: variables, etiquetas de valores y edición.
+
+    Cada instructivo se parsea una única vez; luego se lee del JSON guardado por
+    hash de contenido y edición, y las consultas repetidas salen de memoria. Se
+    devuelve una copia, para que quien la modifique no altere la memorizada.
+    """
+    clave = f"{hash_contenido(pdf_file)}-v{VERSION_DICCIONARIO}"
+    guardado = _diccionario_por_clave(clave, edicion)
+    if guardado is not None:
+        return copy.deepcopy(guardado)
+
+    paginas = extraer_paginas(contenido_pdf(pdf_file), trabajadores)
+    variables, etiquetas = parsear_instructivo(paginas)
+    datos = {
+        "edicion": edicion or detectar_edicion(paginas),
+        "hash": clave,
+        "variables": variables,
+        "etiquetas": etiquetas,
+    }
+    DIRECTORIO_DICCIONARIOS.mkdir(parents=True, exist_ok=True)
+    ruta = _ruta_diccionario(clave, datos["edicion"])
+    temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    _diccionario_por_clave.cache_clear()
+    return datos
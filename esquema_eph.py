@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+# Versión del esquema: forma parte de la clave de caché de ingesta
+VERSION_ESQUEMA = "1"
+
+# Claves de unión y ponderadores de las bases EPH
+CLAVES_HOGAR = ["CODUSU", "NRO_HOGAR", "AGLOMERADO"]
+CLAVES_INDIVIDUO = ["CODUSU", "NRO_HOGAR", "COMPONENTE", "AGLOMERADO"]
+PONDERADORES = ["PONDERA", "PONDIH", "PONDII", "PONDIIO"]
+
+# Variables de período, región e ingreso (con su decil, que marca la no respuesta) usadas
+# por los estimadores: se leen siempre y conservan su código INDEC aunque el instructivo las renombre
+VARIABLES_ANALISIS = ["ANO4", "TRIMESTRE", "REGION", "IPCF", "ITF", "DECCFR", "DECIFR"]
+
+# Variables de vivienda, hacinamiento y TIC del índice compuesto de privación:
+# también se leen siempre con su código INDEC
+VARIABLES_INDICE = ["IV1", "IV2", "IV6", "IV8", "IX_TOT", "IH_II_01", "IH_II_02"]
+
+ETIQUETAS_REGION = {1: "GBA", 40: "NOA", 41: "NEA", 42: "Cuyo", 43: "Pampeana", 44: "Patagonia"}
+
+# Variables codificadas que los análisis usan con nombre propio
+NOMBRES_ANALISIS = {
+    "CH04": "sexo",
+    "CH06": "edad",
+    "NIVEL_ED": "nivel_educativo",
+    "ESTADO": "actividad",
+    "IP_III_04": "acceso_computadora",
+    "IP_III_06": "acceso_internet",
+}
+
+# Etiquetas de valores por defecto; las del instructivo, si las trae, tienen prioridad
+ETIQUETAS_EPH = {
+    "CH04": {1: "Varón", 2: "Mujer"},
+    "NIVEL_ED": {
+        1: "Primario incompleto", 2: "Primario completo", 3: "Secundario incompleto",
+        4: "Secundario completo", 5: "Superior universitario incompleto",
+        6: "Superior universitario completo", 7: "Sin instrucción", 9: "Ns./Nr.",
+    },
+    "ESTADO": {
+        0: "Entrevista individual no realizada", 1: "Ocupado", 2: "Desocupado",
+        3: "Inactivo", 4: "Menor de 10 años",
+    },
+    "IP_III_04": {1: "Sí", 2: "No", 9: "Ns./Nr."},
+    "IP_III_06": {1: "Sí", 2: "No", 9: "Ns./Nr."},
+}
+
+# Tipos compactos de las variables EPH (bases de hogares, individuos y módulos TIC).
+# Los códigos enteros se guardan en int8/int16; si la columna tiene faltantes se usa
+# float32, que representa esos códigos sin pérdida. Los montos en pesos se mantienen
+# en float64 porque float32 no conserva los centavos por encima de ~16 millones.
+ESQUEMA_EPH = {
+    "CODUSU": "string",
+    "ANO4": "int16",
+    "TRIMESTRE": "int8",
+    "NRO_HOGAR": "int8",
+    "COMPONENTE": "int8",
+    "H15": "int8",
+    "REALIZADA": "int8",
+    "MAS_500": "category",
+    "REGION": "category",
+    "AGLOMERADO": "category",
+    "PONDERA": "int32",
+    "PONDIH": "int32",
+    "PONDII": "int32",
+    "PONDIIO": "int32",
+    # Vivienda y hogar
+    "IV1": "int8", "IV2": "int8", "IV3": "int8", "IV4": "int8", "IV5": "int8", "IV6": "int8",
+    "IV7": "int8", "IV8": "int8", "IV9": "int8", "IV10": "int8", "IV11": "int8", "IV12_1": "int8",
+    "IV12_2": "int8", "IV12_3": "int8",
+    "II1": "int8", "II2": "int8", "II3": "int8", "II4_1": "int8", "II4_2": "int8", "II4_3": "int8",
+    "II7": "int8", "II8": "int8", "II9": "int8",
+    "IX_TOT": "int8", "IX_MEN10": "int8", "IX_MAYEQ10": "int8",
+    # Personas
+    "CH03": "int8",
+    "CH04": "int8",
+    "CH06": "int16",
+    "CH07": "int8",
+    "CH08": "int8",
+    "CH09": "int8",
+    "CH10": "int8",
+    "CH11": "int8",
+    "CH12": "int8",
+    "CH13": "int8",
+    "CH14": "int8",
+    "CH15": "int8",
+    "NIVEL_ED": "int8",
+    "ESTADO": "int8",
+    "CAT_OCUP": "int8",
+    "CAT_INAC": "int8",
+    "PP3E_TOT": "float32",
+    "PP3F_TOT": "float32",
+    # Deciles de ingreso
+    "DECINDR": "int8", "DECIFR": "int8", "DECCFR": "int8",
+    "IDECINDR": "int8", "IDECIFR": "int8", "IDECCFR": "int8",
+    "RDECINDR": "int8", "RDECIFR": "int8", "RDECCFR": "int8",
+    "GDECINDR": "int8", "GDECIFR": "int8", "GDECCFR": "int8",
+    "PDECINDR": "int8", "PDECIFR": "int8", "PDECCFR": "int8",
+    # Ingresos
+    "P21": "float64",
+    "P47T": "float64",
+    "ITF": "float64",
+    "IPCF": "float64",
+    # Módulo TIC
+    "IH_II_01": "int8", "IH_II_02": "int8",
+    "IP_III_04": "int8", "IP_III_05": "int8", "IP_III_06": "int8",
+}
+
+
+def _tipo_con_faltantes(tipo):
+    """Tipo a usar cuando una columna entera del esquema tiene valores faltantes"""
+    return "float32" if tipo in ("int8", "int16") else "float64"
+
+
+def aplicar_esquema(df, esquema=ESQUEMA_EPH):
+    """Convierte las columnas presentes en el esquema a sus tipos compactos"""
+    for col in df.columns:
+        tipo = esquema.get(col)
+        if tipo is None or tipo == "category":
+            continue
+        serie = df[col]
+        if tipo == "string":
+            df[col] = serie.astype("string").str.strip()
+            continue
+        serie = pd.to_numeric(serie, errors="coerce")
+        if tipo.startswith("int"):
+            limites = np.iinfo(tipo)
+            valores = serie.dropna()
+            if not ((valores % 1 == 0).all() and valores.between(limites.min, limites.max).all()):
+                # Valores fuera de rango o no enteros: se conserva el tipo numérico leído
+                tipo = serie.dtype
+            elif len(valores) < len(serie):
+                tipo = _tipo_con_faltantes(tipo)
+        df[col] = serie.astype(tipo)
+    return df
+
+
+def aplicar_categoricas(df, esquema=ESQUEMA_EPH):
+    """Convierte a categóricas las columnas declaradas como tales en el esquema"""
+    for col in df.columns:
+        if esquema.get(col) == "category" and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("category")
+    return df
+
+
+def decodificar_categoricas(df, etiquetas=None, nombres=None):
+    """Convierte las variables codificadas en categóricas con las etiquetas del instructivo.
+
+    Cada categórica guarda un código entero pequeño por fila (int8) y las etiquetas
+    una sola vez. Los códigos sin etiqueta y los faltantes quedan como NaN. Con
+    `nombres` ({código INDEC: nombre de análisis}) la categórica toma el nombre de
+    análisis y la columna original conserva los códigos INDEC, que son los que usan
+    los indicadores: así no dependen del texto de las etiquetas del instructivo.
+    """
+    etiquetas, nombres = etiquetas or {}, nombres or {}
+    for col in ETIQUETAS_EPH:
+        if col not in df.columns:
+            continue
+        destino = nombres.get(col, col)
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(df[col]):
+            # Ya decodificada o con las etiquetas como texto: no hay códigos que conservar
+            df = df.rename(columns={col: destino})
+            df[destino] = df[destino].astype("category")
+            continue
+        tabla = etiquetas.get(col) or {}
+        if len(set(tabla.values())) < len(tabla) or not tabla:
+            tabla = ETIQUETAS_EPH[col]
+        codigos = np.array(sorted(tabla))
+        valores = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Búsqueda vectorizada código -> posición de la categoría (-1 si no tiene etiqueta)
+        posiciones = np.searchsorted(codigos, valores).clip(max=len(codigos) - 1)
+        posiciones = np.where(codigos[posiciones] == valores, posiciones, -1).astype(np.int8)
+        df[destino] = pd.Categorical.from_codes(posiciones, categories=[tabla[c] for c in codigos])
+    return df
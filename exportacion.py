@@ -0,0 +1,87 @@
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import xlsxwriter
+
+from ingesta import normalizar_tipos
+
+# Límite de filas de una hoja de Excel (incluye la fila de encabezado)
+FILAS_MAXIMAS_EXCEL = 1_048_576
+FILAS_POR_BLOQUE = 50_000
+FORMATOS_PAQUETE = ("parquet", "csv")
+
+
+def _filas(df, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Genera las filas de un DataFrame como tuplas de valores nativos, bloque a bloque"""
+    for inicio in range(0, len(df), filas_por_bloque):
+        bloque = df.iloc[inicio:inicio + filas_por_bloque].astype(object)
+        bloque = bloque.where(bloque.notna(), None)
+        yield from bloque.itertuples(index=False, name=None)
+
+
+def escribir_hoja(libro, nombre, df, filas_maximas=FILAS_MAXIMAS_EXCEL):
+    """Escribe un DataFrame fila por fila, repartiéndolo en varias hojas si supera el límite de Excel"""
+    encabezado = [str(col) for col in df.columns]
+    filas_por_hoja = filas_maximas - 1
+    cantidad_hojas = max(1, -(-len(df) // filas_por_hoja))
+    nombres = []
+    filas = _filas(df)
+    for numero in range(cantidad_hojas):
+        sufijo = f" ({numero + 1})" if cantidad_hojas > 1 else ""
+        nombre_hoja = f"{nombre[:31 - len(sufijo)]}{sufijo}"
+        hoja = libro.add_worksheet(nombre_hoja)
+        hoja.write_row(0, 0, encabezado)
+        for fila in range(1, min(filas_por_hoja, len(df) - numero * filas_por_hoja) + 1):
+            hoja.write_row(fila, 0, next(filas))
+        nombres.append(nombre_hoja)
+    return nombres
+
+
+def escribir_libro_excel(hojas, salida=None, filas_maximas=FILAS_MAXIMAS_EXCEL):
+    """Escribe un libro Excel en modo de memoria constante de xlsxwriter.
+
+    `hojas` es un diccionario {nombre: DataFrame}. Cada fila se vuelca a disco en
+    cuanto se escribe y, sin `salida`, el libro se arma en un archivo temporal (que
+    queda a cargo del llamador) en lugar de en memoria, por lo que el uso de memoria
+    no crece con el tamaño de las bases. Devuelve la ruta (o el buffer) de salida.
+    """
+    if salida is None:
+        descriptor, salida = tempfile.mkstemp(prefix="analisis_eph_", suffix=".xlsx")
+        os.close(descriptor)
+        salida = Path(salida)
+    destino = os.fspath(salida) if isinstance(salida, os.PathLike) else salida
+    libro = xlsxwriter.Workbook(destino, {"constant_memory": True})
+    for nombre, df in hojas.items():
+        escribir_hoja(libro, nombre, df, filas_maximas)
+    libro.close()
+    if hasattr(salida, "seek"):
+        salida.seek(0)
+    return salida
+
+
+def generar_paquete(hojas, formato="parquet", salida=None):
+    """Empaqueta cada tabla como Parquet o CSV dentro de un ZIP: alternativa rápida al Excel"""
+    if formato not in FORMATOS_PAQUETE:
+        raise ValueError(f"Formato de paquete no soportado: {formato}")
+    salida = salida if salida is not None else io.BytesIO()
+    # Parquet ya está comprimido; los CSV sí se comprimen dentro del ZIP
+    compresion = zipfile.ZIP_STORED if formato == "parquet" else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(salida, "w", compression=compresion) as paquete:
+        for nombre, df in hojas.items():
+            archivo = nombre.replace("/", "-")
+            if formato == "parquet":
+                buffer = io.BytesIO()
+                normalizar_tipos(df).to_parquet(buffer, index=False)
+                paquete.writestr(f"{archivo}.parquet", buffer.getvalue())
+            else:
+                with paquete.open(f"{archivo}.csv", "w") as destino:
+                    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+                    df.to_csv(texto, index=False, chunksize=FILAS_POR_BLOQUE)
+                    texto.flush()
+                    texto.detach()
+    if hasattr(salida, "seek"):
+        salida.seek(0)
+    return salida
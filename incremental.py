@@ -0,0 +1,147 @@
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from ingesta import DIRECTORIO_CACHE, CacheParquet, hash_contenido, huella
+from perfilado import dimensiones
+
+# Salidas de las etapas del análisis, guardadas por huella de sus insumos
+DIRECTORIO_ETAPAS = DIRECTORIO_CACHE / "etapas"
+TAMANIO_MAXIMO_ETAPAS = int(os.environ.get("EPH_CACHE_ETAPAS_MAX_MB", "2048")) * 1024 * 1024
+# Cambiar al modificar el cálculo de alguna etapa: invalida todas las salidas guardadas
+VERSION_ETAPAS = "8"
+
+CALCULADA = "calculada"
+REUTILIZADA = "reutilizada"
+
+
+class CacheEtapas(CacheParquet):
+    """Caché en disco de las salidas de etapas (tablas, tuplas, buffers, archivos), con desalojo LRU por tamaño.
+
+    Las etapas que escriben un archivo (por ejemplo, el libro Excel) devuelven su
+    ruta: el archivo se mueve a la caché y se guarda su ubicación, sin leerlo en memoria.
+    """
+
+    extension = ".pkl"
+
+    def __init__(self, directorio=DIRECTORIO_ETAPAS, tamanio_maximo=TAMANIO_MAXIMO_ETAPAS):
+        super().__init__(directorio, tamanio_maximo)
+
+    def _entradas(self):
+        # Las salidas guardadas y los archivos que referencian, sin las escrituras en curso
+        return (ruta for ruta in self.directorio.iterdir() if ruta.is_file() and ruta.suffix != ".tmp")
+
+    def _leer(self, ruta):
+        valor = pd.read_pickle(ruta)
+        if isinstance(valor, Path):
+            # Si el archivo fue desalojado, la entrada se descarta y la etapa se recalcula
+            os.utime(valor)
+        return valor
+
+    def _escribir(self, valor, ruta):
+        pd.to_pickle(valor, ruta)
+
+    def guardar(self, clave, valor):
+        """Guarda la salida y la devuelve; un archivo se mueve a la caché y se devuelve su nueva ruta"""
+        if isinstance(valor, Path):
+            destino = self.directorio / f"{clave}{valor.suffix}"
+            shutil.move(valor, destino)
+            valor = destino
+        return super().guardar(clave, valor)
+
+
+def huella_archivo(archivo):
+    """Huella de una entrada de archivo opcional (ruta, archivo subido o buffer)"""
+    return "-" if archivo is None else hash_contenido(archivo)
+
+
+@contextmanager
+def _sin_medicion(nombre):
+    yield {}
+
+
+class Etapa:
+    """Nodo del grafo: función, dependencias (entradas o etapas anteriores) y parámetros que forman su huella"""
+
+    def __init__(self, nombre, funcion, dependencias=(), parametros=None, persistir=True):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dependencias = tuple(dependencias)
+        self.parametros = dict(parametros or {})
+        self.persistir = persistir
+
+
+class GrafoEtapas:
+    """Etapas encadenadas por dependencias que sólo se recalculan si cambian sus insumos.
+
+    La huella de una etapa combina su nombre, sus parámetros y las huellas de sus
+    dependencias, así que un cambio en una entrada sólo altera las etapas que
+    dependen de ella. Las salidas persistidas con la misma huella se leen de la
+    caché sin calcular (ni leer) las etapas anteriores.
+    """
+
+    def __init__(self, entradas, version=VERSION_ETAPAS):
+        # Entradas del grafo: nombre -> función que calcula la huella de su valor
+        self.entradas = dict(entradas)
+        self.etapas = {}
+        self.version = version
+
+    def agregar(self, nombre, funcion, dependencias=(), parametros=None, persistir=True):
+        """Agrega una etapa; sus dependencias deben ser entradas o etapas ya agregadas"""
+        if nombre in self.etapas or nombre in self.entradas:
+            raise ValueError(f"La etapa {nombre} ya está definida en el grafo")
+        faltantes = [d for d in dependencias if d not in self.etapas and d not in self.entradas]
+        if faltantes:
+            raise ValueError(f"La etapa {nombre} depende de {', '.join(faltantes)}, que no están definidas")
+        self.etapas[nombre] = Etapa(nombre, funcion, dependencias, parametros, persistir)
+        return self
+
+    def huellas(self, valores):
+        """Huella de cada entrada y de cada etapa, en orden de dependencias"""
+        huellas = {nombre: str(calcular(valores.get(nombre))) for nombre, calcular in self.entradas.items()}
+        for nombre, etapa in self.etapas.items():
+            parametros = sorted((clave, repr(valor)) for clave, valor in etapa.parametros.items())
+            huellas[nombre] = huella(self.version, nombre, *parametros, *(huellas[d] for d in etapa.dependencias))
+        return huellas
+
+    def ejecutar(self, valores, objetivos=None, cache=None, medir=None):
+        """Calcula las etapas objetivo (todas, por defecto) reutilizando las salidas guardadas en `cache`.
+
+        `medir(nombre)` es un administrador de contexto que rodea el cálculo o la
+        lectura de cada etapa y entrega un registro (por ejemplo, Perfil.etapa).
+        Devuelve ({etapa: salida} de los objetivos, {etapa: CALCULADA | REUTILIZADA}).
+        """
+        huellas = self.huellas(valores)
+        medir = medir or _sin_medicion
+        salidas = {nombre: valores.get(nombre) for nombre in self.entradas}
+        estados = {}
+
+        def salida(nombre):
+            if nombre in salidas:
+                return salidas[nombre]
+            etapa = self.etapas[nombre]
+            clave = f"{nombre}-{huellas[nombre]}"
+            persistida = etapa.persistir and cache is not None
+            if persistida and cache.ruta(clave).exists():
+                with medir(nombre) as registro:
+                    guardada = cache.obtener(clave)
+                    registro["reutilizada"] = guardada is not None
+                    registro.update(dimensiones(guardada))
+                if guardada is not None:
+                    salidas[nombre], estados[nombre] = guardada, REUTILIZADA
+                    return guardada
+            argumentos = [salida(dependencia) for dependencia in etapa.dependencias]
+            with medir(nombre) as registro:
+                resultado = etapa.funcion(*argumentos, **etapa.parametros)
+                registro["reutilizada"] = False
+                registro.update(dimensiones(resultado))
+            if persistida:
+                resultado = cache.guardar(clave, resultado)
+            salidas[nombre], estados[nombre] = resultado, CALCULADA
+            return resultado
+
+        objetivos = list(self.etapas) if objetivos is None else list(objetivos)
+        return {nombre: salida(nombre) for nombre in objetivos}, estados
@@ -0,0 +1,347 @@
+import re
+import zipfile
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+from esquema_eph import ETIQUETAS_REGION
+
+SECCIONES_INFORME = (
+    "1. Introducción",
+    "2. Análisis Descriptivo",
+    "3. Interpretación por Categorías",
+    "4. Brechas e Indicadores Clave",
+    "5. Conclusiones y Recomendaciones",
+)
+
+# Columnas de describe() que se muestran en las tablas de resumen: (columna, encabezado, formato)
+COLUMNAS_RESUMEN = (
+    ("count", "Casos", "{:,.0f}"),
+    ("mean", "Media", "{:,.2f}"),
+    ("std", "Desvío", "{:,.2f}"),
+    ("min", "Mínimo", "{:,.2f}"),
+    ("50%", "Mediana", "{:,.2f}"),
+    ("max", "Máximo", "{:,.2f}"),
+    ("top", "Más frecuente", None),
+)
+COLUMNAS_INGRESOS = (
+    ("media", "Media", "{:,.1f}"),
+    ("mediana", "Mediana", "{:,.1f}"),
+    ("p10", "P10", "{:,.1f}"),
+    ("p90", "P90", "{:,.1f}"),
+    ("brecha_p90_p10", "P90/P10", "{:,.1f}"),
+    ("gini", "Gini", "{:.3f}"),
+)
+COLUMNAS_PRIVACION = (
+    ("media_indice_compuesto", "Índice (0-100)", "{:.1f}"),
+    ("media_priv_agua", "Sin agua dentro (%)", "{:.1%}"),
+    ("media_priv_bano", "Sin baño (%)", "{:.1%}"),
+    ("media_priv_vivienda", "Vivienda precaria (%)", "{:.1%}"),
+    ("media_priv_hacinamiento", "Hacinamiento (%)", "{:.1%}"),
+    ("media_priv_computadora", "Sin computadora (%)", "{:.1%}"),
+    ("media_priv_internet", "Sin internet (%)", "{:.1%}"),
+)
+NOMBRES_GRUPO = {"ANO4": "Año", "TRIMESTRE": "Trimestre", "REGION": "Región", "AGLOMERADO": "Aglomerado"}
+
+# Caracteres de control que no pueden ir en el XML del documento
+CARACTERES_INVALIDOS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Números sin dato (faltantes o cocientes infinitos)
+SIN_DATO = "s/d"
+# Separadores de miles y decimales en castellano
+SEPARADORES_ES = str.maketrans({",": ".", ".": ","})
+
+
+def numero_es(valor, formato="{:,.0f}"):
+    """Número con `formato` (especificación de Python) y separadores en castellano: "132.478", "36,4 %".
+
+    Los valores faltantes o infinitos se escriben como "s/d".
+    """
+    if valor is None or not np.isfinite(valor):
+        return SIN_DATO
+    texto = formato.format(valor).translate(SEPARADORES_ES)
+    return texto[:-1] + " %" if texto.endswith("%") else texto
+
+
+def _texto(valor, formato=None):
+    """Valor de celda como texto: vacío si falta, en castellano con el formato indicado si es numérico"""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ""
+    if formato and isinstance(valor, (int, float, np.integer, np.floating)):
+        return numero_es(valor, formato)
+    return str(valor)
+
+
+def nombre_grupo(columna, valor):
+    """Etiqueta legible del valor de una columna de agrupamiento (las regiones, por nombre)"""
+    if columna == "REGION":
+        try:
+            return ETIQUETAS_REGION.get(int(valor), str(valor))
+        except (TypeError, ValueError):
+            return str(valor)
+    return _texto(valor)
+
+
+def filas_de_texto(df, formatos=None):
+    """Valores de `df` como filas de texto, formateados columna por columna"""
+    formatos = formatos or {}
+    columnas = []
+    for col in df.columns:
+        formato = formatos.get(col)
+        if col in NOMBRES_GRUPO:
+            columnas.append([nombre_grupo(col, valor) for valor in df[col].tolist()])
+        else:
+            columnas.append([_texto(valor, formato) for valor in df[col].tolist()])
+    return list(zip(*columnas))
+
+
+def _celda(texto, ancho, negrita=False):
+    propiedades = "<w:rPr><w:b/></w:rPr>" if negrita else ""
+    texto = escape(CARACTERES_INVALIDOS.sub("", texto))
+    return (f'<w:tc><w:tcPr><w:tcW w:w="{ancho}" w:type="dxa"/></w:tcPr>'
+            f'<w:p><w:r>{propiedades}<w:t xml:space="preserve">{texto}</w:t></w:r></w:p></w:tc>')
+
+
+def agregar_tabla(doc, encabezado, filas, estilo="Table Grid"):
+    """Agrega una tabla Word armando de una vez el XML de todas sus filas.
+
+    python-docx recorre el XML de la tabla en cada acceso a una celda; con miles
+    de celdas es mucho más rápido construir el elemento completo y agregarlo al
+    documento en una sola operación. El encabezado se repite en cada página.
+    """
+    seccion = doc.sections[-1]
+    # Ancho útil de la página en twips (1 twip = 635 EMU), repartido entre las columnas
+    ancho = int((seccion.page_width - seccion.left_margin - seccion.right_margin) / 635 / len(encabezado))
+    grilla = "".join(f'<w:gridCol w:w="{ancho}"/>' for _ in encabezado)
+    cabecera = "<w:tr><w:trPr><w:tblHeader/></w:trPr>" + "".join(_celda(t, ancho, True) for t in encabezado) + "</w:tr>"
+    cuerpo = "".join("<w:tr>" + "".join(_celda(t, ancho) for t in fila) + "</w:tr>" for fila in filas)
+    tabla = parse_xml(
+        f'<w:tbl {nsdecls("w")}><w:tblPr><w:tblStyle w:val="{doc.styles[estilo].style_id}"/>'
+        f'<w:tblW w:w="0" w:type="auto"/><w:tblLook w:val="04A0"/></w:tblPr>'
+        f"<w:tblGrid>{grilla}</w:tblGrid>{cabecera}{cuerpo}</w:tbl>"
+    )
+    # Antes de las propiedades de sección, que deben ser el último elemento del cuerpo
+    body = doc.element.body
+    if body.sectPr is not None:
+        body.sectPr.addprevious(tabla)
+    else:
+        body.append(tabla)
+
+
+def agregar_tabla_df(doc, df, columnas):
+    """Tabla Word de las columnas de `df` presentes en `columnas` ((columna, encabezado, formato), ...)"""
+    grupos = [col for col in df.columns if col in NOMBRES_GRUPO]
+    presentes = [(col, nombre, formato) for col, nombre, formato in columnas if col in df.columns]
+    encabezado = [NOMBRES_GRUPO[col] for col in grupos] + [nombre for _, nombre, _ in presentes]
+    formatos = {col: formato for col, _, formato in presentes}
+    agregar_tabla(doc, encabezado, filas_de_texto(df[grupos + [col for col, _, _ in presentes]], formatos))
+
+
+def agregar_tabla_ingresos(doc, tabla):
+    """Tabla Word con mediana, deciles extremos, brechas y Gini por grupo"""
+    agregar_tabla_df(doc, tabla, COLUMNAS_INGRESOS)
+
+
+def agregar_tabla_resumen(doc, resumen):
+    """Estadísticas descriptivas de todas las variables en una sola tabla"""
+    tabla = resumen.rename_axis("variable").reset_index()
+    agregar_tabla_df(doc, tabla, (("variable", "Variable", None),) + COLUMNAS_RESUMEN)
+
+
+@lru_cache(maxsize=1)
+def plantilla_informe():
+    """Documento base compartido por todos los informes: portada, índice e introducción con marcadores"""
+    doc = Document()
+    doc.add_heading("Informe Interpretativo EPH – {titulo}", 0)
+    doc.add_paragraph("Encuesta Permanente de Hogares\nINDEC – Argentina\n")
+    doc.add_page_break()
+
+    doc.add_heading("Índice", level=1)
+    doc.add_paragraph("\n".join(SECCIONES_INFORME))
+    doc.add_page_break()
+
+    doc.add_heading(SECCIONES_INFORME[0], level=1)
+    doc.add_paragraph(
+        "El presente informe analiza los datos {periodo} de la Encuesta Permanente de Hogares (EPH) del INDEC. "
+        "Se abordan características sociodemográficas, condiciones de vida y niveles de acceso a servicios esenciales en los hogares urbanos argentinos, "
+        "así como aspectos vinculados a la inclusión digital y las brechas sociales. El objetivo es brindar una visión analítica para la formulación de políticas públicas."
+    )
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def documento_desde_plantilla(**marcadores):
+    """Copia de la plantilla con sus marcadores ({titulo}, {periodo}) completados"""
+    doc = Document(BytesIO(plantilla_informe()))
+    for parrafo in doc.paragraphs:
+        for run in parrafo.runs:
+            if "{" in run.text:
+                run.text = run.text.format_map(marcadores)
+    return doc
+
+
+def _extremos(tabla, columna, grupo="REGION"):
+    """(grupo, valor) de las filas con el menor y el mayor valor de `columna`"""
+    datos = tabla.dropna(subset=[columna])
+    if datos.empty or grupo not in datos.columns:
+        return None
+    minimo, maximo = datos.loc[datos[columna].idxmin()], datos.loc[datos[columna].idxmax()]
+    return (nombre_grupo(grupo, minimo[grupo]), minimo[columna]), (nombre_grupo(grupo, maximo[grupo]), maximo[columna])
+
+
+def _seccion_descriptiva(doc, resumen_hogar, resumen_ind):
+    doc.add_heading(SECCIONES_INFORME[1], level=1)
+    doc.add_heading("2.1 Hogares", level=2)
+    cant_hogares = int(resumen_hogar.loc["PONDIH"]["count"] if "PONDIH" in resumen_hogar.index else resumen_hogar.iloc[0]["count"])
+    doc.add_paragraph(f"Total de hogares analizados: {numero_es(cant_hogares)}")
+    agregar_tabla_resumen(doc, resumen_hogar)
+
+    doc.add_heading("2.2 Individuos", level=2)
+    cant_individuos = int(resumen_ind.loc["IPCF"]["count"] if "IPCF" in resumen_ind.index else resumen_ind.iloc[0]["count"])
+    doc.add_paragraph(f"Total de personas analizadas: {numero_es(cant_individuos)}")
+    agregar_tabla_resumen(doc, resumen_ind)
+
+
+def _seccion_categorias(doc, ingresos, tablas):
+    doc.add_heading(SECCIONES_INFORME[2], level=1)
+    sin_datos = True
+    ingresos_region = (ingresos or {}).get(("IPCF", "Región"))
+    extremos = _extremos(ingresos_region, "mediana") if ingresos_region is not None and len(ingresos_region) > 1 else None
+    if extremos:
+        (region_min, mediana_min), (region_max, mediana_max) = extremos
+        doc.add_paragraph(
+            f"La mediana ponderada del ingreso per cápita familiar (IPCF) es más baja en {region_min} "
+            f"({numero_es(mediana_min)}) y más alta en {region_max} ({numero_es(mediana_max)})."
+        )
+        sin_datos = False
+
+    privacion = tablas.get("Índice Privación Región")
+    if privacion is not None and "media_indice_compuesto" in privacion.columns and not privacion.empty:
+        doc.add_heading("Índice compuesto de privación por región", level=2)
+        extremos = _extremos(privacion, "media_indice_compuesto")
+        if extremos and len(privacion) > 1:
+            (region_min, indice_min), (region_max, indice_max) = extremos
+            doc.add_paragraph(
+                f"El índice de privación de los hogares (0 = sin privaciones, 100 = todas) es mayor en {region_max} "
+                f"({numero_es(indice_max, '{:.1f}')}) y menor en {region_min} ({numero_es(indice_min, '{:.1f}')})."
+            )
+        agregar_tabla_df(doc, privacion, COLUMNAS_PRIVACION)
+        sin_datos = False
+
+    if sin_datos:
+        doc.add_paragraph("La base no incluye la región o el ingreso necesarios para comparar categorías.")
+
+
+def _frases_indicadores(tablas):
+    """Hallazgos clave redactados a partir de los indicadores y del índice de privación calculados"""
+    frases = []
+    indicadores = tablas.get("Indicadores Clave")
+    if indicadores is not None and not indicadores.empty:
+        valores = dict(zip(indicadores["indicador"], indicadores["valor"]))
+        if "sin_internet_hasta_primaria" in valores:
+            frases.append("Personas sin acceso a internet que tienen como máximo educación primaria completa: "
+                          f"{numero_es(valores['sin_internet_hasta_primaria'], '{:.1%}')}.")
+        if "brecha_ipcf_primaria_superior" in valores:
+            brecha = valores["brecha_ipcf_primaria_superior"]
+            if np.isfinite(brecha):
+                comparacion = "inferior" if brecha >= 0 else "superior"
+                frases.append(f"Las personas con estudios primarios completos viven en hogares con un ingreso per cápita medio "
+                              f"un {numero_es(abs(brecha), '{:.1%}')} {comparacion} al de quienes tienen estudios universitarios completos.")
+            else:
+                frases.append("Brecha del ingreso per cápita medio entre personas con estudios primarios y universitarios completos: "
+                              f"{SIN_DATO}.")
+    privacion = tablas.get("Índice Privación Región")
+    if privacion is not None and "media_priv_agua" in privacion.columns and len(privacion) > 1:
+        extremos = _extremos(privacion, "media_priv_agua")
+        if extremos:
+            region, proporcion = extremos[1]
+            frases.append(f"El {numero_es(proporcion, '{:.1%}')} de los hogares de {region} no tiene agua por cañería dentro de la vivienda, "
+                          "la proporción más alta entre las regiones.")
+    return frases
+
+
+def _seccion_brechas(doc, ingresos, tablas):
+    doc.add_heading(SECCIONES_INFORME[3], level=1)
+    for (variable, desagregacion), tabla in (ingresos or {}).items():
+        if desagregacion not in ("Total", "Región") or tabla.empty:
+            continue
+        doc.add_heading(f"Distribución de {variable} – {desagregacion}", level=2)
+        if len(tabla) == 1:
+            fila = tabla.iloc[0]
+            doc.add_paragraph(
+                f"Mediana ponderada: {numero_es(fila['mediana'])} | Brecha P90/P10: {numero_es(fila['brecha_p90_p10'], '{:.1f}')} | "
+                f"Coeficiente de Gini: {numero_es(fila['gini'], '{:.3f}')}"
+            )
+        else:
+            agregar_tabla_ingresos(doc, tabla)
+
+    frases = _frases_indicadores(tablas)
+    if frases:
+        doc.add_heading("Indicadores clave", level=2)
+        for frase in frases:
+            doc.add_paragraph(frase, style="List Bullet")
+
+    modelo = tablas.get("Modelo Exclusión")
+    if modelo is not None and not modelo.empty:
+        doc.add_heading("Determinantes de la exclusión digital", level=2)
+        doc.add_paragraph("Razones de odds del modelo logístico ponderado de exclusión digital "
+                          "(sin acceso a computadora ni a internet). Valores mayores a 1 indican mayor probabilidad de exclusión.")
+        if "convergio" in modelo.columns and not modelo["convergio"].astype(bool).all():
+            doc.add_paragraph("Atención: el ajuste no convergió, por lo que estas razones de odds no son confiables.")
+        coeficientes = modelo[modelo["variable"] != "const"].dropna(subset=["Coef."])
+        odds = pd.DataFrame({
+            "variable": coeficientes["variable"],
+            "odds": np.exp(coeficientes["Coef."]),
+            "inferior": np.exp(coeficientes["[0.025"]),
+            "superior": np.exp(coeficientes["0.975]"]),
+            "p": coeficientes["P>|z|"],
+        })
+        agregar_tabla_df(doc, odds, (("variable", "Variable", None), ("odds", "Odds ratio", "{:.2f}"),
+                                     ("inferior", "IC 95% inf.", "{:.2f}"), ("superior", "IC 95% sup.", "{:.2f}"),
+                                     ("p", "p-valor", "{:.3f}")))
+
+
+def generar_informe_word(anio, resumen_hogar, resumen_ind, ingresos=None, tablas=None, alcance=None):
+    """Informe Word armado sobre la plantilla compartida con los resultados ya calculados de los estimadores.
+
+    `tablas` son las tablas del análisis por nombre de hoja (indicadores clave, índice
+    de privación, modelo de exclusión); las secciones sin su tabla se omiten.
+    `alcance` (por ejemplo, una región) se agrega al título.
+    """
+    tablas = tablas or {}
+    titulo = f"Anual {anio}" + (f" – {alcance}" if alcance else "")
+    periodo = f"del año {anio}" + (f" para {alcance}" if alcance else "")
+    doc = documento_desde_plantilla(titulo=titulo, periodo=periodo)
+
+    _seccion_descriptiva(doc, resumen_hogar, resumen_ind)
+    _seccion_categorias(doc, ingresos, tablas)
+    _seccion_brechas(doc, ingresos, tablas)
+
+    doc.add_heading(SECCIONES_INFORME[4], level=1)
+    doc.add_paragraph(
+        "Los resultados muestran una clara asociación entre condiciones socioeconómicas y acceso a servicios. "
+        "Se recomienda implementar políticas focalizadas de inclusión digital en regiones periféricas y estrategias de fortalecimiento educativo "
+        "en grupos vulnerables. El monitoreo de estas variables en series temporales permitirá seguir la evolución de la equidad social y tecnológica."
+    )
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def empaquetar_informes(informes):
+    """ZIP con un .docx por informe ({nombre de archivo sin extensión: buffer})"""
+    salida = BytesIO()
+    # Los .docx ya están comprimidos: se guardan sin volver a comprimir
+    with zipfile.ZipFile(salida, "w", compression=zipfile.ZIP_STORED) as paquete:
+        for nombre, buffer in informes.items():
+            paquete.writestr(f"{nombre}.docx", buffer.getvalue())
+    salida.seek(0)
+    return salida
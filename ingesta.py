@@ -0,0 +1,244 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from esquema_eph import VERSION_ESQUEMA, aplicar_categoricas, aplicar_esquema
+
+# Directorio y tamaño máximo de la caché de ingesta (configurables por entorno)
+DIRECTORIO_CACHE = Path(os.environ.get("EPH_CACHE_DIR", Path.home() / ".cache" / "calculadora_eph"))
+TAMANIO_MAXIMO_CACHE = int(os.environ.get("EPH_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+TAMANIO_BLOQUE_HASH = 8 * 1024 * 1024
+
+# Filas por bloque al leer los TXT/CSV nativos del INDEC
+FILAS_POR_BLOQUE = 100_000
+EXTENSIONES_TEXTO = (".txt", ".csv")
+
+
+def hash_contenido(archivo):
+    """Calcula un hash del contenido de un archivo subido, una ruta o un buffer"""
+    # Los archivos subidos guardan su hash para no recalcularlo en cada uso del rerun
+    memorizado = getattr(archivo, "_hash_eph", None)
+    if memorizado is not None:
+        return memorizado
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(archivo, (str, os.PathLike)):
+        with open(archivo, "rb") as f:
+            for bloque in iter(lambda: f.read(TAMANIO_BLOQUE_HASH), b""):
+                h.update(bloque)
+    elif hasattr(archivo, "getbuffer"):
+        h.update(archivo.getbuffer())
+    else:
+        posicion = archivo.tell()
+        archivo.seek(0)
+        for bloque in iter(lambda: archivo.read(TAMANIO_BLOQUE_HASH), b""):
+            h.update(bloque)
+        archivo.seek(posicion)
+    resultado = h.hexdigest()
+    if not isinstance(archivo, (str, os.PathLike)):
+        try:
+            archivo._hash_eph = resultado
+        except AttributeError:
+            pass
+    return resultado
+
+
+def huella(*partes):
+    """Combina hashes de contenido y parámetros en una única clave"""
+    texto = "\x1f".join(str(parte) for parte in partes)
+    return hashlib.blake2b(texto.encode(), digest_size=16).hexdigest()
+
+
+def normalizar_tipos(df):
+    """Convierte columnas object mixtas a tipos que Parquet puede almacenar"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        numerica = pd.to_numeric(df[col], errors="coerce")
+        if numerica.notna().sum() == df[col].notna().sum():
+            df[col] = numerica
+        else:
+            df[col] = df[col].astype("string")
+    df.columns = [str(col) for col in df.columns]
+    return df
+
+
+class CacheParquet:
+    """Caché en disco de bases convertidas a Parquet, con desalojo LRU por tamaño"""
+
+    extension = ".parquet"
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, tamanio_maximo=TAMANIO_MAXIMO_CACHE):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.tamanio_maximo = tamanio_maximo
+        self.estadisticas = {"aciertos": 0, "fallos": 0, "desalojos": 0}
+
+    def ruta(self, clave):
+        return self.directorio / f"{clave}{self.extension}"
+
+    def _leer(self, ruta):
+        return pd.read_parquet(ruta)
+
+    def _escribir(self, valor, ruta):
+        valor.to_parquet(ruta, index=False)
+
+    def _entradas(self):
+        """Archivos de la caché que cuentan para el tamaño máximo"""
+        return self.directorio.glob(f"*{self.extension}")
+
+    def obtener(self, clave):
+        ruta = self.ruta(clave)
+        if not ruta.exists():
+            self.estadisticas["fallos"] += 1
+            return None
+        try:
+            df = self._leer(ruta)
+        except Exception:
+            # Entrada corrupta o incompleta: se descarta y se vuelve a generar
+            ruta.unlink(missing_ok=True)
+            self.estadisticas["fallos"] += 1
+            return None
+        # Actualizar la fecha de uso para el desalojo LRU
+        os.utime(ruta)
+        self.estadisticas["aciertos"] += 1
+        return df
+
+    def guardar(self, clave, df):
+        ruta = self.ruta(clave)
+        temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        self._escribir(df, temporal)
+        os.replace(temporal, ruta)
+        self.desalojar()
+        return df
+
+    def desalojar(self):
+        """Elimina las entradas usadas hace más tiempo hasta respetar el tamaño máximo"""
+        entradas = []
+        for ruta in self._entradas():
+            try:
+                estado = ruta.stat()
+            except FileNotFoundError:
+                # Desalojada por otro trabajo mientras se recorría el directorio
+                continue
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+        total = sum(tamanio for _, tamanio, _ in entradas)
+        for _, tamanio, ruta in sorted(entradas):
+            if total <= self.tamanio_maximo:
+                break
+            ruta.unlink(missing_ok=True)
+            total -= tamanio
+            self.estadisticas["desalojos"] += 1
+
+
+def nombre_archivo(archivo):
+    """Nombre del archivo subido o de la ruta recibida"""
+    return str(getattr(archivo, "name", archivo))
+
+
+def es_texto(archivo):
+    return nombre_archivo(archivo).lower().endswith(EXTENSIONES_TEXTO)
+
+
+def _detectar_decimal(archivo, encoding):
+    """Detecta si los números del TXT usan coma o punto decimal"""
+    if isinstance(archivo, (str, os.PathLike)):
+        with open(archivo, "rb") as f:
+            muestra = f.read(64 * 1024)
+    else:
+        posicion = archivo.tell()
+        muestra = archivo.read(64 * 1024)
+        archivo.seek(posicion)
+    texto = muestra.decode(encoding, errors="ignore")
+    return "," if re.search(r";-?\d+,\d+(;|\r?$)", texto, re.MULTILINE) else "."
+
+
+def normalizar_nombre(col):
+    return str(col).strip().upper()
+
+
+def _proyeccion(columnas):
+    """Selector de columnas para `usecols`, tolerante a mayúsculas y espacios en el encabezado"""
+    if columnas is None:
+        return None
+    buscadas = {normalizar_nombre(col) for col in columnas}
+    return lambda col: normalizar_nombre(col) in buscadas
+
+
+def _rebobinar(archivo):
+    if hasattr(archivo, "seek"):
+        archivo.seek(0)
+
+
+def leer_encabezado(archivo, sep=";", encoding="latin-1"):
+    """Devuelve los nombres de columna de una base sin leer sus filas"""
+    _rebobinar(archivo)
+    if es_texto(archivo):
+        encabezado = pd.read_csv(archivo, sep=sep, encoding=encoding, nrows=0).columns
+    else:
+        encabezado = pd.read_excel(archivo, nrows=0).columns
+    _rebobinar(archivo)
+    return [normalizar_nombre(col) for col in encabezado]
+
+
+def leer_txt_eph(archivo, columnas=None, sep=";", encoding="latin-1", decimal=None,
+                 filas_por_bloque=FILAS_POR_BLOQUE):
+    """Lee un TXT/CSV nativo del INDEC por bloques, aplicando el esquema compacto EPH"""
+    if decimal is None:
+        decimal = _detectar_decimal(archivo, encoding)
+    bloques = []
+    lector = pd.read_csv(
+        archivo, sep=sep, encoding=encoding, decimal=decimal, usecols=_proyeccion(columnas),
+        dtype={"CODUSU": str}, chunksize=filas_por_bloque, low_memory=False
+    )
+    for bloque in lector:
+        bloque.columns = [normalizar_nombre(col) for col in bloque.columns]
+        # Cada bloque se compacta antes de acumularse: el pico de memoria es la
+        # base ya compacta más un único bloque con los tipos por defecto
+        bloques.append(aplicar_esquema(bloque))
+    df = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
+    # Un bloque con faltantes pudo pasar a float32 mientras otro quedó en int8
+    df = aplicar_esquema(df)
+    return aplicar_categoricas(df)
+
+
+def leer_excel_eph(archivo, columnas=None):
+    """Lee una base EPH en Excel y le aplica el esquema compacto"""
+    df = normalizar_tipos(pd.read_excel(archivo, usecols=_proyeccion(columnas)))
+    df.columns = [normalizar_nombre(col) for col in df.columns]
+    return aplicar_categoricas(aplicar_esquema(df))
+
+
+def _huella_columnas(columnas):
+    if columnas is None:
+        return "todas"
+    texto = "\x1f".join(sorted(normalizar_nombre(col) for col in columnas))
+    return hashlib.blake2b(texto.encode(), digest_size=8).hexdigest()
+
+
+def leer_base(archivo, cache=None, columnas=None):
+    """Lee una base EPH (Excel o TXT/CSV del INDEC) desde la caché Parquet o desde el original.
+
+    Si se indican `columnas`, sólo esas columnas se leen del archivo original.
+    """
+    lector = leer_txt_eph if es_texto(archivo) else leer_excel_eph
+    _rebobinar(archivo)
+    if cache is None:
+        return lector(archivo, columnas)
+
+    inicio = time.perf_counter()
+    clave = f"{hash_contenido(archivo)}-e{VERSION_ESQUEMA}-{_huella_columnas(columnas)}"
+    df = cache.obtener(clave)
+    if df is None:
+        df = lector(archivo, columnas)
+        cache.guardar(clave, df)
+    else:
+        df = aplicar_categoricas(df)
+    cache.estadisticas["segundos"] = cache.estadisticas.get("segundos", 0.0) + time.perf_counter() - inicio
+    return df
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+from docx import Document
+
+from analyzer import (
+    PESO_HOGARES,
+    estimar_ponderado,
+    indice_por_grupo,
+    resumen_descriptivo,
+    resumen_ingresos
+)
+from exportacion import escribir_libro_excel
+from informe import agregar_tabla_ingresos, numero_es
+from ingesta import DIRECTORIO_CACHE, CacheParquet, hash_contenido, huella
+from procesamiento import PALABRAS_CLAVE_HOGAR, PALABRAS_CLAVE_IND, cargar_base_proyectada, procesar_datos
+
+# Nombres de los microdatos del INDEC: usu_hogar_T423.txt, usu_individual_T423.txt, ...
+PATRON_ARCHIVO = re.compile(r"usu_(hogar|individual)_t(\d)(\d{2})\.(txt|csv|xlsx)$", re.IGNORECASE)
+
+# Resultados por período ya calculados (se reutilizan al agregar trimestres nuevos)
+DIRECTORIO_PANEL = DIRECTORIO_CACHE / "panel"
+VERSION_PANEL = "6"
+# Etapas de ejecutar_panel_completo (avance y cancelación de los trabajos en segundo plano)
+ETAPAS_PANEL = ("periodos", "word", "excel")
+
+
+def descubrir_periodos(rutas):
+    """Agrupa por año y trimestre los archivos de hogares e individuos de un directorio o lista de rutas"""
+    if isinstance(rutas, (str, os.PathLike)) and Path(rutas).is_dir():
+        rutas = sorted(Path(rutas).iterdir())
+    periodos = {}
+    for ruta in rutas:
+        coincidencia = PATRON_ARCHIVO.search(Path(ruta).name)
+        if not coincidencia:
+            continue
+        base, trimestre, anio = coincidencia.group(1).lower(), int(coincidencia.group(2)), 2000 + int(coincidencia.group(3))
+        periodo = periodos.setdefault((anio, trimestre), {"anio": anio, "trimestre": trimestre})
+        periodo["hogar" if base == "hogar" else "individuos"] = str(ruta)
+    return [p for _, p in sorted(periodos.items()) if "hogar" in p and "individuos" in p]
+
+
+def huella_periodos(periodos):
+    """Huella rápida de los archivos de los períodos (ruta, tamaño y fecha de modificación), sin leerlos"""
+    archivos = [Path(p[base]) for p in periodos for base in ("hogar", "individuos")]
+    return huella(*((str(ruta), ruta.stat().st_size, ruta.stat().st_mtime_ns) for ruta in archivos))
+
+
+def clave_periodo(periodo, mapa_variables, etiquetas=None):
+    """Huella de un período: contenido de sus bases, diccionario, etiquetas y versión del análisis"""
+    diccionario = huella(*sorted((mapa_variables or {}).items()))
+    valores = huella(*sorted((var, *sorted(tabla.items())) for var, tabla in (etiquetas or {}).items()))
+    return huella(hash_contenido(periodo["hogar"]), hash_contenido(periodo["individuos"]), diccionario, valores,
+                  VERSION_PANEL)
+
+
+def analizar_periodo(df_hogar, df_ind, mapa_variables, anio, trimestre, etiquetas=None):
+    """Aplica procesar_datos y los estimadores de analyzer a un período"""
+    df_hogar_proc, df_ind_proc, _, _ = procesar_datos(df_hogar, df_ind, mapa_variables, etiquetas)
+    resumen_hogar, resumen_ind = resumen_descriptivo(df_hogar_proc, df_ind_proc)
+    resultados = {
+        "Resumen Hogares": resumen_hogar.rename_axis("variable").reset_index(),
+        "Resumen Individuos": resumen_ind.rename_axis("variable").reset_index(),
+    }
+    if "REGION" in df_ind_proc.columns:
+        resultados["Población por Región"] = estimar_ponderado(df_ind_proc, ["REGION"])
+    if "REGION" in df_hogar_proc.columns:
+        resultados["Hogares por Región"] = estimar_ponderado(df_hogar_proc, ["REGION"], pesos=PESO_HOGARES)
+        try:
+            resultados["Índice Privación Región"] = indice_por_grupo(df_hogar_proc)
+        except ValueError:
+            pass
+    for (variable, desagregacion), tabla in resumen_ingresos(df_hogar_proc).items():
+        resultados[f"Ingresos {variable} {desagregacion}"] = tabla
+    # Columnas de período al frente de cada tabla
+    for nombre, tabla in resultados.items():
+        tabla = tabla.drop(columns=["ANO4", "TRIMESTRE"], errors="ignore")
+        tabla.insert(0, "TRIMESTRE", trimestre)
+        tabla.insert(0, "ANO4", anio)
+        resultados[nombre] = tabla
+    return resultados
+
+
+def procesar_periodo(periodo, mapa_variables, directorio=DIRECTORIO_PANEL, etiquetas=None):
+    """Procesa un período (en un proceso trabajador) y guarda sus resultados"""
+    inicio = time.perf_counter()
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"{clave_periodo(periodo, mapa_variables, etiquetas)}.pkl"
+    if ruta.exists():
+        return periodo, pd.read_pickle(ruta), time.perf_counter() - inicio, True
+
+    cache = CacheParquet()
+    df_hogar = cargar_base_proyectada(periodo["hogar"], mapa_variables, PALABRAS_CLAVE_HOGAR, cache)
+    df_ind = cargar_base_proyectada(periodo["individuos"], mapa_variables, PALABRAS_CLAVE_IND, cache)
+    resultados = analizar_periodo(df_hogar, df_ind, mapa_variables, periodo["anio"], periodo["trimestre"],
+                                  etiquetas)
+    temporal = ruta.with_suffix(f".{os.getpid()}.tmp")
+    pd.to_pickle(resultados, temporal)
+    os.replace(temporal, ruta)
+    return periodo, resultados, time.perf_counter() - inicio, False
+
+
+def ejecutar_panel(periodos, mapa_variables, trabajadores=None, directorio=DIRECTORIO_PANEL, etiquetas=None):
+    """Procesa cada período en un proceso separado y une los resultados en series de tiempo.
+
+    Los períodos con resultados guardados se leen sin lanzar trabajadores, así que
+    agregar un trimestre nuevo sólo procesa ese trimestre. Devuelve las series
+    ({tabla: DataFrame con ANO4 y TRIMESTRE}) y un registro por período.
+    """
+    por_periodo, registro, pendientes = {}, [], []
+    for periodo in periodos:
+        ruta = Path(directorio) / f"{clave_periodo(periodo, mapa_variables, etiquetas)}.pkl"
+        if ruta.exists():
+            por_periodo[(periodo["anio"], periodo["trimestre"])] = pd.read_pickle(ruta)
+            registro.append({"anio": periodo["anio"], "trimestre": periodo["trimestre"], "segundos": 0.0, "reutilizado": True})
+        else:
+            pendientes.append(periodo)
+
+    if pendientes:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=trabajadores, mp_context=contexto) as ejecutor:
+            futuros = [ejecutor.submit(procesar_periodo, periodo, mapa_variables, directorio, etiquetas) for periodo in pendientes]
+            for futuro in as_completed(futuros):
+                periodo, resultados, segundos, reutilizado = futuro.result()
+                por_periodo[(periodo["anio"], periodo["trimestre"])] = resultados
+                registro.append({"anio": periodo["anio"], "trimestre": periodo["trimestre"],
+                                 "segundos": segundos, "reutilizado": reutilizado})
+
+    series = {}
+    for clave in sorted(por_periodo):
+        for nombre, tabla in por_periodo[clave].items():
+            series.setdefault(nombre, []).append(tabla)
+    series = {nombre: pd.concat(tablas, ignore_index=True) for nombre, tablas in series.items()}
+    registro = pd.DataFrame(registro).sort_values(["anio", "trimestre"], ignore_index=True) if registro else pd.DataFrame()
+    return series, registro
+
+
+def ejecutar_panel_completo(periodos, mapa_variables, trabajadores=None, directorio=DIRECTORIO_PANEL, etiquetas=None,
+                            progreso=None):
+    """Series del panel con su informe Word y su Excel.
+
+    `progreso`, si se indica, se llama con cada etapa de ETAPAS_PANEL al comenzarla
+    (los trabajos en segundo plano lo usan para informar avance y cancelar).
+    """
+    avanzar = progreso or (lambda etapa: None)
+    avanzar("periodos")
+    series, registro = ejecutar_panel(periodos, mapa_variables, trabajadores, directorio, etiquetas)
+    avanzar("word")
+    word = generar_informe_panel(series)
+    avanzar("excel")
+    excel = generar_excel_panel(series)
+    return {"series": series, "registro": registro, "word": word, "excel": excel}
+
+
+def generar_excel_panel(series):
+    """Libro Excel con una hoja por serie de tiempo (series chicas: se arma en memoria)"""
+    return escribir_libro_excel(series, BytesIO())
+
+
+def generar_informe_panel(series):
+    """Informe Word con la evolución de la población y de la distribución del ingreso"""
+    doc = Document()
+    periodos = series["Resumen Hogares"][["ANO4", "TRIMESTRE"]].drop_duplicates() if "Resumen Hogares" in series else pd.DataFrame()
+    doc.add_heading("Informe EPH – Serie de tiempo", 0)
+    if not periodos.empty:
+        inicio, fin = periodos.iloc[0], periodos.iloc[-1]
+        doc.add_paragraph(
+            f"Encuesta Permanente de Hogares – INDEC\n"
+            f"Períodos analizados: {len(periodos)} (T{inicio['TRIMESTRE']} {inicio['ANO4']} a T{fin['TRIMESTRE']} {fin['ANO4']})"
+        )
+
+    if "Población por Región" in series:
+        doc.add_heading("Población por período", level=1)
+        poblacion = series["Población por Región"].groupby(["ANO4", "TRIMESTRE"])["total_ponderado"].sum()
+        for (anio, trimestre), total in poblacion.items():
+            doc.add_paragraph(f"T{trimestre} {anio}: {numero_es(total)} personas", style="List Bullet")
+
+    for variable in ("IPCF", "ITF"):
+        nombre = f"Ingresos {variable} Total"
+        if nombre in series:
+            doc.add_heading(f"Distribución de {variable} por período", level=1)
+            agregar_tabla_ingresos(doc, series[nombre])
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,162 @@
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VERSION_PERFIL = "3"
+
+# tracemalloc es único para todo el proceso: las etapas que miden memoria se
+# ejecutan de a una (reentrante, para las etapas anidadas en el mismo hilo)
+_CANDADO_MEMORIA = threading.RLock()
+
+
+def rss_actual():
+    """Memoria residente del proceso en bytes (None si el sistema no la expone)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def rss_maximo():
+    """Pico de memoria residente desde que arrancó el proceso, en bytes (None si el sistema no lo expone)"""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa kilobytes; macOS, bytes
+    return maximo if sys.platform == "darwin" else maximo * 1024
+
+
+def tiempo_cpu():
+    """Segundos de CPU de todos los hilos del proceso más los de los subprocesos ya terminados"""
+    tiempos = os.times()
+    return time.process_time() + tiempos.children_user + tiempos.children_system
+
+
+def tamanio_archivo(archivo):
+    """Tamaño en bytes de una ruta, un archivo subido o un buffer (None si no se conoce)"""
+    if archivo is None:
+        return None
+    if isinstance(archivo, (str, os.PathLike)):
+        return os.path.getsize(archivo)
+    if hasattr(archivo, "getbuffer"):
+        return archivo.getbuffer().nbytes
+    return getattr(archivo, "size", None)
+
+
+def dimensiones(resultado):
+    """Filas y columnas de un DataFrame, de una tupla de DataFrames o tamaño de un buffer o archivo"""
+    if isinstance(resultado, pd.DataFrame):
+        return {"filas": len(resultado), "columnas": resultado.shape[1]}
+    if isinstance(resultado, dict) and all(isinstance(v, pd.DataFrame) for v in resultado.values()):
+        return {"tablas": len(resultado), "filas": sum(len(v) for v in resultado.values())}
+    if isinstance(resultado, tuple):
+        marcos = [r for r in resultado if isinstance(r, pd.DataFrame)]
+        if marcos:
+            return {"filas": sum(len(m) for m in marcos), "columnas": sum(m.shape[1] for m in marcos)}
+    if hasattr(resultado, "getbuffer") or isinstance(resultado, os.PathLike):
+        return {"bytes": tamanio_archivo(resultado)}
+    return {}
+
+
+class Perfil:
+    """Registro por etapa de tiempo de reloj, tiempo de CPU, memoria y tamaño de los resultados.
+
+    El tiempo de CPU es el de todo el proceso (ver `tiempo_cpu`): incluye los
+    hilos y subprocesos que lance la etapa (elección de k, modelos por grupo,
+    lectura del PDF), pero también el de otros trabajos que corran a la vez.
+    Con `memoria=True` se usa
+    tracemalloc para el pico de memoria de Python de cada etapa (más preciso,
+    pero hace más lento el análisis). Como la traza es del proceso, las etapas
+    con memoria de distintos trabajos esperan su turno; las asignaciones de otros
+    hilos que no miden memoria igual cuentan en el pico.
+
+    La memoria residente se mide siempre: `rss_mb` y `rss_delta_mb` son de la
+    etapa, mientras que `rss_pico_proceso_mb` es el pico de todo el proceso
+    hasta el final de la etapa, no el de la etapa.
+    """
+
+    def __init__(self, memoria=False, **metadatos):
+        self.memoria = memoria
+        self.etapas = []
+        self.metadatos = {
+            "version_perfil": VERSION_PERFIL,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            **metadatos,
+        }
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el bloque; devuelve el registro para agregarle dimensiones con `registro.update(...)`"""
+        registro = {"etapa": nombre}
+        if self.memoria:
+            _CANDADO_MEMORIA.acquire()
+        iniciar_traza = self.memoria and not tracemalloc.is_tracing()
+        if iniciar_traza:
+            tracemalloc.start()
+        elif self.memoria:
+            tracemalloc.reset_peak()
+        rss_inicio = rss_actual()
+        reloj, cpu = time.perf_counter(), tiempo_cpu()
+        try:
+            yield registro
+        finally:
+            registro["segundos"] = round(time.perf_counter() - reloj, 4)
+            registro["segundos_cpu"] = round(tiempo_cpu() - cpu, 4)
+            rss_fin = rss_actual()
+            if rss_fin is not None:
+                registro["rss_mb"] = round(rss_fin / 2 ** 20, 1)
+                registro["rss_delta_mb"] = round((rss_fin - rss_inicio) / 2 ** 20, 1)
+            pico = rss_maximo()
+            if pico is not None:
+                registro["rss_pico_proceso_mb"] = round(pico / 2 ** 20, 1)
+            if self.memoria:
+                registro["pico_python_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+                if iniciar_traza:
+                    tracemalloc.stop()
+                _CANDADO_MEMORIA.release()
+            self.etapas.append(registro)
+
+    def medir(self, nombre, funcion, *args, **kwargs):
+        """Ejecuta `funcion` como una etapa y registra las dimensiones de su resultado"""
+        with self.etapa(nombre) as registro:
+            resultado = funcion(*args, **kwargs)
+            registro.update(dimensiones(resultado))
+        return resultado
+
+    def tiempos(self):
+        return {registro["etapa"]: registro["segundos"] for registro in self.etapas}
+
+    def tabla(self):
+        """Una fila por etapa, con la proporción del tiempo total"""
+        tabla = pd.DataFrame(self.etapas)
+        if not tabla.empty:
+            total = tabla["segundos"].sum()
+            tabla["proporcion"] = (tabla["segundos"] / total).round(4) if total else 0.0
+        return tabla
+
+    def como_dict(self):
+        return {
+            "metadatos": self.metadatos,
+            "segundos_total": round(time.perf_counter() - self._inicio, 4),
+            "etapas": self.etapas,
+        }
+
+    def a_json(self):
+        return json.dumps(self.como_dict(), ensure_ascii=False, indent=2)
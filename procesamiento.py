@@ -0,0 +1,389 @@
+import os
+import shutil
+import tempfile
+import warnings
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from analyzer import (
+    calcular_exclusion_digital,
+    definicion_exclusion_digital,
+    generar_cruces,
+    indicadores_clave,
+    indice_por_grupo,
+    modelo_logistico,
+    modelos_logisticos_por_grupo,
+    resumen_descriptivo,
+    resumen_ingresos
+)
+from diccionario import cargar_diccionario
+from exportacion import escribir_libro_excel, generar_paquete
+from esquema_eph import (
+    CLAVES_INDIVIDUO,
+    ETIQUETAS_EPH,
+    NOMBRES_ANALISIS,
+    PONDERADORES,
+    VARIABLES_ANALISIS,
+    VARIABLES_INDICE,
+    decodificar_categoricas
+)
+from incremental import GrafoEtapas, huella_archivo
+from informe import empaquetar_informes, generar_informe_word, nombre_grupo
+from ingesta import leer_base, leer_encabezado
+from perfilado import Perfil, tamanio_archivo
+from uniones import unir_bases, unir_hogares_tic
+
+def extraer_diccionario_desde_pdf(pdf_file):
+    """Extrae el diccionario de variables desde el PDF instructivo (parseado una vez por instructivo)"""
+    return dict(cargar_diccionario(pdf_file)["variables"])
+
+def extraer_etiquetas_desde_pdf(pdf_file):
+    """Etiquetas de valores de cada variable del instructivo ({código: {valor: etiqueta}})"""
+    return cargar_diccionario(pdf_file)["etiquetas"]
+
+# Palabras clave para identificar columnas relevantes
+PALABRAS_CLAVE_HOGAR = ["región", "region", "agua", "baño", "bano", "vivienda", "tipo",
+                        "ipcf", "itf", "ingreso", "total", "familiar", "pondih"]
+PALABRAS_CLAVE_IND = ["sexo", "edad", "educ", "educación", "educacion", "nivel", "actividad",
+                      "estado", "ingreso", "ocupación", "ocupacion", "ch04", "ch06", "pondiim"]
+
+# Claves de unión, ponderadores, período, región, ingresos, variables codificadas de análisis y del
+# índice de privación: se leen siempre y no se renombran con el instructivo
+COLUMNAS_FIJAS = list(dict.fromkeys(
+    CLAVES_INDIVIDUO + PONDERADORES + VARIABLES_ANALISIS + list(NOMBRES_ANALISIS) + VARIABLES_INDICE
+))
+
+def seleccionar_columnas(columnas, mapa_variables, palabras_clave):
+    """Devuelve las columnas (con su nombre original) cuyo nombre renombrado coincide con alguna palabra clave"""
+    mapa_variables = mapa_variables or {}
+    seleccion = []
+    for col in columnas:
+        nombre = col if col in COLUMNAS_FIJAS else mapa_variables.get(col, col)
+        if any(palabra in str(nombre).lower() for palabra in palabras_clave):
+            seleccion.append(col)
+    return seleccion
+
+def columnas_a_leer(encabezado, mapa_variables, palabras_clave):
+    """Proyección a pasar al lector: columnas seleccionadas más claves y ponderadores"""
+    seleccion = seleccionar_columnas(encabezado, mapa_variables, palabras_clave)
+    if not seleccion:
+        # Sin coincidencias se analiza la base completa, como en procesar_datos
+        return None
+    fijas = [col for col in COLUMNAS_FIJAS if col in encabezado]
+    return list(dict.fromkeys(fijas + seleccion))
+
+def cargar_base_proyectada(archivo, mapa_variables, palabras_clave, cache=None):
+    """Resuelve la proyección contra el encabezado y lee sólo esas columnas"""
+    encabezado = leer_encabezado(archivo)
+    columnas = columnas_a_leer(encabezado, mapa_variables, palabras_clave)
+    return leer_base(archivo, cache, columnas=columnas)
+
+def _columnas_decodificadas(columnas, df):
+    """Columnas seleccionadas con su nombre tras decodificar: el código INDEC, si se conservó, y el de análisis"""
+    nuevas = []
+    for col in columnas:
+        nuevas += [c for c in dict.fromkeys((col, NOMBRES_ANALISIS.get(col, col))) if c in df.columns]
+    return nuevas
+
+def procesar_datos(df_hogar, df_ind, mapa_variables, etiquetas=None):
+    """Procesa y limpia los datos de hogares e individuos.
+
+    Las variables codificadas de análisis (CH04, NIVEL_ED, ESTADO, IP_III_04, ...) se
+    decodifican una única vez en categóricas con su nombre de análisis (sexo, ...);
+    la columna original conserva el código INDEC para los indicadores.
+    """
+    
+    # Identificar columnas relevantes (las claves y ponderadores no se renombran)
+    cols_hogar = seleccionar_columnas(df_hogar.columns, mapa_variables, PALABRAS_CLAVE_HOGAR)
+    cols_ind = seleccionar_columnas(df_ind.columns, mapa_variables, PALABRAS_CLAVE_IND)
+    cols_hogar += [col for col in COLUMNAS_FIJAS if col in df_hogar.columns and col not in cols_hogar]
+    cols_ind += [col for col in COLUMNAS_FIJAS if col in df_ind.columns and col not in cols_ind]
+    
+    # Filtrar DataFrames
+    df_hogar_filtrado = df_hogar[cols_hogar] if cols_hogar else df_hogar
+    df_ind_filtrado = df_ind[cols_ind] if cols_ind else df_ind
+    
+    # Decodificar variables codificadas con su nombre de análisis; las demás (CH06) sólo se renombran
+    renombrar = {col: nombre for col, nombre in NOMBRES_ANALISIS.items() if col not in ETIQUETAS_EPH}
+    df_hogar_filtrado = decodificar_categoricas(df_hogar_filtrado.copy(), etiquetas, NOMBRES_ANALISIS).rename(columns=renombrar)
+    df_ind_filtrado = decodificar_categoricas(df_ind_filtrado.copy(), etiquetas, NOMBRES_ANALISIS).rename(columns=renombrar)
+    cols_hogar = _columnas_decodificadas(cols_hogar, df_hogar_filtrado)
+    cols_ind = _columnas_decodificadas(cols_ind, df_ind_filtrado)
+    
+    # Aplicar mapeo de variables si está disponible
+    if mapa_variables:
+        mapa = {codigo: desc for codigo, desc in mapa_variables.items() if codigo not in COLUMNAS_FIJAS}
+        df_hogar_filtrado = df_hogar_filtrado.rename(columns=mapa)
+        df_ind_filtrado = df_ind_filtrado.rename(columns=mapa)
+        cols_hogar = [mapa.get(col, col) for col in cols_hogar]
+        cols_ind = [mapa.get(col, col) for col in cols_ind]
+    
+    return df_hogar_filtrado, df_ind_filtrado, cols_hogar, cols_ind
+
+def tablas_estimadores(df_hogar, df_ind, resumenes=None, ingresos=None, avisar=warnings.warn):
+    """Resúmenes descriptivos, distribución ponderada del ingreso, cruces e índice de privación"""
+    tablas = {}
+    
+    # Resúmenes descriptivos (se reutilizan si ya fueron calculados)
+    resumen_hogar, resumen_ind = resumenes or resumen_descriptivo(df_hogar, df_ind)
+    tablas["Resumen Hogares"] = resumen_hogar.rename_axis("variable").reset_index()
+    tablas["Resumen Individuos"] = resumen_ind.rename_axis("variable").reset_index()
+    
+    # Distribución ponderada del ingreso (IPCF / ITF)
+    ingresos = ingresos if ingresos is not None else resumen_ingresos(df_hogar)
+    for (variable, desagregacion), tabla in ingresos.items():
+        tablas[f"Ingresos {variable} {desagregacion}"[:31]] = tabla
+    
+    # Análisis adicionales si hay datos suficientes
+    try:
+        # Cruces de variables (si existen las columnas necesarias)
+        if any('sexo' in col.lower() for col in df_ind.columns):
+            tablas["Cruces Variables"] = generar_cruces(df_ind)
+    except Exception as e:
+        avisar(f"No se pudieron generar algunos análisis cruzados: {str(e)}")
+    
+    # Índice compuesto de privación de los hogares, normalizado dentro de cada región y año
+    try:
+        if "REGION" in df_hogar.columns:
+            tablas["Índice Privación Región"] = indice_por_grupo(df_hogar)
+    except Exception as e:
+        avisar(f"No se pudo calcular el índice de privación: {str(e)}")
+    
+    # Indicadores de brechas educativas en el acceso a internet y en el ingreso (alimentan el informe Word)
+    try:
+        indicadores = indicadores_clave(df_ind)
+        if not indicadores.empty:
+            tablas["Indicadores Clave"] = indicadores
+    except Exception as e:
+        avisar(f"No se pudieron calcular los indicadores clave: {str(e)}")
+    
+    return tablas
+
+def tablas_modelos(df_ind, avisar=warnings.warn):
+    """Modelo logístico ponderado de exclusión digital, general y por región (requiere las variables TIC)"""
+    tablas = {}
+    try:
+        if {'acceso_computadora', 'acceso_internet', 'sexo', 'edad', 'nivel_educativo'} <= set(df_ind.columns):
+            exclusion = calcular_exclusion_digital(df_ind)
+            tablas["Modelo Exclusión"] = modelo_logistico(exclusion, avisar=avisar).rename_axis("variable").reset_index()
+            por_region = modelos_logisticos_por_grupo(exclusion, ["REGION"]) if "REGION" in exclusion.columns else None
+            if por_region is not None and not por_region.empty:
+                tablas["Modelo Exclusión por Región"] = por_region
+                sin_converger = por_region.loc[~por_region["convergio"].astype(bool), "REGION"].unique()
+                if len(sin_converger):
+                    avisar("El modelo de exclusión digital no convergió en las regiones "
+                           f"{', '.join(nombre_grupo('REGION', region) for region in sin_converger)}")
+    except Exception as e:
+        avisar(f"No se pudo ajustar el modelo de exclusión digital: {str(e)}")
+    return tablas
+
+def componer_hojas(df_hogar, df_ind, cols_hogar, cols_ind, estimadores, modelos, avisar=warnings.warn, filas_bases=None):
+    """Hojas del libro en orden: resúmenes, bases, estimadores, modelos, columnas usadas y tablas conceptuales"""
+    hojas = {nombre: estimadores[nombre] for nombre in ("Resumen Hogares", "Resumen Individuos")}
+    
+    # Bases procesadas (completas salvo que se pida una muestra)
+    sufijo = "Base" if filas_bases is None else "Muestra"
+    hojas[f"{sufijo} Hogares"] = df_hogar if filas_bases is None else df_hogar.head(filas_bases)
+    hojas[f"{sufijo} Individuos"] = df_ind if filas_bases is None else df_ind.head(filas_bases)
+    
+    hojas.update((nombre, tabla) for nombre, tabla in estimadores.items() if nombre not in hojas)
+    hojas.update(modelos)
+    
+    # Información de las columnas utilizadas
+    hojas["Información Columnas"] = pd.DataFrame({
+        'Columnas Hogares': pd.Series(cols_hogar, dtype=object),
+        'Columnas Individuos': pd.Series(cols_ind, dtype=object)
+    })
+
+    # Tablas conceptuales (componentes, brechas e implicancias)
+    try:
+        conceptos = definicion_exclusion_digital()
+        for nombre, tabla in conceptos.items():
+            hojas[nombre[:30]] = tabla
+    except Exception as e:
+        avisar(f"No se pudieron generar las tablas teóricas de exclusión digital: {str(e)}")
+    
+    return hojas
+
+def hojas_de_analisis(df_hogar, df_ind, cols_hogar, cols_ind, resumenes=None, ingresos=None,
+                      avisar=warnings.warn, filas_bases=None):
+    """Tablas del análisis en el orden del libro Excel. `avisar` recibe los mensajes de análisis que no se pudieron generar.
+
+    Con `filas_bases=None` se incluyen las bases procesadas completas; con un número, sólo esa cantidad de filas.
+    """
+    estimadores = tablas_estimadores(df_hogar, df_ind, resumenes, ingresos, avisar)
+    modelos = tablas_modelos(df_ind, avisar)
+    return componer_hojas(df_hogar, df_ind, cols_hogar, cols_ind, estimadores, modelos, avisar, filas_bases)
+
+def generar_archivo_excel(df_hogar, df_ind, cols_hogar, cols_ind, resumenes=None, ingresos=None,
+                          avisar=warnings.warn, filas_bases=None):
+    """Genera archivo Excel con todos los análisis, escrito en modo de memoria constante; devuelve su ruta temporal"""
+    hojas = hojas_de_analisis(df_hogar, df_ind, cols_hogar, cols_ind, resumenes, ingresos, avisar, filas_bases)
+    return escribir_libro_excel(hojas)
+
+def generar_paquete_datos(df_hogar, df_ind, cols_hogar, cols_ind, resumenes=None, ingresos=None,
+                          avisar=warnings.warn, formato="parquet"):
+    """Genera un ZIP con todas las tablas del análisis en Parquet o CSV"""
+    hojas = hojas_de_analisis(df_hogar, df_ind, cols_hogar, cols_ind, resumenes, ingresos, avisar)
+    return generar_paquete(hojas, formato)
+
+def generar_lote_informes(df_hogar, df_ind, anio, grupo="REGION", avisar=warnings.warn):
+    """ZIP con un informe Word por valor de `grupo` (región o año) de las bases procesadas.
+
+    Los estimadores se calculan sobre las filas de cada grupo y todos los informes
+    se arman sobre la misma plantilla, que se construye una única vez.
+    """
+    if grupo not in df_hogar.columns or grupo not in df_ind.columns:
+        raise ValueError(f"Las bases no tienen la columna {grupo} para separar los informes")
+    filas_ind = df_ind.groupby(grupo, observed=True).indices
+    informes = {}
+    for valor, filas_hogar in df_hogar.groupby(grupo, observed=True).indices.items():
+        hogares, individuos = df_hogar.iloc[filas_hogar], df_ind.iloc[filas_ind.get(valor, [])]
+        if individuos.empty:
+            continue
+        resumenes = resumen_descriptivo(hogares, individuos)
+        ingresos = resumen_ingresos(hogares)
+        tablas = {**tablas_estimadores(hogares, individuos, resumenes, ingresos, avisar), **tablas_modelos(individuos, avisar)}
+        alcance = nombre_grupo(grupo, valor)
+        if grupo == "ANO4":
+            # Un informe por año: el año reemplaza al de las bases
+            informes[f"informe_eph_{alcance}"] = generar_informe_word(alcance, resumenes[0], resumenes[1], ingresos, tablas)
+            continue
+        informes[f"informe_eph_{anio}_{alcance}".replace(" ", "_")] = generar_informe_word(
+            anio, resumenes[0], resumenes[1], ingresos, tablas, alcance
+        )
+    return empaquetar_informes(informes)
+
+# Entradas del análisis y cómo se calcula su huella
+ENTRADAS_ANALISIS = {
+    "hogares": huella_archivo,
+    "individuos": huella_archivo,
+    "instructivo": huella_archivo,
+    "hogares_tic": huella_archivo,
+    "individuos_tic": huella_archivo,
+    "anio": str,
+    "formato_paquete": str,
+}
+
+def _diccionario(instructivo):
+    """Variables y etiquetas del instructivo ({} y {} sin instructivo)"""
+    if instructivo is None:
+        return {}, {}
+    return extraer_diccionario_desde_pdf(instructivo), extraer_etiquetas_desde_pdf(instructivo)
+
+def _leer_proyectada(archivo, diccionario, palabras_clave, cache=None):
+    return cargar_base_proyectada(archivo, diccionario[0], palabras_clave, cache)
+
+def _unir_tic(df_hogar, df_ind, df_hogar_tic, df_ind_tic):
+    """Individuos con sus datos de hogar y TIC, hogares con su módulo TIC y conteos de registros"""
+    df_unida, informe_union = unir_bases(df_hogar, df_ind, df_hogar_tic, df_ind_tic)
+    registros = {"hogares": len(df_hogar), "individuos": len(df_ind), "unidos": len(df_unida),
+                 "duplicados": informe_union["duplicados"]}
+    df_hogar, _ = unir_hogares_tic(df_hogar, df_hogar_tic)
+    return df_hogar, df_unida, registros
+
+def _procesar(df_hogar, df_ind, diccionario, registros=None):
+    """Bases procesadas y columnas usadas, más los conteos de registros leídos"""
+    registros = registros or {"hogares": len(df_hogar), "individuos": len(df_ind)}
+    return (*procesar_datos(df_hogar, df_ind, diccionario[0], diccionario[1]), registros)
+
+def _con_avisos(funcion, *args):
+    """Resultado de una función que informa avisos, junto con la lista de avisos"""
+    avisos = []
+    return funcion(*args, avisar=avisos.append), avisos
+
+def grafo_analisis(con_tic=False, con_paquete=False, cache=None):
+    """Grafo de etapas del análisis de un año: ingesta → diccionario → proyección → unión → estimadores → modelos → salidas.
+
+    Las lecturas no se persisten como etapa porque ya las guarda la caché Parquet de ingesta (`cache`).
+    """
+    grafo = GrafoEtapas(ENTRADAS_ANALISIS)
+    grafo.agregar("diccionario", _diccionario, ["instructivo"], persistir=False)
+    grafo.agregar("lectura_hogares", partial(_leer_proyectada, cache=cache), ["hogares", "diccionario"],
+                  {"palabras_clave": PALABRAS_CLAVE_HOGAR}, persistir=False)
+    grafo.agregar("lectura_individuos", partial(_leer_proyectada, cache=cache), ["individuos", "diccionario"],
+                  {"palabras_clave": PALABRAS_CLAVE_IND}, persistir=False)
+    if con_tic:
+        grafo.agregar("lectura_hogares_tic", partial(leer_base, cache=cache), ["hogares_tic"], persistir=False)
+        grafo.agregar("lectura_individuos_tic", partial(leer_base, cache=cache), ["individuos_tic"], persistir=False)
+        grafo.agregar("union", _unir_tic,
+                      ["lectura_hogares", "lectura_individuos", "lectura_hogares_tic", "lectura_individuos_tic"],
+                      persistir=False)
+        grafo.agregar("procesamiento", lambda union, diccionario: _procesar(union[0], union[1], diccionario, union[2]),
+                      ["union", "diccionario"])
+    else:
+        grafo.agregar("procesamiento", _procesar, ["lectura_hogares", "lectura_individuos", "diccionario"])
+    grafo.agregar("resumen", lambda bases: resumen_descriptivo(bases[0], bases[1]), ["procesamiento"])
+    grafo.agregar("ingresos", lambda bases: resumen_ingresos(bases[0]), ["procesamiento"])
+    grafo.agregar("estimadores", lambda bases, resumenes, ingresos: _con_avisos(
+        tablas_estimadores, bases[0], bases[1], resumenes, ingresos), ["procesamiento", "resumen", "ingresos"])
+    grafo.agregar("modelos", lambda bases: _con_avisos(tablas_modelos, bases[1]), ["procesamiento"])
+    grafo.agregar("word", lambda anio, resumenes, ingresos, estimadores, modelos: generar_informe_word(
+        anio, resumenes[0], resumenes[1], ingresos, {**estimadores[0], **modelos[0]}),
+        ["anio", "resumen", "ingresos", "estimadores", "modelos"])
+    grafo.agregar("hojas", lambda bases, estimadores, modelos: componer_hojas(
+        *bases[:4], estimadores[0], modelos[0]), ["procesamiento", "estimadores", "modelos"], persistir=False)
+    grafo.agregar("excel", escribir_libro_excel, ["hojas"])
+    if con_paquete:
+        grafo.agregar("paquete", generar_paquete, ["hojas", "formato_paquete"])
+    return grafo
+
+def etapas_analisis(con_tic=False, con_paquete=False):
+    """Etapas que puede recorrer ejecutar_analisis, en orden (para medir el avance)"""
+    return list(grafo_analisis(con_tic, con_paquete).etapas)
+
+def ejecutar_analisis(hogares, individuos, instructivo, anio, hogares_tic=None, individuos_tic=None, cache=None,
+                      formato_paquete=None, progreso=None, medir_memoria=False, cache_etapas=None):
+    """Ejecuta el análisis completo de un año y devuelve el Word, el Excel (y opcionalmente el paquete ZIP) y los tiempos por etapa.
+
+    Con `cache_etapas` (CacheEtapas) cada etapa guarda su salida por huella de sus
+    insumos: al cambiar sólo el año, una base TIC o el instructivo se recalculan
+    únicamente las etapas que dependen de ese cambio.
+    `progreso`, si se indica, se llama con el nombre de cada etapa al comenzarla
+    (los trabajos en segundo plano lo usan para informar avance y cancelar).
+    El resultado incluye también el perfil de cada etapa (tiempo, CPU, memoria y
+    dimensiones), las bases procesadas, los resúmenes y los ingresos. El Excel se
+    devuelve como ruta a un archivo temporal que queda a cargo del llamador: con
+    `cache_etapas` es una copia, porque la caché puede desalojar el suyo en
+    cualquier momento (otro trabajo, una corrida del CLI).
+    """
+    con_tic = hogares_tic is not None and individuos_tic is not None
+    perfil = Perfil(
+        memoria=medir_memoria,
+        anio=str(anio),
+        bytes_entrada={
+            nombre: tamanio_archivo(archivo)
+            for nombre, archivo in (("hogares", hogares), ("individuos", individuos), ("instructivo", instructivo),
+                                    ("hogares_tic", hogares_tic), ("individuos_tic", individuos_tic))
+            if archivo is not None
+        },
+    )
+
+    def medir(nombre):
+        if progreso is not None:
+            progreso(nombre)
+        return perfil.etapa(nombre)
+
+    grafo = grafo_analisis(con_tic, formato_paquete is not None, cache)
+    entradas = {
+        "hogares": hogares, "individuos": individuos, "instructivo": instructivo,
+        "hogares_tic": hogares_tic if con_tic else None, "individuos_tic": individuos_tic if con_tic else None,
+        "anio": str(anio), "formato_paquete": formato_paquete,
+    }
+    objetivos = ["procesamiento", "resumen", "ingresos", "estimadores", "modelos", "word", "excel"]
+    salidas, estados = grafo.ejecutar(entradas, objetivos + (["paquete"] if formato_paquete else []), cache_etapas, medir)
+    *bases, registros = salidas["procesamiento"]
+    excel = salidas["excel"]
+    if cache_etapas is not None:
+        descriptor, copia = tempfile.mkstemp(prefix="analisis_eph_", suffix=".xlsx")
+        os.close(descriptor)
+        shutil.copyfile(excel, copia)
+        excel = Path(copia)
+    return {
+        "word": salidas["word"], "excel": excel, "paquete": salidas.get("paquete"),
+        "tiempos": perfil.tiempos(), "perfil": perfil.como_dict(), "estados": estados,
+        "registros": registros, "avisos": salidas["estimadores"][1] + salidas["modelos"][1],
+        "bases": tuple(bases), "resumenes": salidas["resumen"], "ingresos": salidas["ingresos"],
+    }
@@ -0,0 +1,193 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from esquema_eph import CLAVES_HOGAR, CLAVES_INDIVIDUO
+
+# Hogares relevados por trimestre en la EPH continua (31 aglomerados urbanos)
+HOGARES_POR_TRIMESTRE = 16_000
+
+# Tamaños de referencia: cantidad de trimestres apilados
+TAMANIOS = {
+    "trimestre": 1,
+    "anio": 4,
+    "cinco_anios": 20,
+    "diez_anios": 40,
+}
+
+# Aglomerados de cada región (código REGION -> códigos AGLOMERADO) y su peso en la muestra
+AGLOMERADOS_REGION = {
+    1: (32, 33),
+    40: (7, 8, 19, 22, 23, 25, 29),
+    41: (12, 14, 15, 18),
+    42: (10, 26, 27),
+    43: (2, 3, 4, 5, 6, 13, 30, 34, 36, 38),
+    44: (9, 17, 20, 31, 91, 93),
+}
+PROPORCION_REGION = {1: 0.22, 40: 0.17, 41: 0.11, 42: 0.10, 43: 0.26, 44: 0.14}
+
+# Distribución del máximo nivel educativo de las personas de 6 años o más (códigos NIVEL_ED 1 a 7)
+PROPORCION_NIVEL_ED = (0.10, 0.17, 0.18, 0.24, 0.13, 0.15, 0.03)
+
+
+def _codusu(ids, rng):
+    """Códigos de vivienda de 29 caracteres (21 letras al azar + el número de vivienda), únicos"""
+    letras = rng.integers(ord("A"), ord("Z") + 1, size=(len(ids), 21), dtype=np.uint8)
+    digitos = (ids[:, None] // 10 ** np.arange(7, -1, -1) % 10 + ord("0")).astype(np.uint8)
+    return np.hstack([letras, digitos]).view("S29").ravel().astype(str)
+
+
+def _posicion_en_grupo(tamanios):
+    """0, 1, ..., n-1 para cada grupo de filas consecutivas de los tamaños dados"""
+    inicios = np.repeat(np.cumsum(tamanios) - tamanios, tamanios)
+    return np.arange(tamanios.sum()) - inicios
+
+
+def _si_no(rng, probabilidad_si, no_sabe=0.0):
+    """Respuesta codificada 1 = Sí / 2 = No (9 = Ns./Nr. con la probabilidad indicada)"""
+    azar = rng.random(len(probabilidad_si))
+    respuesta = np.where(azar < probabilidad_si, 1, 2).astype(np.int8)
+    if no_sabe:
+        respuesta[rng.random(len(respuesta)) < no_sabe] = 9
+    return respuesta
+
+
+def generar_bases(trimestres=1, hogares_por_trimestre=HOGARES_POR_TRIMESTRE, anio_inicial=2016, semilla=0,
+                  con_tic=True):
+    """Bases sintéticas de hogares e individuos (y módulos TIC) con claves, códigos y ponderadores EPH.
+
+    Los trimestres se apilan desde el primero de `anio_inicial`. Los ingresos, la
+    vivienda y el acceso TIC dependen de la región, la edad, la educación y el
+    ingreso del hogar, de modo que los cruces y modelos tengan señal.
+    """
+    rng = np.random.default_rng(semilla)
+    n = trimestres * hogares_por_trimestre
+
+    # Hogares: período, región, aglomerado, vivienda (CODUSU + NRO_HOGAR) y tamaño
+    periodo = np.repeat(np.arange(trimestres), hogares_por_trimestre)
+    regiones = np.array(list(PROPORCION_REGION))
+    region = rng.choice(regiones, size=n, p=list(PROPORCION_REGION.values()))
+    aglomerado = np.empty(n, dtype=np.int16)
+    for codigo, aglomerados in AGLOMERADOS_REGION.items():
+        filas = region == codigo
+        aglomerado[filas] = rng.choice(aglomerados, size=filas.sum())
+    # Algunas viviendas tienen un segundo hogar, que comparte CODUSU
+    segundo = rng.random(n) < 0.03
+    segundo[0] = False
+    vivienda = np.cumsum(~segundo) - 1
+    miembros = np.minimum(1 + rng.poisson(2.0, n), 12)
+    pondera = np.maximum(rng.gamma(4.0, 150.0, n) * np.where(region == 1, 2.5, 1.0), 10).astype(np.int32)
+
+    # Personas: componente, sexo, edad, educación, condición de actividad e ingresos
+    hogar_de = np.repeat(np.arange(n), miembros)
+    m = len(hogar_de)
+    componente = (_posicion_en_grupo(miembros) + 1).astype(np.int8)
+    jefe = componente == 1
+    edad = np.where(jefe, rng.integers(20, 86, m), np.minimum(rng.gamma(2.0, 14.0, m), 95)).astype(np.int16)
+    nivel_ed = rng.choice(np.arange(1, 8), size=m, p=PROPORCION_NIVEL_ED).astype(np.int8)
+    nivel_ed[edad < 6] = 7
+    nivel_ed[(edad >= 6) & (edad < 13) & (nivel_ed > 2)] = 1
+    estado = rng.choice(np.array([1, 2, 3], dtype=np.int8), size=m, p=(0.58, 0.05, 0.37))
+    estado[edad < 10] = 4
+    estado[(edad >= 65) & (rng.random(m) < 0.7)] = 3
+    estado[rng.random(m) < 0.005] = 0
+    escolaridad = np.select([nivel_ed == 7, nivel_ed <= 2, nivel_ed <= 4, nivel_ed == 5], [0, 1, 2, 3], 4)
+    p21 = np.where(estado == 1, rng.lognormal(12.0 + 0.25 * escolaridad, 0.7), 0.0).round(2)
+    jubilacion = np.where((edad >= 65) & (rng.random(m) < 0.85), rng.lognormal(11.8, 0.35, m), 0.0)
+    p47t = (p21 + jubilacion.round(2)).round(2)
+
+    itf = np.bincount(hogar_de, weights=p47t, minlength=n).round(2)
+    ipcf = (itf / miembros).round(2)
+    # Posición relativa del hogar en la distribución del ingreso (0 = más pobre)
+    rango = pd.Series(ipcf).rank(pct=True).to_numpy()
+    menores = np.bincount(hogar_de, weights=edad < 10, minlength=n).astype(np.int8)
+
+    hogares = pd.DataFrame({
+        "CODUSU": _codusu(np.arange(vivienda[-1] + 1), rng)[vivienda],
+        "ANO4": (anio_inicial + periodo // 4).astype(np.int16),
+        "TRIMESTRE": (periodo % 4 + 1).astype(np.int8),
+        "NRO_HOGAR": (1 + segundo).astype(np.int8),
+        "REALIZADA": np.int8(1),
+        "REGION": region.astype(np.int8),
+        "MAS_500": np.where(np.isin(aglomerado, (32, 33, 2, 3, 4, 13, 10, 29)), "S", "N"),
+        "AGLOMERADO": aglomerado,
+        "PONDERA": pondera,
+        "IV1": rng.choice(np.arange(1, 7), size=n, p=(0.72, 0.22, 0.02, 0.02, 0.01, 0.01)).astype(np.int8),
+        "IV2": np.clip(np.ceil(miembros * rng.uniform(0.4, 1.2, n) + 2 * rango), 1, 9).astype(np.int8),
+        "IV6": np.where(rng.random(n) < 0.04 + 0.16 * (1 - rango), rng.integers(2, 4, n), 1).astype(np.int8),
+        "IV8": np.where(rng.random(n) < 0.01 + 0.06 * (1 - rango), 2, 1).astype(np.int8),
+        "IX_TOT": miembros.astype(np.int8),
+        "IX_MEN10": menores,
+        "IX_MAYEQ10": (miembros - menores).astype(np.int8),
+        "ITF": itf,
+        "IPCF": ipcf,
+        "PONDIH": (pondera * rng.uniform(0.9, 1.35, n)).astype(np.int32),
+    })
+
+    factor_ingreso = rng.uniform(0.9, 1.35, m)
+    individuos = pd.DataFrame({
+        "CODUSU": hogares["CODUSU"].to_numpy()[hogar_de],
+        "ANO4": hogares["ANO4"].to_numpy()[hogar_de],
+        "TRIMESTRE": hogares["TRIMESTRE"].to_numpy()[hogar_de],
+        "NRO_HOGAR": hogares["NRO_HOGAR"].to_numpy()[hogar_de],
+        "COMPONENTE": componente,
+        "REGION": region[hogar_de].astype(np.int8),
+        "AGLOMERADO": aglomerado[hogar_de],
+        "PONDERA": pondera[hogar_de],
+        "CH03": np.where(jefe, 1, np.where(edad < 25, 3, 2)).astype(np.int8),
+        "CH04": rng.integers(1, 3, m, dtype=np.int8),
+        "CH06": edad,
+        "NIVEL_ED": nivel_ed,
+        "ESTADO": estado,
+        "P21": p21,
+        "P47T": p47t,
+        "PONDII": (pondera[hogar_de] * factor_ingreso).astype(np.int32),
+        "PONDIIO": (pondera[hogar_de] * factor_ingreso).astype(np.int32),
+    })
+    bases = {"hogares": hogares, "individuos": individuos}
+    if not con_tic:
+        return bases
+
+    # Módulo TIC: el acceso crece con el ingreso del hogar y la educación y cae con la edad
+    hogares_tic = hogares[CLAVES_HOGAR + ["ANO4", "TRIMESTRE"]].copy()
+    hogares_tic["IH_II_01"] = _si_no(rng, 0.3 + 0.6 * rango)
+    hogares_tic["IH_II_02"] = _si_no(rng, 0.6 + 0.37 * rango)
+    individuos_tic = individuos[CLAVES_INDIVIDUO + ["ANO4", "TRIMESTRE"]].copy()
+    base = 0.15 + 0.45 * rango[hogar_de] + 0.08 * escolaridad - 0.006 * np.clip(edad - 30, 0, None)
+    individuos_tic["IP_III_04"] = _si_no(rng, np.clip(base, 0.02, 0.97), no_sabe=0.01)
+    individuos_tic["IP_III_05"] = _si_no(rng, np.clip(base + 0.35, 0.05, 0.99))
+    individuos_tic["IP_III_06"] = _si_no(rng, np.clip(base + 0.25, 0.05, 0.99), no_sabe=0.01)
+    menores_de_4 = edad < 4
+    individuos_tic.loc[menores_de_4, ["IP_III_04", "IP_III_05", "IP_III_06"]] = 2
+    bases.update(hogares_tic=hogares_tic, individuos_tic=individuos_tic)
+    return bases
+
+
+def bases_de_tamanio(tamanio, hogares_por_trimestre=HOGARES_POR_TRIMESTRE, semilla=0, con_tic=True):
+    """Bases sintéticas de uno de los tamaños de referencia ("trimestre", "anio", ..., "diez_anios")"""
+    if tamanio not in TAMANIOS:
+        raise ValueError(f"Tamaño desconocido: {tamanio}. Opciones: {', '.join(TAMANIOS)}")
+    return generar_bases(TAMANIOS[tamanio], hogares_por_trimestre, semilla=semilla, con_tic=con_tic)
+
+
+def escribir_bases(bases, directorio, formato="txt"):
+    """Escribe las bases como las publica el INDEC (.txt separado por ';') o en Excel; devuelve las rutas"""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    nombres = {
+        "hogares": "usu_hogar", "individuos": "usu_individual",
+        "hogares_tic": "usu_tic_hogar", "individuos_tic": "usu_tic_individual",
+    }
+    rutas = {}
+    for clave, df in bases.items():
+        ruta = directorio / f"{nombres[clave]}_sintetica.{'xlsx' if formato == 'xlsx' else 'txt'}"
+        temporal = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+        if formato == "xlsx":
+            df.to_excel(temporal, index=False, engine="openpyxl")
+        else:
+            df.to_csv(temporal, sep=";", index=False)
+        os.replace(temporal, ruta)
+        rutas[clave] = ruta
+    return rutas
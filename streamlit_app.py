@@ -1,20 +1,22 @@
 import streamlit as st
+import json
+import os
+import time
 import pandas as pd
-import io
-import fitz
-import re
-from docx import Document
-from analyzer import (
-    definicion_exclusion_digital,
-    resumen_descriptivo, 
-    generar_cruces, 
-    calcular_exclusion_digital,
-    movilidad_social,
-    modelo_logistico,
-    clusterizar,
-    construir_indice_compuesto,
-    generar_informe_word_completo
+from pathlib import Path
+from analyzer import segmentar
+import procesamiento
+from exportacion import FORMATOS_PAQUETE
+from incremental import REUTILIZADA, CacheEtapas
+from ingesta import DIRECTORIO_CACHE, CacheParquet, hash_contenido, huella, normalizar_tipos
+from panel import ETAPAS_PANEL, descubrir_periodos, ejecutar_panel_completo, huella_periodos
+from procesamiento import (
+    etapas_analisis,
+    extraer_diccionario_desde_pdf,
+    extraer_etiquetas_desde_pdf,
+    generar_lote_informes
 )
+from trabajos import CANCELADO, TERMINADO, TRABAJADORES_MAXIMOS, GestorTrabajos, copiar_subida
 
 st.set_page_config(page_title="Calculadora EPH – Informe Automático", layout="wide")
 
@@ -33,227 +35,294 @@ st.info("""
 - ✅ Archivo Excel con todos los cálculos
 """)
 
-# Selección de año
-anio = st.selectbox(
-    "📅 Seleccioná el año de la base EPH", 
-    ["2017", "2018", "2019", "2020", "2021", "2022", "2023", "2024"]
-)
+# Caché de ingesta compartida entre reruns y sesiones
+@st.cache_resource
+def obtener_cache_ingesta():
+    return CacheParquet()
 
-# Carga de archivos
-# NUEVO BLOQUE DE CARGA DE ARCHIVOS
+cache_ingesta = obtener_cache_ingesta()
 
-# Carga de archivos (4 bases + instructivo)
-col1, col2 = st.columns(2)
-with col1:
-    hogares_file = st.file_uploader("🏠 Base de Hogares EPH (.xlsx)", type="xlsx", key="hogares_eph")
-    hogares_tic_file = st.file_uploader("🏠 Base de Hogares TIC (.xlsx)", type="xlsx", key="hogares_tic")
-with col2:
-    individuos_file = st.file_uploader("👤 Base de Individuos EPH (.xlsx)", type="xlsx", key="individuos_eph")
-    individuos_tic_file = st.file_uploader("👤 Base de Individuos TIC (.xlsx)", type="xlsx", key="individuos_tic")
+# Salidas de cada etapa del análisis: al cambiar una entrada sólo se recalcula lo que depende de ella
+@st.cache_resource
+def obtener_cache_etapas():
+    return CacheEtapas()
 
-# Instructivo de variables
-instructivo_pdf = st.file_uploader("📄 Instructivo PDF de códigos", type="pdf")
+cache_etapas = obtener_cache_etapas()
 
+# Pool acotado de trabajos en segundo plano, compartido por todas las sesiones
+@st.cache_resource
+def obtener_gestor_trabajos():
+    return GestorTrabajos()
 
-with col1:
-    hogares_file = st.file_uploader("🏠 Base de Hogares (.xlsx)", type="xlsx")
-    
-with col2:
-    individuos_file = st.file_uploader("👤 Base de Individuos (.xlsx)", type="xlsx")
-    
-with col3:
-    instructivo_pdf = st.file_uploader("📄 Instructivo PDF", type="pdf")
+gestor_trabajos = obtener_gestor_trabajos()
+
+# Segundos entre actualizaciones del avance de un trabajo en curso
+INTERVALO_AVANCE = 0.5
+NOMBRES_ETAPAS = {
+    "periodos": "Procesando los períodos",
+    "diccionario": "Leyendo el instructivo",
+    "lectura_hogares": "Cargando la base de hogares",
+    "lectura_individuos": "Cargando la base de individuos",
+    "lectura_hogares_tic": "Cargando la base TIC de hogares",
+    "lectura_individuos_tic": "Cargando la base TIC de individuos",
+    "union": "Uniendo las bases y el módulo TIC",
+    "procesamiento": "Procesando variables",
+    "resumen": "Calculando estadísticas descriptivas",
+    "ingresos": "Calculando la distribución del ingreso",
+    "estimadores": "Calculando cruces e índice de privación",
+    "modelos": "Ajustando los modelos de exclusión digital",
+    "word": "Generando el informe Word",
+    "hojas": "Armando las hojas del Excel",
+    "excel": "Generando el Excel",
+}
+
+# Resultados de analyzer memorizados por huella de entradas y parámetros. La caché de
+# st.cache_data es global al servidor: sesiones con las mismas bases comparten resultados.
+@st.cache_data(show_spinner=False, max_entries=64)
+def _resultado_cacheado(nombre_funcion, clave, parametros, _funcion, _args):
+    return _funcion(*_args, **dict(parametros))
 
-def limpiar_descripcion_variable(desc):
-    """Limpia las descripciones de variables del instructivo"""
-    desc = desc.replace(".....", "").replace("....", "").replace("...", "").strip()
-    return desc.strip().capitalize()
+def calcular_una_vez(funcion, clave, *args, **parametros):
+    """Ejecuta `funcion(*args, **parametros)` una única vez por clave de entradas y parámetros"""
+    return _resultado_cacheado(funcion.__name__, clave, tuple(sorted(parametros.items())), funcion, args)
 
-def extraer_diccionario_desde_pdf(pdf_file):
-    """Extrae el diccionario de variables desde el PDF instructivo"""
+@st.cache_data(show_spinner=False, max_entries=16)
+def _diccionario_cacheado(clave_pdf, _pdf_file):
     try:
-        text = ""
-        doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        
-        # Patrón para extraer variables
-        regex = re.compile(r"^(\w{2,})\s+[NC]\(\d+\)\s+(.+)$", re.MULTILINE)
-        matches = regex.findall(text)
-        
-        diccionario = {}
-        for codigo, desc in matches:
-            diccionario[codigo.strip()] = limpiar_descripcion_variable(desc)
-            
-        return diccionario
+        return extraer_diccionario_desde_pdf(_pdf_file)
     except Exception as e:
         st.error(f"Error al procesar el PDF: {str(e)}")
         return {}
 
-def procesar_datos(df_hogar, df_ind, mapa_variables):
-    """Procesa y limpia los datos de hogares e individuos"""
-    
-    # Aplicar mapeo de variables si está disponible
-    if mapa_variables:
-        df_hogar = df_hogar.rename(columns=mapa_variables)
-        df_ind = df_ind.rename(columns=mapa_variables)
-    
-    # Identificar columnas relevantes para hogares
-    palabras_clave_hogar = ["región", "region", "agua", "baño", "bano", "vivienda", "tipo", 
-                           "ipcf", "itf", "ingreso", "total", "familiar", "pondih"]
-    
-    cols_hogar = []
-    for col in df_hogar.columns:
-        if any(palabra in col.lower() for palabra in palabras_clave_hogar):
-            cols_hogar.append(col)
-    
-    # Identificar columnas relevantes para individuos
-    palabras_clave_ind = ["sexo", "edad", "educ", "educación", "educacion", "nivel", "actividad", 
-                         "estado", "ingreso", "ocupación", "ocupacion", "ch04", "ch06", "pondiim"]
-    
-    cols_ind = []
-    for col in df_ind.columns:
-        if any(palabra in col.lower() for palabra in palabras_clave_ind):
-            cols_ind.append(col)
-    
-    # Filtrar DataFrames
-    df_hogar_filtrado = df_hogar[cols_hogar] if cols_hogar else df_hogar
-    df_ind_filtrado = df_ind[cols_ind] if cols_ind else df_ind
-    
-    return df_hogar_filtrado, df_ind_filtrado, cols_hogar, cols_ind
+def obtener_diccionario(pdf_file):
+    """Diccionario del instructivo, parseado una sola vez por contenido del PDF"""
+    return _diccionario_cacheado(hash_contenido(pdf_file), pdf_file)
 
-def generar_archivo_excel(df_hogar, df_ind, cols_hogar, cols_ind):
-    """Genera archivo Excel con todos los análisis"""
-    
-    output_excel = io.BytesIO()
-    
-    with pd.ExcelWriter(output_excel, engine="openpyxl") as writer:
-        
-        # Resúmenes descriptivos
-        resumen_hogar, resumen_ind = resumen_descriptivo(df_hogar, df_ind)
-        resumen_hogar.to_excel(writer, sheet_name="Resumen Hogares")
-        resumen_ind.to_excel(writer, sheet_name="Resumen Individuos")
-        
-        # Datos originales (muestra)
-        df_hogar.head(1000).to_excel(writer, sheet_name="Muestra Hogares", index=False)
-        df_ind.head(1000).to_excel(writer, sheet_name="Muestra Individuos", index=False)
-        
-        # Análisis adicionales si hay datos suficientes
-        try:
-            # Cruces de variables (si existen las columnas necesarias)
-            if any('sexo' in col.lower() for col in df_ind.columns):
-                cruces = generar_cruces(df_ind)
-                cruces.to_excel(writer, sheet_name="Cruces Variables", index=False)
-        except Exception as e:
-            st.warning(f"No se pudieron generar algunos análisis cruzados: {str(e)}")
-        
-        # Información de las columnas utilizadas
-        info_cols = pd.DataFrame({
-            'Columnas Hogares': pd.Series(cols_hogar),
-            'Columnas Individuos': pd.Series(cols_ind)
-        })
-        info_cols.to_excel(writer, sheet_name="Información Columnas", index=False)
-    
-    output_excel.seek(0)
-    return output_excel
+@st.cache_data(show_spinner=False, max_entries=16)
+def _etiquetas_cacheadas(clave_pdf, _pdf_file):
+    try:
+        return extraer_etiquetas_desde_pdf(_pdf_file)
+    except Exception:
+        return {}
 
+def obtener_etiquetas(pdf_file):
+    """Etiquetas de valores del instructivo ({variable: {código: etiqueta}})"""
+    return _etiquetas_cacheadas(hash_contenido(pdf_file), pdf_file)
 
-# Procesamiento principal de las 4 bases
-if hogares_file and individuos_file and hogares_tic_file and individuos_tic_file and instructivo_pdf:
+# Modo de análisis: un año o panel multi-período
+modo = st.sidebar.radio("🗂️ Modo de análisis", ["Año individual", "Panel multi-período"])
 
-    with st.spinner("🔄 Procesando archivos cargados..."):
+def guardar_subidas(archivos):
+    """Guarda los archivos subidos en disco (los trabajadores del panel leen rutas)"""
+    rutas = []
+    for archivo in archivos:
+        directorio = DIRECTORIO_CACHE / "subidas" / hash_contenido(archivo)
+        directorio.mkdir(parents=True, exist_ok=True)
+        ruta = directorio / archivo.name
+        if not ruta.exists():
+            ruta.write_bytes(archivo.getvalue())
+        rutas.append(ruta)
+    return rutas
 
-        try:
-            # Cargar bases
-            df_hogar = pd.read_excel(hogares_file)
-            df_ind = pd.read_excel(individuos_file)
-            df_hogar_tic = pd.read_excel(hogares_tic_file)
-            df_ind_tic = pd.read_excel(individuos_tic_file)
+if modo == "Panel multi-período":
+    st.markdown("### 🗂️ Panel multi-año / multi-trimestre")
+    st.caption("Subí las bases con su nombre INDEC (usu_hogar_T423.txt, usu_individual_T423.txt, ...) "
+               "o indicá un directorio del servidor que las contenga.")
+    archivos_panel = st.file_uploader(
+        "📚 Bases de hogares e individuos", type=["xlsx", "txt", "csv"], accept_multiple_files=True, key="bases_panel"
+    )
+    directorio_panel = st.text_input("📁 Directorio con las bases (opcional)")
+    instructivo_panel = st.file_uploader("📄 Instructivo PDF de códigos (opcional)", type="pdf", key="instructivo_panel")
+    trabajadores = int(st.number_input(
+        "⚙️ Procesos en paralelo", min_value=1, max_value=os.cpu_count() or 1, value=min(4, os.cpu_count() or 1)
+    ))
 
-            # Unir TIC a EPH por claves
-            claves_hogar = ['CODUSU', 'NRO_HOGAR', 'AGLOMERADO']
-            claves_ind = ['CODUSU', 'NRO_HOGAR', 'COMPONENTE', 'AGLOMERADO']
+    rutas_panel = guardar_subidas(archivos_panel or [])
+    if directorio_panel and os.path.isdir(directorio_panel):
+        rutas_panel += sorted(Path(directorio_panel).iterdir())
+    periodos = descubrir_periodos(rutas_panel)
 
-            df_hogar_merged = pd.merge(df_hogar, df_hogar_tic, on=claves_hogar, how="left")
-            df_ind_merged = pd.merge(df_ind, df_ind_tic, on=claves_ind, how="left")
+    if periodos:
+        nombres_periodos = [f"T{p['trimestre']} {p['anio']}" for p in periodos]
+        st.info(f"📅 Períodos detectados: {', '.join(nombres_periodos)}")
+        # Huella de los archivos por metadatos: el contenido se lee recién dentro del trabajo
+        clave_panel = huella("panel", huella_periodos(periodos),
+                             hash_contenido(instructivo_panel) if instructivo_panel else "-")
+        trabajo_panel = gestor_trabajos.obtener(clave_panel)
+        if trabajo_panel is None:
+            mapa_panel = obtener_diccionario(instructivo_panel) if instructivo_panel else {}
+            etiquetas_panel = obtener_etiquetas(instructivo_panel) if instructivo_panel else {}
+            trabajo_panel = gestor_trabajos.enviar(clave_panel, ejecutar_panel_completo, periodos, mapa_panel,
+                                                   trabajadores, etiquetas=etiquetas_panel, etapas=ETAPAS_PANEL)
+        if not trabajo_panel.terminado:
+            st.progress(trabajo_panel.progreso, text=f"🔄 {NOMBRES_ETAPAS.get(trabajo_panel.etapa, 'En cola')}...")
+            if st.button("⏹️ Cancelar panel"):
+                gestor_trabajos.cancelar(clave_panel)
+                st.rerun()
+            time.sleep(INTERVALO_AVANCE)
+            st.rerun()
+        if trabajo_panel.estado != TERMINADO:
+            if trabajo_panel.estado == CANCELADO:
+                st.warning("⏹️ Panel cancelado.")
+            else:
+                st.error(f"❌ Error al procesar el panel: {trabajo_panel.error}")
+            if st.button("🔁 Volver a ejecutar"):
+                gestor_trabajos.descartar(clave_panel)
+                st.rerun()
+            st.stop()
+        registro = trabajo_panel.resultado["registro"]
+        st.success(f"✅ Panel listo: {int((~registro['reutilizado']).sum())} períodos procesados, "
+                   f"{int(registro['reutilizado'].sum())} reutilizados")
+        st.dataframe(registro, use_container_width=True)
 
-            df_merged = pd.merge(df_ind_merged, df_hogar_merged, on=["CODUSU", "NRO_HOGAR", "AGLOMERADO"], how="left")
+        primero, ultimo = periodos[0], periodos[-1]
+        sufijo = f"{primero['anio']}T{primero['trimestre']}_{ultimo['anio']}T{ultimo['trimestre']}"
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📄 Descargar Informe Word del Panel",
+                data=trabajo_panel.resultado["word"].getvalue(),
+                file_name=f"informe_eph_panel_{sufijo}.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
+        with col2:
+            st.download_button(
+                label="📊 Descargar Series Excel",
+                data=trabajo_panel.resultado["excel"].getvalue(),
+                file_name=f"series_eph_{sufijo}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+    else:
+        st.info("👆 **Subí al menos un par hogar/individuos de un período para comenzar**")
+    st.stop()
+
+# Selección de año
+anio = st.selectbox(
+    "📅 Seleccioná el año de la base EPH", 
+    ["2017", "2018", "2019", "2020", "2021", "2022", "2023", "2024"]
+)
 
-            st.success(f"✅ Bases unidas correctamente. Registros: {len(df_merged):,}")
+# Carga de archivos
+# NUEVO BLOQUE DE CARGA DE ARCHIVOS
 
-        except Exception as e:
-            st.error(f"❌ Error al unir las bases: {e}")
-            st.stop()
+# Carga de archivos (4 bases + instructivo)
+col1, col2 = st.columns(2)
+with col1:
+    hogares_file = st.file_uploader("🏠 Base de Hogares EPH (.xlsx / .txt)", type=["xlsx", "txt", "csv"], key="hogares_eph")
+    hogares_tic_file = st.file_uploader("🏠 Base de Hogares TIC (.xlsx / .txt)", type=["xlsx", "txt", "csv"], key="hogares_tic")
+with col2:
+    individuos_file = st.file_uploader("👤 Base de Individuos EPH (.xlsx / .txt)", type=["xlsx", "txt", "csv"], key="individuos_eph")
+    individuos_tic_file = st.file_uploader("👤 Base de Individuos TIC (.xlsx / .txt)", type=["xlsx", "txt", "csv"], key="individuos_tic")
 
+# Instructivo de variables
+instructivo_pdf = st.file_uploader("📄 Instructivo PDF de códigos", type="pdf")
 
-# Procesamiento principal
+# Procesamiento principal: carga, unión con TIC, análisis, Word y Excel en un trabajo en segundo plano
 if hogares_file and individuos_file and instructivo_pdf:
     
-    with st.spinner("🔄 Procesando archivos..."):
-        
-        # Extraer diccionario de variables
-        mapa_variables = extraer_diccionario_desde_pdf(instructivo_pdf)
-        
-        # Cargar bases de datos
-        try:
-            df_hogar = pd.read_excel(hogares_file)
-            df_ind = pd.read_excel(individuos_file)
-            
-            st.success(f"✅ Archivos cargados exitosamente")
-            st.info(f"📊 Hogares: {len(df_hogar):,} registros | Individuos: {len(df_ind):,} registros")
-            
-        except Exception as e:
-            st.error(f"❌ Error al cargar los archivos Excel: {str(e)}")
-            st.stop()
+    con_tic = bool(hogares_tic_file and individuos_tic_file)
     
-    with st.spinner("🔍 Analizando datos..."):
+    # Huella de las entradas: bases e instructivo (identifica el trabajo entre reruns y sesiones)
+    clave_bases = huella(
+        hash_contenido(hogares_file), hash_contenido(individuos_file), hash_contenido(instructivo_pdf),
+        *(hash_contenido(archivo) for archivo in (hogares_tic_file, individuos_tic_file) if con_tic)
+    )
+    medir_memoria = st.sidebar.checkbox("🧠 Medir memoria por etapa (tracemalloc, más lento)")
+    clave_trabajo = huella(clave_bases, anio, medir_memoria)
+
+    def enviar_analisis(clave, formato_paquete=None):
+        """Trabajo del análisis de la clave; las copias de las subidas sólo se hacen al crearlo, no en cada actualización del avance"""
+        return gestor_trabajos.obtener(clave) or gestor_trabajos.enviar(
+            clave,
+            procesamiento.ejecutar_analisis,
+            copiar_subida(hogares_file),
+            copiar_subida(individuos_file),
+            copiar_subida(instructivo_pdf),
+            anio,
+            copiar_subida(hogares_tic_file) if con_tic else None,
+            copiar_subida(individuos_tic_file) if con_tic else None,
+            cache_ingesta,
+            formato_paquete=formato_paquete,
+            etapas=etapas_analisis(con_tic, formato_paquete is not None),
+            medir_memoria=medir_memoria,
+            cache_etapas=cache_etapas
+        )
+
+    trabajo = enviar_analisis(clave_trabajo)
+    
+    if not trabajo.terminado:
+        # Avance por etapa; la página se vuelve a ejecutar y se reengancha al mismo trabajo
+        etapa_actual = NOMBRES_ETAPAS.get(trabajo.etapa, "En cola")
+        st.progress(trabajo.progreso, text=f"🔄 {etapa_actual}...")
+        if gestor_trabajos.activos() > TRABAJADORES_MAXIMOS:
+            st.caption(f"Hay {gestor_trabajos.activos()} análisis en el servidor; los que exceden {TRABAJADORES_MAXIMOS} esperan en cola.")
+        if st.button("⏹️ Cancelar análisis"):
+            gestor_trabajos.cancelar(clave_trabajo)
+            st.rerun()
+        time.sleep(INTERVALO_AVANCE)
+        st.rerun()
+    
+    if trabajo.estado != TERMINADO:
+        if trabajo.estado == CANCELADO:
+            st.warning("⏹️ Análisis cancelado.")
+        else:
+            st.error(f"❌ Error al procesar las bases: {trabajo.error}")
+        if st.button("🔁 Volver a ejecutar"):
+            gestor_trabajos.descartar(clave_trabajo)
+            st.rerun()
+        st.stop()
+    
+    resultado = trabajo.resultado
+    df_hogar_proc, df_ind_proc, cols_hogar, cols_ind = resultado["bases"]
+    resumenes, ingresos = resultado["resumenes"], resultado["ingresos"]
+    output_word, output_excel = resultado["word"], resultado["excel"]
+    registros = resultado["registros"]
+    
+    # Perfil de la ejecución: tiempo, CPU, memoria y dimensiones por etapa
+    with st.sidebar:
+        st.markdown("### ⏱️ Perfil de la ejecución")
+        perfil = pd.DataFrame(resultado["perfil"]["etapas"])
+        st.bar_chart(perfil.set_index("etapa")["segundos"])
+        reutilizadas = sum(estado == REUTILIZADA for estado in resultado["estados"].values())
+        st.caption(f"Etapas reutilizadas de ejecuciones anteriores: {reutilizadas} de {len(resultado['estados'])}")
+        columnas_perfil = [col for col in ("etapa", "reutilizada", "segundos", "segundos_cpu", "rss_delta_mb", "pico_python_mb", "filas")
+                           if col in perfil.columns]
+        st.dataframe(perfil[columnas_perfil], use_container_width=True, hide_index=True)
+        st.download_button(
+            label="⬇️ Descargar perfil (JSON)",
+            data=json.dumps(resultado["perfil"], ensure_ascii=False, indent=2),
+            file_name=f"perfil_eph_{anio}.json",
+            mime="application/json"
+        )
+    
+    if con_tic:
+        st.success(f"✅ Bases unidas correctamente. Registros: {registros['unidos']:,}")
+        for base, cantidad in registros["duplicados"].items():
+            if cantidad:
+                st.warning(f"⚠️ {cantidad:,} claves duplicadas en {base.replace('_', ' ')}: se usó la primera aparición")
+    st.info(f"📊 Hogares: {registros['hogares']:,} registros | Individuos: {registros['individuos']:,} registros")
+    for aviso in resultado["avisos"]:
+        st.warning(aviso)
+    
+    # Mostrar información de las variables encontradas
+    with st.expander("📋 Variables identificadas para el análisis"):
+        col1, col2 = st.columns(2)
         
-        # Procesar datos
-        df_hogar_proc, df_ind_proc, cols_hogar, cols_ind = procesar_datos(df_hogar, df_ind, mapa_variables)
+        with col1:
+            st.write("**Variables de Hogares:**")
+            for col in cols_hogar[:10]:  # Mostrar primeras 10
+                st.write(f"• {col}")
+            if len(cols_hogar) > 10:
+                st.write(f"... y {len(cols_hogar) - 10} más")
         
-        # Mostrar información de las variables encontradas
-        with st.expander("📋 Variables identificadas para el análisis"):
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.write("**Variables de Hogares:**")
-                for col in cols_hogar[:10]:  # Mostrar primeras 10
-                    st.write(f"• {col}")
-                if len(cols_hogar) > 10:
-                    st.write(f"... y {len(cols_hogar) - 10} más")
-            
-            with col2:
-                st.write("**Variables de Individuos:**")
-                for col in cols_ind[:10]:  # Mostrar primeras 10
-                    st.write(f"• {col}")
-                if len(cols_ind) > 10:
-                    st.write(f"... y {len(cols_ind) - 10} más")
+        with col2:
+            st.write("**Variables de Individuos:**")
+            for col in cols_ind[:10]:  # Mostrar primeras 10
+                st.write(f"• {col}")
+            if len(cols_ind) > 10:
+                st.write(f"... y {len(cols_ind) - 10} más")
     
-    with st.spinner("📝 Generando informe Word completo..."):
-        
-        try:
-            # Generar informe Word completo
-            output_word = generar_informe_word_completo(
-                anio, 
-                df_hogar_proc, 
-                df_ind_proc, 
-                mapa_variables
-            )
-            
-            # Generar archivo Excel
-            output_excel = generar_archivo_excel(
-                df_hogar_proc, 
-                df_ind_proc, 
-                cols_hogar, 
-                cols_ind
-            )
-            
-            st.success("✅ ¡Análisis completado exitosamente!")
-            
-        except Exception as e:
-            st.error(f"❌ Error al generar los informes: {str(e)}")
-            st.stop()
+    st.success(f"✅ ¡Análisis completado exitosamente! ({trabajo.segundos:.1f} s)")
     
     # Mostrar resumen de resultados
     st.markdown("### 📈 Resumen de Resultados")
@@ -261,10 +330,10 @@ if hogares_file and individuos_file and instructivo_pdf:
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🏠 Total Hogares", f"{len(df_hogar):,}")
+        st.metric("🏠 Total Hogares", f"{registros['hogares']:,}")
     
     with col2:
-        st.metric("👤 Total Individuos", f"{len(df_ind):,}")
+        st.metric("👤 Total Individuos", f"{registros['individuos']:,}")
     
     with col3:
         st.metric("📊 Variables Hogares", len(cols_hogar))
@@ -287,26 +356,99 @@ if hogares_file and individuos_file and instructivo_pdf:
         )
     
     with col2:
-        st.download_button(
-            label="📊 Descargar Análisis Excel",
-            data=output_excel.getvalue(),
-            file_name=f"analisis_eph_{anio}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help="Archivo Excel con todos los cálculos y análisis"
-        )
+        try:
+            # El libro es un archivo propio del trabajo (no de la caché de etapas), vivo mientras el gestor lo conserve
+            datos_excel = output_excel.read_bytes()
+        except FileNotFoundError:
+            datos_excel = None
+            st.warning("⚠️ El Excel de este análisis ya no está disponible.")
+            if st.button("🔁 Volver a generar el Excel"):
+                gestor_trabajos.descartar(clave_trabajo)
+                st.rerun()
+        if datos_excel is not None:
+            st.download_button(
+                label="📊 Descargar Análisis Excel",
+                data=datos_excel,
+                file_name=f"analisis_eph_{anio}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                help="Archivo Excel con todos los cálculos y análisis"
+            )
+    
+    # Paquete de datos: alternativa más rápida que el Excel para bases grandes. Se arma a pedido con la
+    # etapa "paquete" del grafo: las demás etapas salen de la caché, así que sólo se escribe el ZIP
+    with st.expander("📦 Descargar paquete de datos (Parquet / CSV)"):
+        formato_paquete = st.radio("Formato", FORMATOS_PAQUETE, horizontal=True)
+        clave_paquete = huella(clave_trabajo, formato_paquete)
+        trabajo_paquete = gestor_trabajos.obtener(clave_paquete)
+        if trabajo_paquete is None and st.button(f"Generar paquete ({formato_paquete})"):
+            trabajo_paquete = enviar_analisis(clave_paquete, formato_paquete)
+        if trabajo_paquete is not None and not trabajo_paquete.terminado:
+            st.progress(trabajo_paquete.progreso, text="🔄 Armando el paquete...")
+            time.sleep(INTERVALO_AVANCE)
+            st.rerun()
+        if trabajo_paquete is not None and trabajo_paquete.estado == TERMINADO:
+            st.download_button(
+                label=f"📦 Descargar ZIP ({formato_paquete})",
+                data=trabajo_paquete.resultado["paquete"].getvalue(),
+                file_name=f"analisis_eph_{anio}_{formato_paquete}.zip",
+                mime="application/zip",
+                help="Todas las tablas y las bases completas, una por archivo"
+            )
+        elif trabajo_paquete is not None:
+            st.error(f"❌ No se pudo armar el paquete: {trabajo_paquete.error or 'cancelado'}")
+            if st.button("🔁 Reintentar paquete"):
+                gestor_trabajos.descartar(clave_paquete)
+                st.rerun()
+    
+    # Un informe Word por región o por año, armados sobre la misma plantilla (se calcula sólo a pedido)
+    with st.expander("🗂️ Informes Word por región o por año (ZIP)"):
+        grupos_informes = {"Región": "REGION", "Año": "ANO4"}
+        separar_por = st.radio("Un informe por", list(grupos_informes), horizontal=True)
+        if st.button("Generar informes"):
+            try:
+                output_informes = calcular_una_vez(
+                    generar_lote_informes,
+                    huella(clave_bases, anio, "informes", separar_por),
+                    df_hogar_proc,
+                    df_ind_proc,
+                    anio,
+                    grupos_informes[separar_por],
+                    st.warning
+                )
+                st.download_button(
+                    label="🗂️ Descargar informes (ZIP)",
+                    data=output_informes.getvalue(),
+                    file_name=f"informes_eph_{anio}_por_{separar_por.lower()}.zip",
+                    mime="application/zip"
+                )
+            except Exception as e:
+                st.warning(f"⚠️ No se pudieron generar los informes: {str(e)}")
     
     # Vista previa de algunos análisis
     with st.expander("👀 Vista previa de análisis"):
         
         tab1, tab2 = st.tabs(["Resumen Hogares", "Resumen Individuos"])
         
+        resumen_hogar, resumen_ind = resumenes
+        
         with tab1:
-            resumen_hogar, _ = resumen_descriptivo(df_hogar_proc, df_ind_proc)
-            st.dataframe(resumen_hogar.head(10), use_container_width=True)
+            st.dataframe(normalizar_tipos(resumen_hogar.head(10)), use_container_width=True)
         
         with tab2:
-            _, resumen_ind = resumen_descriptivo(df_hogar_proc, df_ind_proc)
-            st.dataframe(resumen_ind.head(10), use_container_width=True)
+            st.dataframe(normalizar_tipos(resumen_ind.head(10)), use_container_width=True)
+    
+    # Segmentación por bloques (se calcula sólo a pedido)
+    with st.expander("🧩 Segmentación de personas (clusters)"):
+        st.caption("Edad e ingresos estandarizados; k se elige por silueta sobre una muestra ponderada.")
+        if st.button("Calcular segmentación"):
+            try:
+                segmentacion = calcular_una_vez(segmentar, huella(clave_bases, "segmentacion"), df_ind_proc)
+                st.write(f"**Grupos elegidos:** {segmentacion['k']}")
+                st.dataframe(segmentacion['perfiles'], use_container_width=True)
+                if not segmentacion['evaluacion'].empty:
+                    st.dataframe(segmentacion['evaluacion'], use_container_width=True)
+            except Exception as e:
+                st.warning(f"⚠️ No se pudo calcular la segmentación: {str(e)}")
 
 else:
     # Instrucciones de uso
@@ -316,8 +458,8 @@ else:
     **Paso 1:** Selecciona el año de la base EPH (2017-2024)
     
     **Paso 2:** Sube los archivos requeridos:
-    - 🏠 **Base de Hogares**: Archivo Excel con datos de hogares
-    - 👤 **Base de Individuos**: Archivo Excel con datos de individuos  
+    - 🏠 **Base de Hogares**: Archivo Excel o TXT del INDEC con datos de hogares
+    - 👤 **Base de Individuos**: Archivo Excel o TXT del INDEC con datos de individuos  
     - 📄 **Instructivo PDF**: Documento con definiciones de variables
     
     **Paso 3:** La aplicación generará automáticamente:
@@ -338,13 +480,11 @@ else:
     - 📋 **Conclusiones y recomendaciones** de política pública
     """)
     
-    st.info("👆 **Sube los archivos requeridos para comenzar el análisis**"
-        # Tablas conceptuales (componentes, brechas e implicancias)
-        try:
-            conceptos = definicion_exclusion_digital()
-            for nombre, tabla in conceptos.items():
-                tabla.to_excel(writer, sheet_name=nombre[:30], index=False)
-        except Exception as e:
-            st.warning(f"No se pudieron generar las tablas teóricas de exclusión digital: {str(e)}")
+    st.info("👆 **Sube los archivos requeridos para comenzar el análisis**")
 
-)
+# Estado de la caché de ingesta
+with st.sidebar:
+    st.markdown("### 🗄️ Caché de ingesta")
+    estadisticas_cache = cache_ingesta.estadisticas
+    st.write(f"Aciertos: {estadisticas_cache['aciertos']} | Fallos: {estadisticas_cache['fallos']}")
+    st.write(f"Desalojos: {estadisticas_cache['desalojos']} | Tiempo de lectura: {estadisticas_cache.get('segundos', 0.0):.1f} s")
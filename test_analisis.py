@@ -0,0 +1,127 @@
+"""Pruebas de resultados (no de tiempos) del análisis sobre bases EPH sintéticas.
+
+Cada estimador se compara con una referencia directa en NumPy/pandas o, en el
+modelo logístico, con statsmodels. Se ejecutan con `python -m pytest`.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzer import (
+    TOLERANCIA_REFERENCIA_LOGIT,
+    calcular_exclusion_digital,
+    construir_indice_compuesto,
+    distribucion_ingresos,
+    estimar_ponderado,
+    verificar_logit
+)
+from benchmark import preparar_bases
+from sinteticos import escribir_bases, generar_bases
+from uniones import unir_bases
+
+
+@pytest.fixture(scope="module")
+def bases():
+    return generar_bases(trimestres=2, hogares_por_trimestre=1_500, semilla=7)
+
+
+@pytest.fixture(scope="module")
+def procesadas(bases, tmp_path_factory):
+    """Bases leídas, unidas con el módulo TIC y decodificadas, como las recibe el análisis"""
+    return preparar_bases(escribir_bases(bases, tmp_path_factory.mktemp("bases")))
+
+
+def _cuantil_referencia(x, w, q):
+    """Primer valor cuya participación acumulada del peso alcanza q"""
+    orden = np.argsort(x, kind="stable")
+    acumulado = np.cumsum(w[orden]) / w.sum()
+    return x[orden][np.searchsorted(acumulado, q - 1e-12)]
+
+
+def _gini_referencia(x, w):
+    """Diferencia absoluta media ponderada entre todos los pares, sobre dos veces la media"""
+    diferencias = np.abs(x[:, None] - x[None, :])
+    return (w @ diferencias @ w) / (2 * w.sum() ** 2 * np.average(x, weights=w))
+
+
+def test_distribucion_ingresos_contra_referencia(bases):
+    hogares = bases["hogares"]
+    tabla = distribucion_ingresos(hogares, "IPCF", ["REGION"], "PONDIH").set_index("REGION")
+    for region, grupo in hogares.groupby("REGION"):
+        # Sin la no respuesta (IPCF = 0) ni los casos sin peso
+        grupo = grupo[(grupo["IPCF"] > 0) & (grupo["PONDIH"] > 0)]
+        x, w = grupo["IPCF"].to_numpy(dtype=float), grupo["PONDIH"].to_numpy(dtype=float)
+        fila = tabla.loc[region]
+        assert fila["casos"] == len(grupo)
+        for q in (0.1, 0.5, 0.9):
+            assert fila[f"p{int(q * 100)}"] == _cuantil_referencia(x, w, q)
+        assert fila["media"] == pytest.approx(np.average(x, weights=w), rel=1e-12)
+        assert fila["gini"] == pytest.approx(_gini_referencia(x, w), rel=1e-9)
+
+
+def test_distribucion_ingresos_excluye_no_respuesta():
+    df = pd.DataFrame({"IPCF": [0, -9, 100, 200, 300, 999], "DECCFR": [12, 12, 1, 5, 9, 12], "PONDIH": 1})
+    fila = distribucion_ingresos(df, "IPCF").iloc[0]
+    assert fila["casos"] == 3
+    assert fila["media"] == pytest.approx(200)
+
+
+def test_estimar_ponderado_contra_groupby(bases):
+    individuos = bases["individuos"]
+    tabla = estimar_ponderado(individuos, ["REGION", "CH04"], ["P21"], "PONDERA").set_index(["REGION", "CH04"])
+    ponderado = individuos.assign(wx=individuos["PONDERA"] * individuos["P21"])
+    referencia = ponderado.groupby(["REGION", "CH04"]).agg(
+        casos=("PONDERA", "size"), total=("PONDERA", "sum"), suma=("wx", "sum")
+    )
+    referencia = referencia.reindex(tabla.index)
+    np.testing.assert_array_equal(tabla["casos"], referencia["casos"])
+    np.testing.assert_allclose(tabla["total_ponderado"], referencia["total"])
+    np.testing.assert_allclose(tabla["proporcion"], referencia["total"] / referencia["total"].sum())
+    np.testing.assert_allclose(tabla["media_P21"], referencia["suma"] / referencia["total"], rtol=1e-12)
+
+
+def test_logit_igual_a_statsmodels(procesadas):
+    _, individuos = procesadas
+    diferencias = verificar_logit(calcular_exclusion_digital(individuos))
+    assert max(diferencias.values()) < TOLERANCIA_REFERENCIA_LOGIT
+
+
+def test_unir_bases_con_claves_duplicadas(bases):
+    hogares, individuos = bases["hogares"], bases["individuos"]
+    hogares_tic, individuos_tic = bases["hogares_tic"], bases["individuos_tic"]
+    # Segunda aparición de un hogar y de una persona TIC con otros valores: debe ganar la primera
+    hogar = hogares.iloc[[0]].assign(ITF=-1)
+    persona_tic = individuos_tic.iloc[[0]].assign(IP_III_04=99)
+    unida, informe = unir_bases(
+        pd.concat([hogares, hogar], ignore_index=True), individuos,
+        hogares_tic, pd.concat([individuos_tic, persona_tic], ignore_index=True),
+    )
+    assert len(unida) == len(individuos)
+    assert informe["duplicados"]["hogares"] == 1
+    assert informe["duplicados"]["individuos_tic"] == 1
+    del_hogar = (unida["CODUSU"] == hogares["CODUSU"].iloc[0]) & (unida["NRO_HOGAR"] == hogares["NRO_HOGAR"].iloc[0])
+    assert del_hogar.any()
+    assert (unida.loc[del_hogar, "ITF"] == hogares["ITF"].iloc[0]).all()
+    assert unida["IP_III_04"].iloc[0] == individuos_tic["IP_III_04"].iloc[0]
+
+
+def test_indice_sin_no_respuesta_de_ingresos():
+    df = pd.DataFrame({"IPCF": [0, -9, 50_000, 100_000, 20_000], "DECCFR": [1, 12, 5, 9, 12], "IV6": [1, 2, 1, 1, 1]})
+    indice = construir_indice_compuesto(df)
+    # La no respuesta queda sin dato y no fija el piso de la escala
+    np.testing.assert_array_equal(indice["priv_ingreso"].isna(), [True, True, False, False, True])
+    assert indice["priv_ingreso"].iloc[2] == pytest.approx(1.0)
+    assert indice["priv_ingreso"].iloc[3] == pytest.approx(0.0)
+    # Sin ingreso, el índice se promedia con los indicadores que el hogar sí tiene
+    np.testing.assert_allclose(indice["indice_compuesto"], [0.0, 100.0, 50.0, 0.0, 0.0])
+
+
+def test_indice_en_bases_sinteticas(bases):
+    hogares = bases["hogares"]
+    indice = construir_indice_compuesto(hogares)
+    sin_respuesta = (hogares["IPCF"] <= 0).to_numpy()
+    assert sin_respuesta.any()
+    np.testing.assert_array_equal(indice["priv_ingreso"].isna().to_numpy(), sin_respuesta)
+    validos = indice.loc[~sin_respuesta, "priv_ingreso"]
+    assert validos.min() == pytest.approx(0.0) and validos.max() == pytest.approx(1.0)
+    assert indice["indice_compuesto"].between(0, 100).all()
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+# Trabajos que se ejecutan a la vez en el servidor; el resto espera en cola
+TRABAJADORES_MAXIMOS = int(os.environ.get("EPH_TRABAJOS_MAX", "2"))
+# Trabajos terminados que se conservan para reenganchar reruns y otras sesiones
+TRABAJOS_GUARDADOS = 16
+
+EN_COLA = "en_cola"
+EN_CURSO = "en_curso"
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+
+class TrabajoCancelado(Exception):
+    """Se lanza dentro del trabajo, al comenzar una etapa, si se pidió su cancelación"""
+
+
+class Trabajo:
+    """Ejecución en segundo plano de una función, con avance por etapas, cancelación y resultado"""
+
+    def __init__(self, clave, etapas=()):
+        self.clave = clave
+        self.etapas = list(etapas)
+        self.completadas = []
+        self.etapa = None
+        self.estado = EN_COLA
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.segundos = None
+        self._cancelacion = threading.Event()
+        self._descartado = False
+        self._futuro = None
+
+    def avanzar(self, etapa):
+        """Registra el comienzo de una etapa; se pasa a la función como `progreso`"""
+        if self._cancelacion.is_set():
+            raise TrabajoCancelado(self.clave)
+        if self.etapa is not None:
+            self.completadas.append(self.etapa)
+        self.etapa = etapa
+
+    @property
+    def progreso(self):
+        """Fracción de etapas completadas (1 al terminar)"""
+        if self.estado == TERMINADO:
+            return 1.0
+        return min(len(self.completadas) / max(len(self.etapas), 1), 0.99)
+
+    @property
+    def terminado(self):
+        return self.estado in (TERMINADO, ERROR, CANCELADO)
+
+    def liberar(self):
+        """Borra los archivos temporales que el resultado deja a cargo de quien lo recibe (valores Path)"""
+        if isinstance(self.resultado, dict):
+            for valor in self.resultado.values():
+                if isinstance(valor, Path):
+                    valor.unlink(missing_ok=True)
+
+    def cancelar(self):
+        """Pide la cancelación: un trabajo en cola no llega a empezar; uno en curso se detiene en la próxima etapa"""
+        self._cancelacion.set()
+        if self._futuro is not None and self._futuro.cancel():
+            self.estado = CANCELADO
+
+
+class GestorTrabajos:
+    """Pool acotado de trabajos identificados por clave.
+
+    Enviar dos veces la misma clave devuelve el trabajo existente (en curso o
+    terminado), de modo que un rerun de la página se reengancha en lugar de
+    repetir el cálculo. Los archivos temporales del resultado viven mientras el
+    gestor conserva el trabajo y se borran al descartarlo. Los hilos dejan libre al servidor de Streamlit mientras
+    pandas, NumPy y la lectura de archivos trabajan.
+    """
+
+    def __init__(self, trabajadores=TRABAJADORES_MAXIMOS, guardados=TRABAJOS_GUARDADOS):
+        self._ejecutor = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="trabajo_eph")
+        self._trabajos = OrderedDict()
+        self._guardados = guardados
+        self._candado = threading.Lock()
+
+    def enviar(self, clave, funcion, *args, etapas=(), **kwargs):
+        """Trabajo de la clave; si no existe, lo crea y lo encola con `funcion(*args, progreso=..., **kwargs)`"""
+        with self._candado:
+            trabajo = self._trabajos.get(clave)
+            if trabajo is not None:
+                self._trabajos.move_to_end(clave)
+                return trabajo
+            trabajo = Trabajo(clave, etapas)
+            trabajo._futuro = self._ejecutor.submit(self._ejecutar, trabajo, funcion, args, kwargs)
+            self._trabajos[clave] = trabajo
+            self._podar()
+            return trabajo
+
+    def obtener(self, clave):
+        return self._trabajos.get(clave)
+
+    def cancelar(self, clave):
+        trabajo = self._trabajos.get(clave)
+        if trabajo is not None:
+            trabajo.cancelar()
+        return trabajo
+
+    def descartar(self, clave):
+        """Olvida un trabajo (cancelándolo si sigue activo) para poder volver a enviarlo"""
+        with self._candado:
+            trabajo = self._trabajos.pop(clave, None)
+        if trabajo is not None:
+            # Si sigue activo, sus archivos se borran al terminar (ver _ejecutar)
+            trabajo._descartado = True
+            trabajo.cancelar()
+            trabajo.liberar()
+
+    def activos(self):
+        return sum(not trabajo.terminado for trabajo in list(self._trabajos.values()))
+
+    def _podar(self):
+        """Descarta los trabajos terminados más antiguos por encima del máximo guardado"""
+        sobrantes = max(len(self._trabajos) - self._guardados, 0)
+        for clave in [c for c, t in self._trabajos.items() if t.terminado][:sobrantes]:
+            self._trabajos.pop(clave).liberar()
+
+    @staticmethod
+    def _ejecutar(trabajo, funcion, args, kwargs):
+        inicio = time.perf_counter()
+        if trabajo._cancelacion.is_set():
+            trabajo.estado = CANCELADO
+            return
+        trabajo.estado = EN_CURSO
+        try:
+            trabajo.resultado = funcion(*args, progreso=trabajo.avanzar, **kwargs)
+            if trabajo.etapa is not None:
+                trabajo.completadas.append(trabajo.etapa)
+                trabajo.etapa = None
+            trabajo.estado = TERMINADO
+        except TrabajoCancelado:
+            trabajo.estado = CANCELADO
+        except Exception as e:
+            trabajo.error = str(e)
+            trabajo.estado = ERROR
+        finally:
+            trabajo.segundos = round(time.perf_counter() - inicio, 4)
+            if trabajo._descartado:
+                trabajo.liberar()
+
+
+def copiar_subida(archivo):
+    """Copia en memoria de un archivo subido, para que el trabajo no comparta el buffer con la página"""
+    if archivo is None:
+        return None
+    copia = BytesIO(archivo.getvalue())
+    copia.name = archivo.name
+    return copia
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from esquema_eph import CLAVES_HOGAR, CLAVES_INDIVIDUO
+
+# Claves de período: se suman a la unión cuando están en ambas bases (datos apilados)
+CLAVES_PERIODO = ["ANO4", "TRIMESTRE"]
+# Claves que no hacen falta para identificar el registro: sólo se usan si están en todas las bases
+CLAVES_OPCIONALES = ["AGLOMERADO"] + CLAVES_PERIODO
+
+
+def _normalizar_clave(serie):
+    """Lleva una columna clave a valores comparables entre bases (texto limpio o número)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(serie.cat.categories.dtype)
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype("float64").to_numpy()
+    numerica = pd.to_numeric(serie, errors="coerce")
+    if numerica.notna().sum() == serie.notna().sum():
+        return numerica.astype("float64").to_numpy()
+    return serie.astype("string").str.strip().to_numpy(dtype=object, na_value=None)
+
+
+def codificar_claves(marcos, claves):
+    """Codifica la clave compuesta de varios DataFrames en IDs enteros compartidos.
+
+    Devuelve un arreglo int64 por DataFrame; la misma combinación de claves recibe
+    el mismo ID en todos ellos. Las filas con alguna clave faltante reciben -1.
+    """
+    largos = [len(df) for df in marcos]
+    ids = np.zeros(sum(largos), dtype=np.int64)
+    faltantes = np.zeros(sum(largos), dtype=bool)
+    for col in claves:
+        valores = np.concatenate([_normalizar_clave(df[col]) for df in marcos])
+        codigos, unicos = pd.factorize(valores)
+        faltantes |= codigos < 0
+        # Combinación en base mixta, recomprimida en cada paso para no desbordar int64
+        ids, _ = pd.factorize(ids * len(unicos) + codigos)
+        ids = ids.astype(np.int64)
+    ids[faltantes] = -1
+    return np.split(ids, np.cumsum(largos)[:-1])
+
+
+def duplicados(df, claves):
+    """Filas cuyas claves se repiten en la base"""
+    return df[df.duplicated(claves, keep=False)]
+
+
+def claves_comunes(claves, *marcos):
+    """Claves de unión más las de período; las opcionales sólo si están en todas las bases"""
+    presentes = [col for col in claves + CLAVES_PERIODO if all(col in df.columns for df in marcos)]
+    obligatorias = [col for col in claves if col not in CLAVES_OPCIONALES]
+    return obligatorias + [col for col in presentes if col in CLAVES_OPCIONALES and col not in obligatorias]
+
+
+def _posiciones(ids_destino, ids_fuente):
+    """Posición en la fuente de cada fila del destino (-1 si no hay coincidencia)"""
+    # Ante claves repetidas se conserva la primera aparición, sin multiplicar filas
+    primeras = np.flatnonzero(~pd.Index(ids_fuente).duplicated(keep="first"))
+    encontrados = pd.Index(ids_fuente[primeras]).get_indexer(ids_destino)
+    posiciones = np.where(encontrados >= 0, primeras[encontrados], -1)
+    posiciones[ids_destino < 0] = -1
+    return posiciones
+
+
+def columnas_por_posicion(fuente, posiciones, existentes, sufijo):
+    """Columnas no clave de la fuente, tomadas por posición para cada fila del destino"""
+    nuevas = {}
+    for col in fuente.columns:
+        if col in CLAVES_INDIVIDUO + CLAVES_PERIODO:
+            continue
+        nombre = f"{col}{sufijo}" if col in existentes else col
+        nuevas[nombre] = take(fuente[col].array, posiciones, allow_fill=True)
+    return nuevas
+
+
+def unir_bases(df_hogar, df_ind, df_hogar_tic=None, df_ind_tic=None):
+    """Une hogares, individuos y módulos TIC en una base de personas.
+
+    Codifica las claves compuestas una sola vez, verifica su unicidad y adjunta las
+    columnas de hogar y TIC a cada persona por búsqueda indexada, sin multiplicar
+    filas cuando hay claves repetidas. Devuelve la base unida y un informe con
+    duplicados y filas sin coincidencia.
+    """
+    claves_ind = claves_comunes(CLAVES_INDIVIDUO, df_ind)
+    informe = {"duplicados": {}, "sin_coincidencia": {}}
+
+    # IDs de hogar compartidos entre hogares, personas y TIC hogar
+    marcos_hogar = [df_ind, df_hogar] + ([df_hogar_tic] if df_hogar_tic is not None else [])
+    claves_hogar = claves_comunes(CLAVES_HOGAR, *marcos_hogar)
+    ids_hogar = codificar_claves(marcos_hogar, claves_hogar)
+    id_hogar_ind, id_hogar = ids_hogar[0], ids_hogar[1]
+
+    informe["duplicados"]["hogares"] = int(pd.Index(id_hogar).duplicated().sum())
+    # Las columnas nuevas se acumulan y se agregan en una única concatenación
+    nuevas = {"id_hogar": id_hogar_ind}
+
+    # Personas y TIC individuos
+    if df_ind_tic is not None:
+        claves_tic = claves_comunes(CLAVES_INDIVIDUO, df_ind, df_ind_tic)
+        id_persona, id_persona_tic = codificar_claves([df_ind, df_ind_tic], claves_tic)
+        informe["duplicados"]["individuos_tic"] = int(pd.Index(id_persona_tic).duplicated().sum())
+        posiciones = _posiciones(id_persona, id_persona_tic)
+        informe["sin_coincidencia"]["individuos_tic"] = int((posiciones < 0).sum())
+        nuevas.update(columnas_por_posicion(df_ind_tic, posiciones, df_ind.columns, "_tic"))
+    else:
+        (id_persona,) = codificar_claves([df_ind], claves_ind)
+    informe["duplicados"]["individuos"] = int(pd.Index(id_persona).duplicated().sum())
+    nuevas["id_persona"] = id_persona
+
+    # Hogares y TIC hogares
+    posiciones_hogar = _posiciones(id_hogar_ind, id_hogar)
+    informe["sin_coincidencia"]["hogares"] = int((posiciones_hogar < 0).sum())
+    nuevas.update(columnas_por_posicion(df_hogar, posiciones_hogar, list(df_ind.columns) + list(nuevas), "_hogar"))
+    if df_hogar_tic is not None:
+        id_hogar_tic = ids_hogar[2]
+        informe["duplicados"]["hogares_tic"] = int(pd.Index(id_hogar_tic).duplicated().sum())
+        posiciones_tic = _posiciones(id_hogar_ind, id_hogar_tic)
+        informe["sin_coincidencia"]["hogares_tic"] = int((posiciones_tic < 0).sum())
+        nuevas.update(columnas_por_posicion(
+            df_hogar_tic, posiciones_tic, list(df_ind.columns) + list(nuevas), "_tic_hogar"
+        ))
+
+    resultado = pd.concat([df_ind, pd.DataFrame(nuevas, index=df_ind.index)], axis=1)
+    return resultado, informe
+
+
+def unir_hogares_tic(df_hogar, df_hogar_tic):
+    """Agrega a cada hogar las columnas del módulo TIC de hogares.
+
+    Usa la misma codificación de claves que unir_bases y, ante claves repetidas en
+    la base TIC, la primera aparición. Devuelve la base de hogares ampliada y un
+    informe con duplicados y hogares sin coincidencia.
+    """
+    claves = claves_comunes(CLAVES_HOGAR, df_hogar, df_hogar_tic)
+    id_hogar, id_hogar_tic = codificar_claves([df_hogar, df_hogar_tic], claves)
+    posiciones = _posiciones(id_hogar, id_hogar_tic)
+    informe = {
+        "duplicados": int(pd.Index(id_hogar_tic).duplicated().sum()),
+        "sin_coincidencia": int((posiciones < 0).sum()),
+    }
+    nuevas = columnas_por_posicion(df_hogar_tic, posiciones, df_hogar.columns, "_tic")
+    return pd.concat([df_hogar, pd.DataFrame(nuevas, index=df_hogar.index)], axis=1), informe